@@ -92,14 +92,13 @@ scriptVersion = '0.6'
 #
 # \uFDE9 fig
 
-import sys, codecs, re
+import time
+importStart = time.time() # when the script began importing its modules, for --timing
+# the modules used only by some options, such as the worker pools, the cache & the server, are imported where they are used,
+# so that a run converting a book or two starts quickly
+import sys, os, codecs, re, bisect
+from collections import namedtuple
 from encodings.aliases import aliases
-import multiprocessing
-if sys.version_info[0] < 3:
-    import Queue
-else:
-    import queue as Queue
-import random
 
 date = date.replace('$', '').strip()[6:16]
 rev = rev.replace('$', '').strip()[5:]
@@ -291,7 +290,26 @@ introPeripherals = {
 osis2locBk = dict()
 loc2osisBk = dict()
 filename2osis = dict()
+headerScanSize = 64 * 1024 # the number of bytes read from each USFM file for its identifiers, if no chapter starts before then
+ideScanSize = 4 * 1024 # the number of bytes at the start of each USFM file searched for its \ide tag
+maxRequestSize = 64 * 1024 * 1024 # the largest USFM a conversion server accepts in one request, in bytes
+inProcessJobs = 2 # runs converting this many books or fewer convert them in the main process, since starting a pool of workers takes longer
+watchInterval = 0.25 # seconds between checks of the watched USFM files, where inotify is not available
+watchSettle = 0.05 # seconds to wait after a watched USFM file is written, for the rest of a save to land
+mmapSize = 64 * 1024 * 1024 # USFM files of this many bytes or more are memory-mapped rather than read into memory
+osisSchemas = dict() # compiled OSIS schemas, by path, so that each is compiled once per process
+profiling = False # whether to record the figures of each conversion stage & regex pattern for --profile
+profile = None # the ConversionProfile of the book being converted, when profiling
+validationSchema = None # the path of the OSIS schema each book is validated against as it is converted, or None not to validate
+# a minimal OSIS document to validate a single book within, its start on a line of its own
+osisBookEnvelope = ('<osis xmlns="http://www.bibletechnologies.net/2003/OSIS/namespace"><osisText osisIDWork="Bible" osisRefWork="Bible">' +
+                    '<header><work osisWork="Bible"/></header>\n', '</osisText></osis>\n')
+# byte order marks, the UTF-32 marks ahead of the UTF-16 marks that they begin with
+byteOrderMarks = ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF32_LE, 'utf-32'), (codecs.BOM_UTF32_BE, 'utf-32'),
+                  (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
 verbose = bool()
+converter = None # the Converter of the command line, which each worker process is also given
+cacheDir = None # the book cache directory of the command line, or None, which each worker process is also given
 ucs4 = (sys.maxunicode > 0xFFFF)
 
 # BEGIN PSF-licensed segment
@@ -333,23 +351,681 @@ def keyusfm(filename):
     return float('inf')
 
 def keysupplied(filename):
-    r"""Sort helper function that keeps the items in the order in which they were supplied (i.e. it doesn't sort at all), returning the number of times the function has been called."""
-    if not hasattr(keysupplied, "counter"):
-       keysupplied.counter = 0
-    keysupplied.counter += 1
-    return keysupplied.counter
+    r"""Sort helper function that keeps the items in the order in which they were supplied (i.e. it doesn't sort at all), returning the same key for every item, since sorting is stable."""
+    return 0
 
-def convertToOsis(sFile):
+def regexPatterns(relaxedConformance):
+    r"""Return a list of (name, pattern, flags) tuples for every regular expression used in the conversion.
+
+    Keyword arguments:
+    relaxedConformance -- Boolean value indicating whether to build the variants for non-standard & deprecated USFM tags.
+
+    """
+    books = bookDict
+    if relaxedConformance:
+        books = dict(list(bookDict.items()) + list(addBookDict.items()))
+
+    # The USFM spec doesn't specifically prohibit regular paragraphs appearing in intros, and sometimes this is purposefully done by translators for various reasons.
+    introParagraphregex = ''
+    if relaxedConformance:
+        introParagraphregex += '|p|pc|pr|m|pmo|pm|pmc|pmr|pi|pi1|pi2|pi3|pi4|pi5|mi|nb|phi|ps|psi|p1|p2|p3|p4|p5'
+
+    paragraphregex = 'pc|pr|m|pmo|pm|pmc|pmr|pi|pi1|pi2|pi3|pi4|pi5|mi|nb'
+    if relaxedConformance:
+        paragraphregex += '|phi|ps|psi|p1|p2|p3|p4|p5'
+
+    sectionDivChar = '[\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE]'
+    # <start-tags-belonging-to-next-verse></verse><verse> --> </verse><verse><start-tags-belonging-to-next-verse>
+    slideTitles = '(('+sectionDivChar+r'<div\s[^>]*><title[^>]*>.*?</title>(\s*</div>'+sectionDivChar+r')?|<title(?! (canonical="true"|type="runningHead"))[^>]*>.*?</title>|<([pl]|lg|list|item)(\s[^>]*)?>|\s)+)'
+    slideStarts = r'((<([pl]|lg|list|item)(\s[^>]*)?>|\s)+)' # last slide doesn't include titles
+    # </verse><verse></end-tags-belonging-to-previous-verse> --> </end-tags-belonging-to-previous-verse></verse><verse>
+    slideSectionEnds = r'((</div>'+sectionDivChar+r'|</([pl]|lg|list|item)(\s[^>]*)?>|\s)+)'
+    slideEnds = r'((</([pl]|lg|list|item)(\s[^>]*)?>|\s)+)' # last slide doesn't include titles
+
+    endBlocks = ['p', 'div', 'note', 'l', 'lg', 'chapter', 'verse', 'head', 'title', 'item', 'list']
+
+    return [
+        # tokenizeUsfm
+        ('tokens.marker', r'\\(\+?\w*)(\*?)', 0),
+        ('tokens.number', r'\s*([^\s\\]+)', 0),
+
+        # cvtPreprocess
+        ('preprocess.lineStart', r'\n\s*([^\\\s])', 0),
+        ('preprocess.trailingSpace', r'\s+\n', 0),
+        ('preprocess.ampersand', r'(?<!\\)&', 0),
+        ('preprocess.lessThan', r'(?<!\\)<', 0),
+        ('preprocess.greaterThan', r'(?<!\\)>', 0),
+        ('preprocess.escape', r'\\(?=[&<>])', 0),
+
+        # cvtRelaxedConformanceRemaps
+        ('remaps.tr', r'\\tr\d\b', 0),
+        ('remaps.pub', r'\\pub\b\s', 0),
+        ('remaps.toc', r'\\toc\b\s', 0),
+        ('remaps.pref', r'\\pref\b\s', 0),
+        ('remaps.maps', r'\\maps\b\s', 0),
+        ('remaps.cov', r'\\cov\b\s', 0),
+        ('remaps.spine', r'\\spine\b\s', 0),
+        ('remaps.pubinfo', r'\\pubinfo\b\s', 0),
+        ('remaps.intro', r'\\intro\b\s', 0),
+        ('remaps.conc', r'\\conc\b\s', 0),
+        ('remaps.glo', r'\\glo\b\s', 0),
+        ('remaps.idx', r'\\idx\b\s', 0),
+
+        # cvtIdentification
+        ('identification.id', r'\\id\s+([A-Z0-9]{3})\b\s*([^\\'+'\n]*?)\n'+r'(.*?)(?=\\id|\Z)', re.DOTALL),
+        ('identification.idHeader', r'\\id\s+([A-Z0-9]{3})\b\s*([^\\'+'\n]*?)\n', 0),
+        ('identification.ide', r'\\ide\b.*\n', 0),
+        ('identification.sts', r'\\sts\b\s+(.+)\s*\n', 0),
+        ('identification.rem', r'\\rem\b\s+(.+)', 0),
+        ('identification.restore', r'\\restore\b\s+(.+)', 0),
+        ('identification.h', r'\\h\b\s+(.+)\s*\n', 0),
+        ('identification.hN', r'\\h(\d)\b\s+(.+)\s*\n', 0),
+        ('identification.toc1', r'\\toc1\b\s+(.+)\s*\n', 0),
+        ('identification.toc2', r'\\toc2\b\s+(.+)\s*\n', 0),
+        ('identification.toc3', r'\\toc3\b\s+(.+)\s*\n', 0),
+
+        # cvtPeripherals
+        ('peripherals.header', r'\\periph\s+([^'+'\n'+r']+)\s*'+'\n', 0),
+        ('peripherals.periph', r'\\periph\s+([^'+'\n'+r']+)\s*'+'\n'+r'(.+?)(?=(\uFDD0|\\periph\b|\\ie))', re.DOTALL),
+
+        # cvtIntroductions
+        ('introductions.divisions', '[\uFDD0\uFDE8\uFDE2\uFDE3]', 0),
+        ('introductions.imt', r'\\imt(\d?)\s+(.+)', 0),
+        ('introductions.imte', r'\\imte(\d?)\b\s+(.+)', 0),
+        ('introductions.is1', r'\\is1?\s+(.+)', 0),
+        ('introductions.is1Close', '(\uFDE2<div type="section" subType="x-introduction">[^\uFDD0\uFDE8\uFDE2]+)(?!\\\\c\\b)', re.DOTALL),
+        ('introductions.is2', r'\\is2\s+(.+)', 0),
+        ('introductions.is2Close', '(\uFDE3<div type="subSection" subType="x-introduction">[^\uFDD0\uFDE8\uFDE2\uFDE3]+)(?!\\\\c\\b)', re.DOTALL),
+        ('introductions.is3', r'\\is3\s+(.+)', 0),
+        ('introductions.is3Close', '(\uFDE4<div type="subSubSection" subType="x-introduction">[^\uFDD0\uFDE8\uFDE2\uFDE3\uFDE4]+)(?!\\\\c\\b)', re.DOTALL),
+        ('introductions.is4', r'\\is4\s+(.+)', 0),
+        ('introductions.is4Close', '(\uFDE5<div type="subSubSubSection" subType="x-introduction">[^\uFDD0\uFDE8\uFDE2\uFDE3\uFDE4\uFDE5]+)(?!\\\\c\\b)', re.DOTALL),
+        ('introductions.is5', r'\\is5\s+(.+)', 0),
+        ('introductions.is5Close', '(\uFDE6<div type="subSubSubSubSection" subType="x-introduction">[^\uFDD0\uFDE8\uFDE2\uFDE3\uFDE4\uFDE5\uFDE6]+?)(?!\\\\c\\b)', re.DOTALL),
+        ('introductions.ip', r'\\ip\s+(.*?)(?=(\\(m\w*|i?m[iq]?|i?b|i?p[iqr]?|lit|cls|tr|io[\dt]?|i?q[t\d]?|i?li\d?|iex?|s[\w\d]*|c'+introParagraphregex+r')\b|<(/?div|p|closer|title)\b))', re.DOTALL),
+        ('introductions.ipTypes', r'\\(ipi|im|imi|ipq|imq|ipr)\s+(.*?)(?=(\\(i?m[iq]?|i?b|i?p[iqr]?|lit|cls|tr|io[\dt]?|i?q[t\d]?|i?li\d?|iex?|s|c'+introParagraphregex+r')\b|<(/?div|p|closer)\b))', re.DOTALL),
+        ('introductions.ib', r'\\ib\b\s?', 0),
+        ('introductions.iq', r'\\iq\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\(iq\d?|fig|q\d?|b)\b|<(lb|title|item|/?div)\b))', re.DOTALL),
+        ('introductions.iqN', r'\\iq(\d)\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\(iq\d?|fig|q\d?|b)\b|<(lb|title|item|/?div)\b))', re.DOTALL),
+        ('introductions.ili', r'\\ili\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\(ili\d?|c|p|iot|io\d?|iex?)\b|<(lb|title|item|/?div)\b))', re.DOTALL),
+        ('introductions.iliN', r'\\ili(\d)\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\(ili\d?|c|p|iot|io\d?|iex?)\b|<(lb|title|item|/?div)\b))', re.DOTALL),
+        ('introductions.itemList', '(<item [^\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4]+</item>)', re.DOTALL),
+        ('introductions.io', r'\\io\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\(iot|io\d?|iex?|c|p)\b|<(lb|title|item|/?div)\b))', re.DOTALL),
+        ('introductions.ioN', r'\\io(\d)\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\(iot|io\d?|iex?|c|p)\b|<(lb|title|item|/?div)\b))', re.DOTALL),
+        ('introductions.iot', r'\\iot\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\(iot|io\d?|iex?|c|p)\b|<(lb|title|item|/?div)\b))', re.DOTALL),
+        ('introductions.outlineList', '(<item [^\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE0]+</item>)', re.DOTALL),
+        ('introductions.outlineHead', 'item type="head"', 0),
+        ('introductions.ior', r'\\ior\b\s+(.+?)\\ior\*', re.DOTALL),
+        ('introductions.iex', r'\\iex\b\s*(.+?)(?=(\s*(\\c|</div type="book">'+'\uFDD0)))', re.DOTALL),
+        ('introductions.iqt', r'\\iqt\s+(.+?)\\iqt\*', re.DOTALL),
+        ('introductions.ie', r'\\ie\b\s*', 0),
+
+        # cvtTitles
+        ('titles.divisions', r'[\uFDD0\uFDE8\uFDD5-\uFDDE]|\\mt', 0),
+        ('titles.ms1', r'\\ms1?\s+(.+)', 0),
+        ('titles.ms1Close', '(\uFDD5[^\uFDD5\uFDD0\uFDE8]+)', re.DOTALL),
+        ('titles.ms2', r'\\ms2\s+(.+)', 0),
+        ('titles.ms2Close', '(\uFDD6[^\uFDD5\uFDD0\uFDE8\uFDD6]+)', re.DOTALL),
+        ('titles.ms3', r'\\ms3\s+(.+)', 0),
+        ('titles.ms3Close', '(\uFDD7[^\uFDD5\uFDD0\uFDE8\uFDD6\uFDD7]+)', re.DOTALL),
+        ('titles.ms4', r'\\ms4\s+(.+)', 0),
+        ('titles.ms4Close', '(\uFDD8[^\uFDD5\uFDD0\uFDE8\uFDD6\uFDD7\uFDD8]+)', re.DOTALL),
+        ('titles.ms5', r'\\ms5\s+(.+)', 0),
+        ('titles.ms5Close', '(\uFDD9[^\uFDD5\uFDD0\uFDE8\uFDD6\uFDD7\uFDD8\uFDD9]+)', re.DOTALL),
+        ('titles.mr', r'\\mr\s+(.+)', 0),
+        ('titles.s1', r'\\s1?\s+(.+)', 0),
+        ('titles.s1Close', r'(\uFDDA<div type="section">.*?)(?=\uFDD5|\uFDD0|\uFDE8|\uFDD6|\uFDD7|\uFDD8|\uFDD9|\uFDDA|\\mt(\d?))', re.DOTALL),
+        ('titles.ss', r'\\ss\s+', 0),
+        ('titles.sss', r'\\sss\s+', 0),
+        ('titles.s2', r'\\s2\s+(.+)', 0),
+        ('titles.s2Close', r'(\uFDDB<div type="subSection">.*?)(?=\uFDD5|\uFDD0|\uFDE8|\uFDD6|\uFDD7|\uFDD8|\uFDD9|\uFDDA|\uFDDB|\\mt(\d?))', re.DOTALL),
+        ('titles.s3', r'\\s3\s+(.+)', 0),
+        ('titles.s3Close', r'(\uFDDC<div type="x-subSubSection">.*?)(?=\uFDD5|\uFDD0|\uFDE8|\uFDD6|\uFDD7|\uFDD8|\uFDD9|\uFDDA|\uFDDB|\uFDDC|\\mt(\d?))', re.DOTALL),
+        ('titles.s4', r'\\s4\s+(.+)', 0),
+        ('titles.s4Close', r'(\uFDDD<div type="x-subSubSubSection">.*?)(?=\uFDD5|\uFDD0|\uFDE8|\uFDD6|\uFDD7|\uFDD8|\uFDD9|\uFDDA|\uFDDB|\uFDDC|\uFDDD|\\mt(\d?))', re.DOTALL),
+        ('titles.s5', r'\\s5\s+(.+)', 0),
+        ('titles.s5Close', r'(\uFDDE<div type="x-subSubSubSubSection">.*?)(?=\uFDD5|\uFDD0|\uFDE8|\uFDD6|\uFDD7|\uFDD8|\uFDD9|\uFDDA|\uFDDB|\uFDDC|\uFDDD|\uFDDE|\\mt(\d?))', re.DOTALL),
+        ('titles.sr', r'\\sr\s+(.+)', 0),
+        ('titles.r', r'\\r\s+(.+)', 0),
+        ('titles.rq', r'\\rq\s+(.+?)\\rq\*', re.DOTALL),
+        ('titles.d', r'\\d\s+(\\v\s+\S+\s+)?(.+)', 0),
+        ('titles.sp', r'\\sp\s+(.+)', 0),
+        ('titles.mt', r'\\mt(\d?)\s+(.+)', 0),
+        ('titles.mte', r'\\mte(\d?)\s+(.+)', 0),
+
+        # cvtChaptersAndVerses
+        ('chapters.c', r'\\c\s+([^\s]+)\b(.+?)(?=(\\c\s+|</div type="book"))', re.DOTALL),
+        ('chapters.cp', r'\\cp\s+(.+?)(?=(\\|\s))', 0),
+        ('chapters.cpStrip', r'\\cp\s+(.+?)(?=(\\|\s))', re.DOTALL),
+        ('chapters.chapterRef', r'"\$BOOK\$\.([^"\.]+)"', 0),
+        ('chapters.ca', r'\\ca\s+(.+?)\\ca\*', 0),
+        ('chapters.caStrip', r'\\ca\s+(.+?)\\ca\*', re.DOTALL),
+        ('chapters.chapterOsisID', r'(osisID="\$BOOK\$\.[^"\.]+)"', 0),
+        ('chapters.chapterSpan', r'(<chapter [^<]+sID[^<]+/>.+?<chapter eID[^>]+/>)', re.DOTALL),
+        ('chapters.genericLabel', r'\\cl\s+([^\n]*?)((.{0,2}</[^>]+>.{0,2})*<chapter osisID="[^\.]+\.1")', re.DOTALL),
+        ('chapters.chapterStart', r'(<chapter osisID="[^\.]+\.(\d+)"[^>]*>)', 0),
+        ('chapters.number', r'\d+', 0),
+        ('chapters.cl', r'\\cl\s+(.+)', 0),
+        ('chapters.cd', r'\\cd\b\s+(.+)', 0),
+        ('chapters.v', r'\\v\s+([\d\-]+)[\s\u00A0]*(.+?)(?=(\\v\s+|</div type="book"|<chapter eID))', re.DOTALL),
+        ('chapters.vaInline', (r'\\va\s(.*?)\\va\*' if relaxedConformance else r'\\va\s(\d+)\\va\*'), 0),
+        ('chapters.vp', r'\\vp\s+(.+?)\\vp\*', 0),
+        ('chapters.vpStrip', r'\\vp\s+(.+?)\\vp\*', re.DOTALL),
+        ('chapters.verseRef', r'"\$BOOK\$\.\$CHAP\$\.([^"\.]+)"', 0),
+        ('chapters.va', r'\\va\s+(.+?)\\va\*', 0),
+        ('chapters.vaStrip', r'\\va\s+(.+?)\\va\*', re.DOTALL),
+        ('chapters.verseOsisID', r'(osisID="\$BOOK\$\.\$CHAP\$\.[^"\.]+)"', 0),
+        ('chapters.verseSpan', r'(<verse [^<]+sID[^<]+/>.+?<verse eID[^>]+/>)', re.DOTALL),
+        ('chapters.bookMark', '\uFDD0', 0),
+        ('chapters.chapterMark', '[\uFDD0\uFDD1]', 0),
+        ('chapters.cStart', r'\\c\s', 0),
+        ('chapters.cEnd', r'\\c\s|</div type="book">', 0),
+        ('chapters.cHeader', r'\\c\s+([^\s]+)\b', 0),
+        ('chapters.vStart', r'\\v\s', 0),
+        ('chapters.vEnd', r'\\v\s|</div type="book">|<chapter eID', 0),
+        ('chapters.vHeader', r'\\v\s+([\d\-]+)[\s\u00A0]*', 0),
+
+        # cvtParagraphs
+        ('paragraphs.p', r'\\p\s+(.*?)(?=(\\(i?m|i?p|lit|cls|tr|p|q|q1|q2|q3|q4|qm|qm1|qm2|qm3|qm4|qr|qc|li\d?|ph\d?|'+paragraphregex+r')\b|<chapter eID|\uFDD4|<(/?div|p|closer)\b))', re.DOTALL),
+        ('paragraphs.pTypes', r'\\('+paragraphregex+r')\s+(.*?)(?=(\\(i?m|i?p|lit|cls|tr|q|q1|q2|q3|q4|qm|qm1|qm2|qm3|qm4|qr|qc|li\d?|ph\d?|'+paragraphregex+r')\b|<chapter eID|\uFDD4|<(/?div|p|closer)\b))', re.DOTALL),
+        ('paragraphs.cls', r'\\m\s+(.+?)(?=(\\(i?m|i?p|lit|cls|tr)\b|<chapter eID|<(/?div|p|closer)\b))', re.DOTALL),
+        ('paragraphs.ph', r'\\ph\b\s*', 0),
+        ('paragraphs.phN', r'\\ph(\d)\b\s*', 0),
+        ('paragraphs.li', r'\\li\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE0\uFDE1\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE\uFDE7'+r']|\\li\d?\b|<(lb|title|item|/?div|/?chapter)\b))', re.DOTALL),
+        ('paragraphs.liN', r'\\li(\d)\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE0\uFDE1\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE\uFDE7'+r']|\\li\d?\b|<(lb|title|item|/?div|/?chapter)\b))', re.DOTALL),
+        ('paragraphs.itemList', '(<item [^\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE0\uFDE1\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE]+</item>)', re.DOTALL),
+        ('paragraphs.b', r'\\b\b\s?', 0),
+
+        # cvtPoetry
+        ('poetry.qa', r'\\qa\s+(.+)', 0),
+        ('poetry.qac', r'\\qac\s+(.+?)\\qac\*', re.DOTALL),
+        ('poetry.qs', r'\\qs\b\s(.+?)\\qs\*', re.DOTALL),
+        ('poetry.fig', r'(\\fig)(?!\*)', re.DOTALL),
+        ('poetry.q', r'\\q\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE\uFDE7\uFDE9'+r']|\\(q[\drcm]?|qm\d)\b|<(l|lb|title|list|/?div)\b))', re.DOTALL),
+        ('poetry.qN', r'\\q(\d)\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE\uFDE7\uFDE9'+r']|\\(q[\drcm]?|qm\d)\b|<(l|lb|title|list|/?div)\b))', re.DOTALL),
+        ('poetry.qTypes', r'\\(qr|qc|qm\d?)\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE\uFDE7\uFDE9'+r']|\\(q[\drcm]?|qm\d)\b|<(l|lb|title|list|/?div)\b))', re.DOTALL),
+        ('poetry.lineGroup', '(<l [^\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE\uFDE7\uFDE9]+</l>)', re.DOTALL),
+        ('poetry.nextLevel', r'(<l level="(\d)")(>.*?</l>(\s*<l level="(\d)">)?)', re.DOTALL),
+
+        # cvtTables
+        ('tables.tr', r'\\tr\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\tr\s|<(lb|/?div|title)\b))', re.DOTALL),
+        ('tables.cell', r'\\(thr?|tcr?)\d*\b\s*(.*?)(?=(\\t[hc]|</row))', re.DOTALL),
+        ('tables.table', r'(<row>.*?</row>)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\tr\s|<(lb|/?div|title)\b))', re.DOTALL),
+
+        # processNote
+        ('notes.fdc', r'\\fdc\b\s(.+?)\\fdc\*', 0),
+        ('notes.fq', r'\\fq\b\s(.+?)(?=(\\f|'+'\uFDDF))', 0),
+        ('notes.fqNested', r'\\\+fq\b\s(.+?)(?=(\\f|\\\+fq\*|'+'\uFDDF))', 0),
+        ('notes.fqa', r'\\fqa\b\s(.+?)(?=(\\f|'+'\uFDDF))', 0),
+        ('notes.fqaNested', r'\\\+fqa\b\s(.+?)(?=(\\f|\\\+fqa\*|'+'\uFDDF))', 0),
+        ('notes.fr', r'\\fr\b\s(.+?)(?=(\\f|'+'\uFDDF))', 0),
+        ('notes.frNested', r'\\\+fr\b\s(.+?)(?=(\\f|\\\+fr\*|'+'\uFDDF))', 0),
+        ('notes.fk', r'\\fk\b\s(.+?)(?=(\\f|'+'\uFDDF))', 0),
+        ('notes.fkNested', r'\\\+fk\b\s(.+?)(?=(\\f|\\\+fk\*|'+'\uFDDF))', 0),
+        ('notes.fl', r'\\fl\b\s(.+?)(?=(\\f|'+'\uFDDF))', 0),
+        ('notes.flNested', r'\\\+fl\b\s(.+?)(?=(\\f|\\\+fl\*|'+'\uFDDF))', 0),
+        ('notes.fv', r'\\fv\b\s(.+?)(?=(\\f|'+'\uFDDF))', 0),
+        ('notes.fvNested', r'\\\+fv\b\s(.+?)(?=(\\f|\\\+fv\*|'+'\uFDDF))', 0),
+        ('notes.fp', r'\\fp\b\s(.+?)(?=(\\fp|\uFDDF</note>|$))', 0),
+        ('notes.fpFirst', r'(<note\b[^>]*?>)(.*?)<p>', 0),
+        ('notes.ft', r'\\ft\s', 0),
+        ('notes.closers', r'\\\+?f(q|qa|t|r|k|l|p|v)\*', 0),
+        ('notes.tags', r'\\(\+?)(f\w*)(\*?)(\s?)|\uFDDF', 0),
+
+        # cvtFootnotes
+        ('footnotes.f', r'\\f\s+([^\s\\]+)?\s*(.+?)\s*\\f\*', re.DOTALL),
+        ('footnotes.fe', r'\\fe\s+([^\s\\]+?)\s*(.+?)\s*\\fe\*', re.DOTALL),
+        ('footnotes.note', r'(<note\b[^>]*?>.*?</note>)', re.DOTALL),
+        ('footnotes.fm', r'\\fm\b\s(.+?)\\fm\*', 0),
+
+        # processXref
+        ('xrefs.xot', r'\\xot\b\s(.+?)(?=(\\x|'+'\uFDDF))', 0),
+        ('xrefs.xnt', r'\\xnt\b\s(.+?)(?=(\\x|'+'\uFDDF))', 0),
+        ('xrefs.xdc', r'\\xdc\b\s(.+?)(?=(\\x|'+'\uFDDF))', 0),
+        ('xrefs.xq', r'\\xq\b\s(.+?)(?=(\\x|'+'\uFDDF))', 0),
+        ('xrefs.xo', r'\\xo\b\s(.+?)(?=(\\x|'+'\uFDDF))', 0),
+        ('xrefs.xk', r'\\xk\b\s(.+?)(?=(\\x|'+'\uFDDF))', 0),
+        ('xrefs.xt', r'\\xt\b\s(.+?)(?=(\\x|'+'\uFDDF))', 0),
+        ('xrefs.xtSee', r'\\xtSee\b\s(.+?)\\xtSee\*', 0),
+        ('xrefs.xtSeeAlso', r'\\xtSeeAlso\b\s(.+?)\\xtSeeAlso\*', 0),
+        ('xrefs.closers', r'\\x(ot|nt|dc|q|t|o|k)\*', 0),
+        ('xrefs.tags', r'\\()(x\w*)(\*?)(\s?)|\uFDDF', 0),
+
+        # cvtCrossReferences
+        ('crossReferences.x', r'\\x\s+([^\s]+?)\s+(.+?)\s*\\x\*', re.DOTALL),
+        ('crossReferences.note', r'(<note [^>]*?type="crossReference"[^>]*>.*?</note>)', re.DOTALL),
+
+        # cvtSpecialText
+        ('specialText.add', r'\\add\s+(.+?)\\add\*', re.DOTALL),
+        ('specialText.wj', r'\\wj\s+(.+?)\\wj\*', re.DOTALL),
+        ('specialText.nd', r'\\nd\s+(.+?)\\nd\*', re.DOTALL),
+        ('specialText.pn', r'\\pn\s+(.+?)\\pn\*', re.DOTALL),
+        ('specialText.qt', r'\\qt\s+(.+?)\\qt\*', re.DOTALL),
+        ('specialText.sig', r'\\sig\s+(.+?)\\sig\*', re.DOTALL),
+        ('specialText.ord', r'\\ord\s+(.+?)\\ord\*', re.DOTALL),
+        ('specialText.tl', r'\\tl\s+(.+?)\\tl\*', re.DOTALL),
+        ('specialText.bk', r'\\bk\s+(.+?)\\bk\*', re.DOTALL),
+        ('specialText.k', r'\\k\s+(.+?)\\k\*', re.DOTALL),
+        ('specialText.lit', r'\\lit\s+(.*?)(?=(\\(i?m|i?p|nb|lit|cls|tr)\b|<(chapter eID|/?div|p|closer)\b))', re.DOTALL),
+        ('specialText.dc', r'\\dc\b\s*(.+?)\\dc\*', re.DOTALL),
+        ('specialText.sls', r'\\sls\b\s*(.+?)\\sls\*', re.DOTALL),
+        ('specialText.addpn', r'\\addpn\s+(.+?)\\addpn\*', re.DOTALL),
+        ('specialText.k1', r'\\k1\s+(.+?)\\k1\*', re.DOTALL),
+        ('specialText.k2', r'\\k2\s+(.+?)\\k2\*', re.DOTALL),
+        ('specialText.k3', r'\\k3\s+(.+?)\\k3\*', re.DOTALL),
+        ('specialText.k4', r'\\k4\s+(.+?)\\k4\*', re.DOTALL),
+        ('specialText.k5', r'\\k5\s+(.+?)\\k5\*', re.DOTALL),
+        ('specialText.xt', r'\\xt\s+(.+?)\\xt\*', re.DOTALL),
+
+        # cvtCharacterStyling
+        ('characterStyling.em', r'\\em\s+(.+?)\\em\*', re.DOTALL),
+        ('characterStyling.bd', r'\\bd\s+(.+?)\\bd\*', re.DOTALL),
+        ('characterStyling.it', r'\\it\s+(.+?)\\it\*', re.DOTALL),
+        ('characterStyling.bdit', r'\\bdit\s+(.+?)\\bdit\*', re.DOTALL),
+        ('characterStyling.no', r'\\no\s+(.+?)\\no\*', re.DOTALL),
+        ('characterStyling.sc', r'\\sc\s+(.+?)\\sc\*', re.DOTALL),
+
+        # cvtCharacterStyles
+        ('characterStyles.tags', r'\\(\+?)([a-z]+\d?)(\*|\s+|\b\s*)', 0),
+
+        # cvtSpacingAndBreaks
+        ('spacingAndBreaks.pb', r'\\pb\s*', re.DOTALL),
+
+        # cvtSpecialFeatures
+        ('specialFeatures.fig', r'\\fig\b\s+([^\|]*)\s*\|([^\|]*)\s*\|([^\|]*)\s*\|([^\|]*)\s*\|([^\|]*)\s*\|([^\|]*)\s*\|([^\\]*)\s*\\fig\*', 0),
+        ('specialFeatures.ndx', r'\\ndx\s+(.+?)(\s*)\\ndx\*', re.DOTALL),
+        ('specialFeatures.pro', r'([^\s]+)(\s*)\\pro\s+(.+?)(\s*)\\pro\*', re.DOTALL),
+        ('specialFeatures.wRelaxed', r'\\w\s+(([^\|\\]*)[^\\]*?)(\s*)\\w\*', re.DOTALL),
+        ('specialFeatures.w', r'\\w\s+(.+?)(\s*)\\w\*', re.DOTALL),
+        ('specialFeatures.wg', r'\\wg\s+(.+?)(\s*)\\wg\*', re.DOTALL),
+        ('specialFeatures.wh', r'\\wh\s+(.+?)(\s*)\\wh\*', re.DOTALL),
+        ('specialFeatures.wr', r'\\wr\s+(.+?)(\s*)\\wr\*', re.DOTALL),
+
+        # cvtStudyBibleContent
+        ('studyBible.ef', r'\\ef\s+([^\s\\]+?)\s*(.+?)\s*\\ef\*', re.DOTALL),
+        ('studyBible.ex', r'\\ex\s+([^\s]+?)\s+(.+?)\s*\\ex\*', re.DOTALL),
+        ('studyBible.esb', r'\\esb\b\s*(.+?)\\esbe\b\s*', re.DOTALL),
+        ('studyBible.cat', r'\\cat\b\s+(.+?)\\cat\*', 0),
+
+        # cvtPrivateUseExtensions
+        ('privateUse.zPaired', r'\\z([^\s]+)\s(.+?)(\\z\1\*)', re.DOTALL),
+        ('privateUse.z', r'\\z([^\s]+)', 0),
+
+        # processOsisIDs
+        ('osisIDs.number', r'\d+', 0),
+        ('osisIDs.verseRange', r'\$BOOK\$\.\$CHAP\$\.(\d+-\d+)"', 0),
+        ('osisIDs.verseSeries', r'\$BOOK\$\.\$CHAP\$\.(\d+(,\d+)+)"', 0),
+        ('osisIDs.book', r'<div type="book" osisID="([^"]+?)"', 0),
+        ('osisIDs.chapter', r'<chapter osisID="[^\."]+\.([^"]+)', 0),
+
+        # shardOsis
+        ('shards.chapter', '\uFDD1', 0),
+        ('shards.cut', r'^(?![^\n]*<(note|title)\b)([^<\n]|<[^>\n]*>)*?\w(?=\w)', re.MULTILINE),
+
+        # osisReorderAndCleanup
+        ('cleanup.bibleBook', '<div type="book" osisID="(' + "|".join([x for x in list(books.values()) if x not in specialBooks]) + ')"', 0),
+        ('cleanup.nonCharacters', '[\uFDD0-\uFDD4\uFDDF-\uFDEF]', 0),
+        ('cleanup.sectionDivs', sectionDivChar, 0),
+        ('cleanup.bookEnd', '(</div type="book">)(</div>'+sectionDivChar+')', 0),
+        ('cleanup.slideVerseEnd', slideTitles+r'(?P<vc><verse eID=[^>]*>)', 0),
+        ('cleanup.slideChapterEnd', slideTitles+r'(?P<vc><chapter eID=[^>]*/>)', 0),
+        ('cleanup.slideChapterStart', slideTitles+r'(?P<vc><chapter [^>]*sID=[^>]*/>)', 0),
+        ('cleanup.slideVerseStart', slideStarts+r'(?P<vc><verse osisID=[^>]*>)', 0),
+        ('cleanup.slideBackVerseStart', r'(<verse osisID=[^>]*>)'+slideSectionEnds, 0),
+        ('cleanup.slideBackChapterStart', r'(<chapter [^>]*sID=[^>]*/>)'+slideSectionEnds, 0),
+        ('cleanup.slideBackChapterEnd', r'(<chapter eID=[^>]*/>)'+slideSectionEnds, 0),
+        ('cleanup.slideBackVerseEnd', r'(<verse eID=[^>]*>)'+slideEnds, 0),
+        ('slides.sectionTitle', sectionDivChar+r'<div\s[^>]*><title[^>]*>', 0),
+        ('slides.sectionEnd', r'\s*</div>'+sectionDivChar, 0),
+        ('slides.div', r'<div\s[^>]*>', 0),
+        ('slides.container', r'<([pl]|lg|list|item)(\s[^>]*)?>', 0),
+        ('slides.verseEnd', r'<verse eID=[^>]*>', 0),
+        ('slides.chapterEnd', r'<chapter eID=[^>]*/>', 0),
+        ('slides.chapterStart', r'<chapter [^>]*sID=[^>]*/>', 0),
+        ('slides.verseStart', r'<verse osisID=[^>]*>', 0),
+        ('cleanup.majorSection', r'(<verse osisID=[^>]*>)([\s\n]*<div type="majorSection"[^>]*>)', 0),
+        ('cleanup.lineNote', r'(</l>)(<note .+?</note>)', 0),
+        ('cleanup.endTagAttributes', r'(</[^\s>]+) [^>]*>', 0),
+        ] + [('cleanup.endBlock.'+endBlock, r'\s+</'+endBlock+'>', 0) for endBlock in endBlocks
+        ] + [('cleanup.endBlockMilestone.'+endBlock, r'\s+<'+endBlock+r'( eID=[^/>]+/>)', 0) for endBlock in endBlocks
+        ] + [
+        ('cleanup.endTagSpaces', r' +((</[^>]+>)+) *', 0),
+        ('cleanup.inlineContainers', r'\s*(</?(title|list|lg)>)\s*', 0),
+        ('cleanup.blockEnd', r'\s*(</(p|l|item)(?=[\s>])[^>]*>)\s*', 0),
+        ('cleanup.blockStart', r'\s*(<(p|l|item)(?=[\s>])[^>]*>)\s*', 0),
+        ('cleanup.verseStart', r'\s*(<verse osisID=[^>]*>)\s*', 0),
+        ('cleanup.verseEnd', r'\s*(<verse eID=[^>]*>)\s*', 0),
+        ('cleanup.chapter', r'\s*(<chapter[^>]*>)\s*', 0),
+        ('cleanup.spaces', '  +', 0),
+        ('cleanup.newlines', ' ?\n\n+', 0),
+
+        # layoutOsis
+        ('layout.tag', r'<[^<>]*>', 0),
+        ('layout.endBlockMilestone', '<(' + '|'.join(endBlocks) + r') eID=[^/>]+/>', 0),
+        ('layout.blockEnd', r'</(p|l|item)(?=[\s>])', 0),
+        ('layout.blockStart', r'<(p|l|item)(?=[\s>])', 0),
+
+        # usfmEncoding
+        ('encoding.ide', br'\\ide\s+([^\n]+)', 0),
+
+        # convertToOsis
+        ('inventory.marker', r'\\\+?([^\W\d]*)', 0),
+        ('debug.unhandledTags', r'(\\[^\s]*)', 0),
+
+        # readIdentifiers
+        ('identifiers.id', r'\\id\s+([A-Z0-9]+)', 0),
+        ('identifiers.toc3', r'\\toc3\b\s+(.+)\s*'+'\n', 0),
+        ('identifiers.chapter', r'\\c\s', 0),
+
+        # validateOsisBook
+        ('validation.bookID', r'<div type="book" osisID="([^"]+)"', 0),
+        # findOsisSchema: the schemas an OSIS schema imports or includes by URL
+        ('validation.schemaImport', r'schemaLocation="(https?://[^"]+)"', 0),
+
+        # __main__
+        ('main.unhandledTags', r'(\\[^\s\*]*)', 0),
+        ]
+
+def compileRegexes(relaxedConformance):
+    r"""Compile the regular expressions for one conformance mode, returning a dict mapping pattern names to compiled patterns.
+
+    Keyword arguments:
+    relaxedConformance -- Boolean value indicating whether to compile the variants for non-standard & deprecated USFM tags.
+
+    """
+    compiled = dict()
+    for name, pattern, flags in regexPatterns(relaxedConformance):
+        compiled[name] = re.compile(pattern, flags)
+    return compiled
+
+def regexStats():
+    r"""Return a one-line report of the number of precompiled regular expressions and the time spent compiling them, for each conformance mode compiled."""
+    return 'Precompiled ' + ', '.join([str(len(regexes[mode])) + (' relaxed' if mode else ' strict') + ' regexes in ' + ('%.1f' % (regexCompileTime[mode]*1000)) + ' ms' for mode in sorted(regexCompileTime)])
+
+class RegexRegistry(dict):
+    r"""The compiled patterns of each conformance mode, by mode, each mode compiled on first use (see compileRegexes). Once startProfiling
+    has set profiled, the patterns of a mode are wrapped in ProfiledPattern as they are compiled."""
+    profiled = False
+
+    def __missing__(self, mode):
+        compileStart = time.time()
+        patterns = compileRegexes(mode)
+        regexCompileTime[mode] = time.time() - compileStart
+        if self.profiled:
+            patterns = profilePatterns(patterns)
+        self[mode] = patterns
+        return patterns
+
+    def either(self):
+        r"""Return the compiled patterns of a mode already compiled, or else of the strict mode, for the patterns that are the same in either
+        mode and are used outside a conversion, so that they never compile a mode that is not otherwise used."""
+        for mode in self:
+            return self[mode]
+        return self[False]
+
+# Every pattern is compiled once per process, when a Converter of its conformance mode is made, so that workers started after it share the
+# compiled patterns and never overflow the re module's own cache and recompile; a mode never used is never compiled.
+regexes = RegexRegistry()
+regexCompileTime = dict()
+
+class ProfiledPattern(object):
+    r"""A compiled pattern that records its calls, the time spent in them, and the substitutions it makes in the current profile, for --profile.
+    Any other attribute is that of the compiled pattern.
+
+    Keyword arguments:
+    name -- The name of the pattern in regexPatterns
+    pattern -- The compiled pattern
+
+    """
+    def __init__(self, name, pattern):
+        self.name = name
+        self.pattern = pattern
+
+    def __getattr__(self, attribute):
+        return getattr(self.pattern, attribute)
+
+    def call(self, method, *args):
+        r"""Call a method of the compiled pattern, recording it in the current profile, returning its result."""
+        start = time.time()
+        result = getattr(self.pattern, method)(*args)
+        # finditer matches lazily, so its matches are found here to be timed
+        if method == 'finditer':
+            result = iter(list(result))
+        if profile:
+            profile.recordPattern(self.name, time.time() - start, result[1] if method == 'subn' else 0)
+        return result
+
+    def sub(self, repl, string, count=0):
+        return self.subn(repl, string, count)[0]
+
+    def subn(self, *args):
+        return self.call('subn', *args)
+
+    def search(self, *args):
+        return self.call('search', *args)
+
+    def match(self, *args):
+        return self.call('match', *args)
+
+    def fullmatch(self, *args):
+        return self.call('fullmatch', *args)
+
+    def findall(self, *args):
+        return self.call('findall', *args)
+
+    def finditer(self, *args):
+        return self.call('finditer', *args)
+
+    def split(self, *args):
+        return self.call('split', *args)
+
+class ConversionProfile(object):
+    r"""The figures recorded for --profile while converting a book: for each stage, its calls, wall time, regex substitutions, and peak
+    traced memory above that at its start, if memory is being traced; and for each regex pattern, its calls, time, and substitutions."""
+    def __init__(self):
+        self.stages = dict()
+        self.patterns = dict()
+        self.current = None
+
+    def runStage(self, name, stage, *args):
+        r"""Run a conversion stage, recording its figures under name, returning its result."""
+        import tracemalloc
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            memory = tracemalloc.get_traced_memory()[0]
+        figures = self.stages.setdefault(name, {'calls':0, 'time':0.0, 'substitutions':0, 'peakMemory':0})
+        self.current = figures
+        start = time.time()
+        try:
+            return stage(*args)
+        finally:
+            figures['calls'] += 1
+            figures['time'] += time.time() - start
+            if tracing:
+                figures['peakMemory'] = max(figures['peakMemory'], tracemalloc.get_traced_memory()[1] - memory)
+            self.current = None
+
+    def recordPattern(self, name, seconds, substitutions):
+        r"""Record a call of a regex pattern, against it and against the stage running."""
+        figures = self.patterns.setdefault(name, {'calls':0, 'time':0.0, 'substitutions':0})
+        figures['calls'] += 1
+        figures['time'] += seconds
+        figures['substitutions'] += substitutions
+        if self.current:
+            self.current['substitutions'] += substitutions
+
+    def figures(self):
+        r"""Return the figures as a dict of the stages & patterns, each a dict of figures by name."""
+        return {'stages':self.stages, 'patterns':self.patterns}
+
+def profilePatterns(patterns):
+    r"""Return the compiled patterns of a conformance mode, each wrapped in a ProfiledPattern.
+
+    Keyword arguments:
+    patterns -- A dict of the compiled patterns by name, as returned by compileRegexes
+
+    """
+    return dict([(name, ProfiledPattern(name, pattern)) for name, pattern in patterns.items()])
+
+def startProfiling():
+    r"""Wrap every compiled pattern in a ProfiledPattern, and each pattern compiled later as it is compiled, and start tracing memory
+    allocations, for --profile."""
+    import tracemalloc
+    # only the modes already compiled are wrapped here, rather than compiling the other mode just to wrap it
+    if not regexes.profiled:
+        regexes.profiled = True
+        for mode in list(regexes):
+            regexes[mode] = profilePatterns(regexes[mode])
+    tracemalloc.start()
+
+def mergeProfiles(into, figures):
+    r"""Add the figures of one profile to those of another, such as those of a chapter range to those of its book.
+
+    Keyword arguments:
+    into -- The figures to add to, as returned by ConversionProfile.figures, changed in place
+    figures -- The figures to add
+
+    """
+    for kind in figures:
+        for name, counts in figures[kind].items():
+            total = into.setdefault(kind, dict()).setdefault(name, dict((figure, 0) for figure in counts))
+            for figure, value in counts.items():
+                total[figure] = max(total[figure], value) if figure == 'peakMemory' else total[figure] + value
+
+def profileSummary(books, count=10):
+    r"""Return a text summary of the slowest stages, books, and regex patterns over all the books profiled.
+
+    Keyword arguments:
+    books -- A dict of the figures of each book, as returned by ConversionProfile.figures, by USFM filename
+    count -- The number of each to list
+
+    """
+    totals = dict()
+    for figures in books.values():
+        mergeProfiles(totals, figures)
+    lines = ['Slowest stages:']
+    for name, figures in sorted(totals.get('stages', dict()).items(), key=lambda item: -item[1]['time'])[:count]:
+        lines.append('  %-36s %8.3f s %9d substitutions %9.1f MiB peak' % (name, figures['time'], figures['substitutions'], figures['peakMemory']/1048576.0))
+    lines.append('Slowest books:')
+    bookTimes = [(sum([figures['time'] for figures in books[book].get('stages', dict()).values()]), book) for book in books]
+    for seconds, book in sorted(bookTimes, reverse=True)[:count]:
+        lines.append('  %-36s %8.3f s' % (book, seconds))
+    lines.append('Slowest regex patterns:')
+    for name, figures in sorted(totals.get('patterns', dict()).items(), key=lambda item: -item[1]['time'])[:count]:
+        lines.append('  %-36s %8.3f s %9d calls %9d substitutions' % (name, figures['time'], figures['calls'], figures['substitutions']))
+    return '\n'.join(lines)
+
+UsfmToken = namedtuple('UsfmToken', 'marker closer number attributes text line')
+
+def tokenizeUsfm(usfm, relaxedConformance, line=1):
+    r"""Split a USFM document into a list of UsfmToken tuples in a single pass.
+    Each token spans one marker and the text following it, up to the next marker, so joining the text of all tokens reproduces the document.
+    Text preceding the first marker, and OSIS markup generated by the token stages, are held in tokens whose marker is None.
+
+    Keyword arguments:
+    usfm -- The document as a string.
+    relaxedConformance -- Boolean value indicating whether the document is converted in the relaxed mode, whose patterns are used.
+    line -- Source line number of the first character of the document.
+
+    """
+    markerRegex = regexes[relaxedConformance]['tokens.marker']
+    numberRegex = regexes[relaxedConformance]['tokens.number']
+    tokens = list()
+    matches = list(markerRegex.finditer(usfm))
+    end = matches[0].start() if matches else len(usfm)
+    if end:
+        tokens.append(UsfmToken(None, False, None, None, usfm[:end], line))
+        line += usfm.count('\n', 0, end)
+    for i, m in enumerate(matches):
+        end = matches[i+1].start() if i+1 < len(matches) else len(usfm)
+        marker, closer = m.group(1), bool(m.group(2))
+        number = None
+        if closer:
+            # \w word|lemma="..."\w* -- the attributes belong to the span being closed
+            if tokens and tokens[-1].marker == marker and not tokens[-1].closer and '|' in tokens[-1].text:
+                tokens[-1] = tokens[-1]._replace(attributes=tokens[-1].text.rsplit('|', 1)[1])
+        elif marker in ('c', 'v', 'ca', 'va'):
+            n = numberRegex.match(usfm, m.end(), end)
+            if n:
+                number = n.group(1)
+        tokens.append(UsfmToken(marker, closer, number, None, usfm[m.start():end], line))
+        line += usfm.count('\n', m.start(), end)
+    return tokens
+
+def textToken(text, line=0):
+    r"""Return a marker-less UsfmToken holding generated OSIS markup or plain text.
+
+    Keyword arguments:
+    text -- The text of the token.
+    line -- Source line number the text was generated from.
+
+    """
+    return UsfmToken(None, False, None, None, text, line)
+
+def joinTokens(tokens):
+    r"""Join a list of UsfmToken tuples back into a single string."""
+    return ''.join([t.text for t in tokens])
+
+def convertToOsis(sFile, shard=None, converter=None, usfm=None, cleanupOnly=False):
     r"""Open a USFM file and return a string consisting of its OSIS equivalent.
+    With shard, return only the OSIS of one chapter range of the book, or None if the book cannot be split (see shardOsis).
 
     Keyword arguments:
     sFile -- Path to the USFM file to be converted
+    shard -- A tuple of the index of the chapter range to convert, from 0, and the number of ranges
+    converter -- The Converter whose options to convert with; None converts with the default options
+    usfm -- The USFM text to convert, as a string, in place of reading sFile, which then only names the text in messages
+    cleanupOnly -- Boolean value indicating whether usfm is OSIS already converted, which is only given the final clean-up
 
     """
-    global encoding
-    global relaxedConformance
+    # the stages below read the options from these names, rather than from globals
+    if converter is None:
+        converter = Converter()
+    encoding = converter.encoding
+    relaxedConformance = converter.relaxedConformance
+    engine = converter.engine
+    compact = converter.compact
+    DEBUG = converter.debug
+    bookDict = converter.bookDict
+    verbosePrint = converter.verbosePrint
+
+    if shard:
+        verbosePrint(('Processing: ' + sFile + ' (chapter range ' + str(shard[0]+1) + ' of ' + str(shard[1]) + ')'))
+    else:
+        verbosePrint(('Processing: ' + sFile))
+
+    rx = regexes[relaxedConformance]
+
+    def runStage(stage, *args):
+        r"""Run a conversion stage, recording its figures in the profile when profiling, returning its result.
+
+        Keyword arguments:
+        stage -- The function to run
+        args -- The arguments to run it with
+
+        """
+        if profile is None:
+            return stage(*args)
+        return profile.runStage(stage.__name__, stage, *args)
+
+    # the markers held by the book, without their + prefixes & trailing digits; the token engine lists them so that it can skip the passes
+    # for markers the book does not hold, while None runs every pass
+    inventory = None
+    passCounts = [0, 0]
+
+    def holds(*markers):
+        r"""Return whether the book may hold any of the given markers, counting the passes run & skipped for the verbose report.
+
+        Keyword arguments:
+        markers -- The markers, named as in the marker inventory.
 
-    verbosePrint(('Processing: ' + sFile))
+        """
+        passCounts[0] += 1
+        if inventory is None or not inventory.isdisjoint(markers):
+            passCounts[1] += 1
+            return True
+        return False
 
     def cvtPreprocess(osis, relaxedConformance):
         r"""Perform preprocessing on a USFM document, returning the processed text as a string.
@@ -362,11 +1038,11 @@ def convertToOsis(sFile):
         """
 
         # lines should never start with non-tags
-        osis = re.sub(r'\n\s*([^\\\s])', r' \1', osis)  # TODO: test this
+        osis = rx['preprocess.lineStart'].sub(r' \1', osis)  # TODO: test this
         # convert CR to LF
         osis = osis.replace('\r', '\n')
         # lines should never end with whitespace (other than \n)
-        osis = re.sub(r'\s+\n', '\n', osis)
+        osis = rx['preprocess.trailingSpace'].sub('\n', osis)
         # replace with XML entities, as necessary
         if not relaxedConformance:
             osis = osis.replace('&', '&amp;')
@@ -374,10 +1050,10 @@ def convertToOsis(sFile):
             osis = osis.replace('>', '&gt;')
         # but in relaxedConformance, support escaping these with \
         else:
-            osis = re.sub(r'(?<!\\)&', '&amp;', osis)
-            osis = re.sub(r'(?<!\\)<', '&lt;', osis)
-            osis = re.sub(r'(?<!\\)>', '&gt;', osis)
-            osis = re.sub(r'\\(?=[&<>])', '', osis)
+            osis = rx['preprocess.ampersand'].sub('&amp;', osis)
+            osis = rx['preprocess.lessThan'].sub('&lt;', osis)
+            osis = rx['preprocess.greaterThan'].sub('&gt;', osis)
+            osis = rx['preprocess.escape'].sub('', osis)
 
         #osis = re.sub('\n'+r'(\\[^\s]+\b\*)', r' \1', osis)
 
@@ -398,32 +1074,32 @@ def convertToOsis(sFile):
             return osis
 
         # \tr#: DEP: map to \tr
-        osis = re.sub(r'\\tr\d\b', r'\\tr', osis)
+        osis = rx['remaps.tr'].sub(r'\\tr', osis)
 
         # remapped 2.0 periphs
         # \pub
-        osis = re.sub(r'\\pub\b\s', r'\\periph Publication Data'+'\n', osis)
+        osis = rx['remaps.pub'].sub(r'\\periph Publication Data'+'\n', osis)
         # \toc : \periph Table of Contents
-        osis = re.sub(r'\\toc\b\s', r'\\periph Table of Contents'+'\n', osis)
+        osis = rx['remaps.toc'].sub(r'\\periph Table of Contents'+'\n', osis)
         # \pref
-        osis = re.sub(r'\\pref\b\s', r'\\periph Preface'+'\n', osis)
+        osis = rx['remaps.pref'].sub(r'\\periph Preface'+'\n', osis)
         # \maps
-        osis = re.sub(r'\\maps\b\s', r'\\periph Map Index'+'\n', osis)
+        osis = rx['remaps.maps'].sub(r'\\periph Map Index'+'\n', osis)
         # \cov
-        osis = re.sub(r'\\cov\b\s', r'\\periph Cover'+'\n', osis)
+        osis = rx['remaps.cov'].sub(r'\\periph Cover'+'\n', osis)
         # \spine
-        osis = re.sub(r'\\spine\b\s', r'\\periph Spine'+'\n', osis)
+        osis = rx['remaps.spine'].sub(r'\\periph Spine'+'\n', osis)
         # \pubinfo
-        osis = re.sub(r'\\pubinfo\b\s', r'\\periph Publication Information'+'\n', osis)
+        osis = rx['remaps.pubinfo'].sub(r'\\periph Publication Information'+'\n', osis)
 
         # \intro
-        osis = re.sub(r'\\intro\b\s', r'\\id INT'+'\n', osis)
+        osis = rx['remaps.intro'].sub(r'\\id INT'+'\n', osis)
         # \conc
-        osis = re.sub(r'\\conc\b\s', r'\\id CNC'+'\n', osis)
+        osis = rx['remaps.conc'].sub(r'\\id CNC'+'\n', osis)
         # \glo
-        osis = re.sub(r'\\glo\b\s', r'\\id GLO'+'\n', osis)
+        osis = rx['remaps.glo'].sub(r'\\id GLO'+'\n', osis)
         # \idx
-        osis = re.sub(r'\\idx\b\s', r'\\id TDX'+'\n', osis)
+        osis = rx['remaps.idx'].sub(r'\\id TDX'+'\n', osis)
 
         return osis
 
@@ -440,33 +1116,58 @@ def convertToOsis(sFile):
         """
 
         # \id_<CODE>_(Name of file, Book name, Language, Last edited, Date etc.)
-        osis = re.sub(r'\\id\s+([A-Z0-9]{3})\b\s*([^\\'+'\n]*?)\n'+r'(.*?)(?=\\id|\Z)', lambda m: '\uFDD0<div type="book" osisID="' + bookDict[m.group(1)] + '"' + (' canonical="true"' if bookDict[m.group(1)] not in specialBooks else '') + '>\n' + (('<!-- id comment - ' + m.group(2) + ' -->\n') if m.group(2) else '') + m.group(3) + '</div type="book">\uFDD0\n' , osis, flags=re.DOTALL)
+        osis = rx['identification.id'].sub(lambda m: bookStart(m.group(1), m.group(2)) + m.group(3) + '</div type="book">\uFDD0\n', osis)
+
+        return cvtIdentificationLines(osis, relaxedConformance)
+
+
+    def bookStart(code, comment):
+        r"""Return the opening <div> of a book, as generated for its \id tag.
+
+        Keyword arguments:
+        code -- The USFM book code.
+        comment -- The text following the book code on the \id line.
+
+        """
+        return '\uFDD0<div type="book" osisID="' + bookDict[code] + '"' + (' canonical="true"' if bookDict[code] not in specialBooks else '') + '>\n' + (('<!-- id comment - ' + comment + ' -->\n') if comment else '')
+
+
+    def cvtIdentificationLines(osis, relaxedConformance):
+        r"""Converts the single-line USFM **Identification** tags to OSIS, returning the processed text as a string.
+
+        Supported tags: \ide, \sts, \rem, \h, \toc1, \toc2, \toc3
+
+        Keyword arguments:
+        osis -- The document (or the lines holding these tags) as a string.
+        relaxedConformance -- Boolean value indicating whether to process non-standard & deprecated USFM tags.
+
+        """
 
         # \ide_<ENCODING>
-        osis = re.sub(r'\\ide\b.*\n', '', osis) # delete, since this was handled above
+        osis = rx['identification.ide'].sub('', osis) # delete, since this was handled above
 
         # \sts_<STATUS CODE>
-        osis = re.sub(r'\\sts\b\s+(.+)\s*\n', r'<milestone type="x-usfm-sts" n="\1"/>'+'\n', osis)
+        osis = rx['identification.sts'].sub(r'<milestone type="x-usfm-sts" n="\1"/>'+'\n', osis)
 
         # \rem_text...
-        osis = re.sub(r'\\rem\b\s+(.+)', r'<!-- rem - \1 -->', osis)
+        osis = rx['identification.rem'].sub(r'<!-- rem - \1 -->', osis)
 
         # \restore_text...
         if relaxedConformance:
-            osis = re.sub(r'\\restore\b\s+(.+)', r'<!-- restore - \1 -->', osis)
+            osis = rx['identification.restore'].sub(r'<!-- restore - \1 -->', osis)
 
         # \h#_text...
-        osis = re.sub(r'\\h\b\s+(.+)\s*\n', '\uFDD4<title type="runningHead">\\1</title>\n', osis)
-        osis = re.sub(r'\\h(\d)\b\s+(.+)\s*\n', '\uFDD4<title type="runningHead" n="\\1">\\2</title>\n', osis)
+        osis = rx['identification.h'].sub('\uFDD4<title type="runningHead">\\1</title>\n', osis)
+        osis = rx['identification.hN'].sub('\uFDD4<title type="runningHead" n="\\1">\\2</title>\n', osis)
 
         # \toc1_text...
-        osis = re.sub(r'\\toc1\b\s+(.+)\s*\n', '<milestone type="x-usfm-toc1" n="\\1"/>\n', osis)
+        osis = rx['identification.toc1'].sub('<milestone type="x-usfm-toc1" n="\\1"/>\n', osis)
 
         # \toc2_text...
-        osis = re.sub(r'\\toc2\b\s+(.+)\s*\n', '<milestone type="x-usfm-toc2" n="\\1"/>\n', osis)
+        osis = rx['identification.toc2'].sub('<milestone type="x-usfm-toc2" n="\\1"/>\n', osis)
 
         # \toc3_text...
-        osis = re.sub(r'\\toc3\b\s+(.+)\s*\n', '<milestone type="x-usfm-toc3" n="\\1"/>\n', osis)
+        osis = rx['identification.toc3'].sub('<milestone type="x-usfm-toc3" n="\\1"/>\n', osis)
 
         return osis
 
@@ -491,21 +1192,238 @@ def convertToOsis(sFile):
 
             """
             periphType,contents = matchObject.groups()[0:2]
-            periph = '\uFDE8<div type="'
-            if periphType in peripherals:
-                periph += peripherals[periphType]
-            elif periphType in introPeripherals:
-                periph += 'introduction" subType="x-' + introPeripherals[periphType]
-            else:
-                periph += 'x-unknown'
-            periph += '">\n' + contents + '</div>\uFDE8\n'
-            return periph
+            return periphStart(periphType) + contents + '</div>\uFDE8\n'
 
-        osis = re.sub(r'\\periph\s+([^'+'\n'+r']+)\s*'+'\n'+r'(.+?)(?=(\uFDD0|\\periph\b|\\ie))', tagPeriph, osis, flags=re.DOTALL)
+        osis = rx['peripherals.periph'].sub(tagPeriph, osis)
 
         return osis
 
+
+    def periphStart(periphType):
+        r"""Return the opening <div> of a peripheral, as generated for its \periph tag.
+
+        Keyword arguments:
+        periphType -- The peripheral type named by the \periph tag.
+
+        """
+        periph = '\uFDE8<div type="'
+        if periphType in peripherals:
+            periph += peripherals[periphType]
+        elif periphType in introPeripherals:
+            periph += 'introduction" subType="x-' + introPeripherals[periphType]
+        else:
+            periph += 'x-unknown'
+        return periph + '">\n'
+
+
+    def lineEnd(tokens, i):
+        r"""Return the index just past the token that ends the line begun by tokens[i].
+        A tag with nothing after it on its own line takes the following line as its text, just as the \s+ of the regex engine's patterns does.
+
+        Keyword arguments:
+        tokens -- The document as a list of UsfmToken tuples.
+        i -- Index of the token holding the tag.
+
+        """
+        skip = 1 + len(tokens[i].marker) + tokens[i].closer if tokens[i].marker is not None else 0
+        text = ''
+        j = i
+        while j < len(tokens):
+            text += tokens[j].text
+            j += 1
+            if '\n' in text[skip:].lstrip():
+                break
+        return j
+
+
+    def cvtRelaxedConformanceRemapsTokens(tokens, relaxedConformance):
+        r"""Token-stream counterpart of cvtRelaxedConformanceRemaps, returning the processed tokens as a list.
+
+        Keyword arguments:
+        tokens -- The document as a list of UsfmToken tuples.
+        relaxedConformance -- Boolean value indicating whether to process non-standard & deprecated USFM tags.
+
+        """
+
+        if not relaxedConformance:
+            return tokens
+
+        remaps = {'pub':'\\periph Publication Data', 'toc':'\\periph Table of Contents', 'pref':'\\periph Preface',
+                  'maps':'\\periph Map Index', 'cov':'\\periph Cover', 'spine':'\\periph Spine',
+                  'pubinfo':'\\periph Publication Information',
+                  'intro':'\\id INT', 'conc':'\\id CNC', 'glo':'\\id GLO', 'idx':'\\id TDX'}
+
+        remapped = list()
+        for t in tokens:
+            # \tr#: DEP: map to \tr
+            if t.marker and len(t.marker) == 3 and t.marker.startswith('tr') and t.marker[2].isdigit():
+                t = t._replace(marker='tr', text='\\tr' + t.text[4:])
+            # remapped 2.0 periphs & books
+            elif t.marker in remaps and not t.closer and t.text[len(t.marker)+1:len(t.marker)+2].isspace():
+                remapped.extend(tokenizeUsfm(remaps[t.marker] + '\n' + t.text[len(t.marker)+2:], relaxedConformance, t.line))
+                continue
+            remapped.append(t)
+        return remapped
+
+
+    def cvtIdentificationTokens(tokens, relaxedConformance):
+        r"""Token-stream counterpart of cvtIdentification, returning the processed tokens as a list.
+
+        Keyword arguments:
+        tokens -- The document as a list of UsfmToken tuples.
+        relaxedConformance -- Boolean value indicating whether to process non-standard & deprecated USFM tags.
+
+        """
+
+        # \id_<CODE>_(Name of file, Book name, Language, Last edited, Date etc.)
+        # A book runs up to the next tag starting with \id (including \ide), as in the regex engine.
+        books = list()
+        i = 0
+        while i < len(tokens):
+            t = tokens[i]
+            header = rx['identification.idHeader'].match(t.text) if t.marker == 'id' else None
+            if not header:
+                books.append(t)
+                i += 1
+                continue
+            j = i + 1
+            while j < len(tokens) and not (tokens[j].marker or '').startswith('id'):
+                j += 1
+            books.append(textToken(bookStart(header.group(1), header.group(2)), t.line))
+            books.extend(tokenizeUsfm(t.text[header.end():], relaxedConformance, t.line + header.group(0).count('\n')))
+            books.extend(tokens[i+1:j])
+            books.append(textToken('</div type="book">', t.line))
+            books.append(textToken('\uFDD0\n', t.line))
+            i = j
+
+        # the remaining identification tags are converted line by line
+        lineTags = ['ide', 'sts', 'rem', 'h', 'toc1', 'toc2', 'toc3'] + ['h' + str(n) for n in range(10)]
+        if relaxedConformance:
+            lineTags.append('restore')
+        tokens = list()
+        i = 0
+        while i < len(books):
+            if books[i].marker in lineTags:
+                # take in the lines of every tag met on the way, as the patterns can run past the end of a line
+                j = k = i
+                while k < j or k == i:
+                    if books[k].marker in lineTags:
+                        j = max(j, lineEnd(books, k))
+                        # deleting an \ide line joins the line after it to the text before it
+                        if books[k].marker == 'ide' and j < len(books):
+                            j = lineEnd(books, j)
+                    k += 1
+                tokens.extend(tokenizeUsfm(cvtIdentificationLines(joinTokens(books[i:j]), relaxedConformance), relaxedConformance, books[i].line))
+                i = j
+            else:
+                tokens.append(books[i])
+                i += 1
+        return tokens
+
+
+    def cvtPeripheralsTokens(tokens, relaxedConformance):
+        r"""Token-stream counterpart of cvtPeripherals, returning the processed tokens as a list.
+
+        Keyword arguments:
+        tokens -- The document as a list of UsfmToken tuples.
+        relaxedConformance -- Boolean value indicating whether to process non-standard & deprecated USFM tags.
+
+        """
+
+        def endsPeriph(t):
+            r"""Return True if the token starts a book, a peripheral or an \ie tag."""
+            if t.marker is None:
+                return t.text.startswith('\uFDD0')
+            return t.marker == 'periph' or t.marker.startswith('ie')
+
+        # a book can start in the middle of generated text, so split that text where each book starts
+        starts = list()
+        for t in tokens:
+            if '\uFDD0' in t.text[1:]:
+                parts = t.text.split('\uFDD0')
+                if parts[0]:
+                    starts.append(t._replace(text=parts[0]))
+                starts.extend([textToken('\uFDD0' + part, t.line) for part in parts[1:]])
+            else:
+                starts.append(t)
+        tokens = starts
+
+        # \periph
+        periphs = list()
+        i = 0
+        while i < len(tokens):
+            t = tokens[i]
+            if t.marker != 'periph' or t.closer:
+                periphs.append(t)
+                i += 1
+                continue
+            j = lineEnd(tokens, i)
+            line = joinTokens(tokens[i:j])
+            header = rx['peripherals.header'].match(line)
+            if header:
+                contents = tokenizeUsfm(line[header.end():], relaxedConformance, t.line + header.group(0).count('\n'))
+                # the contents of a peripheral are never empty, so a tag directly after the header belongs to them
+                k = j if contents else j + 1
+                while k < len(tokens) and not endsPeriph(tokens[k]):
+                    k += 1
+            if not header or k >= len(tokens):
+                periphs.append(t)
+                i += 1
+                continue
+            periphs.append(textToken(periphStart(header.group(1)), t.line))
+            periphs.extend(contents)
+            periphs.extend(tokens[j:k])
+            periphs.append(textToken('</div>\uFDE8\n', t.line))
+            i = k
+        return periphs
+
         
+    def closeDivisions(osis, events, levels, titleLevel=None):
+        r"""Close nested divisions in a single sweep over the text, returning the processed text as a string.
+        A stack of the open divisions is kept. An open division is closed where a division of the same or an outer level starts,
+        at a book or peripheral boundary, and at the end of the text.
+
+        Keyword arguments:
+        osis -- The document as a string.
+        events -- Compiled regex matching the non-characters in levels, book & peripheral boundaries and, if titleLevel is given, \mt tags.
+        levels -- The non-characters marking the start of each level of division, outermost first.
+        titleLevel -- Index into levels of the first level that is also closed by an \mt tag. These levels are only closed at the end of the text if an outer division is still open.
+
+        """
+
+        def divisionEnds(closing):
+            r"""Return the end tags for a list of division levels, outermost first, in the order the regex engine inserts them."""
+            return '</div>' * len(closing) + ''.join([levels[level] + '\n' for level in reversed(closing)])
+
+        stack = list()
+        sweep = list()
+        last = 0
+        for m in events.finditer(osis):
+            event = m.group(0)
+            if event == '\\mt':
+                level = titleLevel
+            elif event in levels:
+                level = levels.index(event)
+            else:
+                level = 0
+            keep = len(stack)
+            while keep and stack[keep-1] >= level:
+                keep -= 1
+            if keep < len(stack):
+                sweep.append(osis[last:m.start()])
+                sweep.append(divisionEnds(stack[keep:]))
+                last = m.start()
+                del stack[keep:]
+            if event in levels:
+                stack.append(level)
+        if stack and (titleLevel is None or stack[0] < titleLevel):
+            sweep.append(osis[last:])
+            sweep.append(divisionEnds(stack))
+            last = len(osis)
+        sweep.append(osis[last:])
+        return ''.join(sweep)
+
+
     def cvtIntroductions(osis, relaxedConformance):
         r"""Converts USFM **Introduction** tags to OSIS, returning the processed text as a string.
 
@@ -516,32 +1434,37 @@ def convertToOsis(sFile):
         relaxedConformance -- Boolean value indicating whether to process non-standard & deprecated USFM tags.
 
         """
+        if not holds('imt', 'imte', 'is', 'ip', 'ipi', 'im', 'imi', 'ipq', 'imq', 'ipr', 'iq', 'ib', 'ili', 'iot', 'io', 'ior', 'iex', 'iqt', 'ie'):
+            return osis
 
         # \imt#_text...
-        osis = re.sub(r'\\imt(\d?)\s+(.+)', lambda m: '\uFDD4<title ' + ('level="'+m.group(1)+'" ' if m.group(1) else '') + 'type="main" subType="x-introduction">' + m.group(2) + '</title>', osis)
+        osis = rx['introductions.imt'].sub(lambda m: '\uFDD4<title ' + ('level="'+m.group(1)+'" ' if m.group(1) else '') + 'type="main" subType="x-introduction">' + m.group(2) + '</title>', osis)
 
         # \imte#_text...
-        osis = re.sub(r'\\imte(\d?)\b\s+(.+)', lambda m: '\uFDD4<title ' + ('level="'+m.group(1)+'" ' if m.group(1) else '') + 'type="main" subType="x-introduction-end">' + m.group(2) + '</title>', osis)
+        osis = rx['introductions.imte'].sub(lambda m: '\uFDD4<title ' + ('level="'+m.group(1)+'" ' if m.group(1) else '') + 'type="main" subType="x-introduction-end">' + m.group(2) + '</title>', osis)
 
         # \is#_text...
-        osis = re.sub(r'\\is1?\s+(.+)', lambda m: '\uFDE2<div type="section" subType="x-introduction">\uFDD4<title>' + m.group(1) + '</title>', osis)
-        osis = re.sub('(\uFDE2<div type="section" subType="x-introduction">[^\uFDD0\uFDE8\uFDE2]+)(?!\\\\c\\b)', r'\1'+'</div>\uFDE2\n', osis, flags=re.DOTALL)
-        osis = re.sub(r'\\is2\s+(.+)', lambda m: '\uFDE3<div type="subSection" subType="x-introduction">\uFDD4<title level="2">' + m.group(1) + '</title>', osis)
-        osis = re.sub('(\uFDE3<div type="subSection" subType="x-introduction">[^\uFDD0\uFDE8\uFDE2\uFDE3]+)(?!\\\\c\\b)', r'\1'+'</div>\uFDE3\n', osis, flags=re.DOTALL)
-        osis = re.sub(r'\\is3\s+(.+)', lambda m: '\uFDE4<div type="x-subSubSection" subType="x-introduction">\uFDD4<title level="3">' + m.group(1) + '</title>', osis)
-        osis = re.sub('(\uFDE4<div type="subSubSection" subType="x-introduction">[^\uFDD0\uFDE8\uFDE2\uFDE3\uFDE4]+)(?!\\\\c\\b)', r'\1'+'</div>\uFDE4\n', osis, flags=re.DOTALL)
-        osis = re.sub(r'\\is4\s+(.+)', lambda m: '\uFDE5<div type="x-subSubSubSection" subType="x-introduction">\uFDD4<title level="4">' + m.group(1) + '</title>', osis)
-        osis = re.sub('(\uFDE5<div type="subSubSubSection" subType="x-introduction">[^\uFDD0\uFDE8\uFDE2\uFDE3\uFDE4\uFDE5]+)(?!\\\\c\\b)', r'\1'+'</div>\uFDE5\n', osis, flags=re.DOTALL)
-        osis = re.sub(r'\\is5\s+(.+)', lambda m: '\uFDE6<div type="x-subSubSubSubSection" subType="x-introduction">\uFDD4<title level="5">' + m.group(1) + '</title>', osis)
-        osis = re.sub('(\uFDE6<div type="subSubSubSubSection" subType="x-introduction">[^\uFDD0\uFDE8\uFDE2\uFDE3\uFDE4\uFDE5\uFDE6]+?)(?!\\\\c\\b)', r'\1'+'</div>\uFDE6\n', osis, flags=re.DOTALL)
-
-        # The USFM spec doesn't specifically prohibit regular paragraphs appearing in intros, and sometimes this is purposefully done by translators for various reasons.
-        paragraphregex = ''
-        if relaxedConformance:
-            paragraphregex += '|p|pc|pr|m|pmo|pm|pmc|pmr|pi|pi1|pi2|pi3|pi4|pi5|mi|nb|phi|ps|psi|p1|p2|p3|p4|p5'
-            
+        osis = rx['introductions.is1'].sub(lambda m: '\uFDE2<div type="section" subType="x-introduction">\uFDD4<title>' + m.group(1) + '</title>', osis)
+        if engine == 'regex':
+            osis = rx['introductions.is1Close'].sub(r'\1'+'</div>\uFDE2\n', osis)
+        osis = rx['introductions.is2'].sub(lambda m: '\uFDE3<div type="subSection" subType="x-introduction">\uFDD4<title level="2">' + m.group(1) + '</title>', osis)
+        if engine == 'regex':
+            osis = rx['introductions.is2Close'].sub(r'\1'+'</div>\uFDE3\n', osis)
+        osis = rx['introductions.is3'].sub(lambda m: '\uFDE4<div type="x-subSubSection" subType="x-introduction">\uFDD4<title level="3">' + m.group(1) + '</title>', osis)
+        if engine == 'regex':
+            osis = rx['introductions.is3Close'].sub(r'\1'+'</div>\uFDE4\n', osis)
+        osis = rx['introductions.is4'].sub(lambda m: '\uFDE5<div type="x-subSubSubSection" subType="x-introduction">\uFDD4<title level="4">' + m.group(1) + '</title>', osis)
+        if engine == 'regex':
+            osis = rx['introductions.is4Close'].sub(r'\1'+'</div>\uFDE5\n', osis)
+        osis = rx['introductions.is5'].sub(lambda m: '\uFDE6<div type="x-subSubSubSubSection" subType="x-introduction">\uFDD4<title level="5">' + m.group(1) + '</title>', osis)
+        if engine == 'regex':
+            osis = rx['introductions.is5Close'].sub(r'\1'+'</div>\uFDE6\n', osis)
+        if engine != 'regex':
+            # \is3-\is5 divisions are left open, as their closing patterns above never match the divisions they open
+            osis = closeDivisions(osis, rx['introductions.divisions'], '\uFDE2\uFDE3')
+
         # \ip_text...
-        osis = re.sub(r'\\ip\s+(.*?)(?=(\\(m\w*|i?m[iq]?|i?b|i?p[iqr]?|lit|cls|tr|io[\dt]?|i?q[t\d]?|i?li\d?|iex?|s[\w\d]*|c'+paragraphregex+r')\b|<(/?div|p|closer|title)\b))', lambda m: '\uFDD3<p subType="x-introduction">\n' + m.group(1) + '\uFDD3</p>\n', osis, flags=re.DOTALL)
+        osis = rx['introductions.ip'].sub(lambda m: '\uFDD3<p subType="x-introduction">\n' + m.group(1) + '\uFDD3</p>\n', osis)
 
         # \ipi_text...
         # \im_text...
@@ -550,42 +1473,42 @@ def convertToOsis(sFile):
         # \imq_text...
         # \ipr_text...
         pType = {'ipi':'x-indented', 'im':'x-noindent', 'imi':'x-noindent-indented', 'ipq':'x-quote', 'imq':'x-noindent-quote', 'ipr':'x-right'}
-        osis = re.sub(r'\\(ipi|im|imi|ipq|imq|ipr)\s+(.*?)(?=(\\(i?m[iq]?|i?b|i?p[iqr]?|lit|cls|tr|io[\dt]?|i?q[t\d]?|i?li\d?|iex?|s|c'+paragraphregex+r')\b|<(/?div|p|closer)\b))', lambda m: '\uFDD3<p type="' + pType[m.group(1)] + '" subType="x-introduction">\n' + m.group(2) + '\uFDD3</p>\n', osis, flags=re.DOTALL)
+        osis = rx['introductions.ipTypes'].sub(lambda m: '\uFDD3<p type="' + pType[m.group(1)] + '" subType="x-introduction">\n' + m.group(2) + '\uFDD3</p>\n', osis)
 
         # \ib
-        osis = re.sub(r'\\ib\b\s?', '\uFDE7<lb type="x-p"/>', osis)
+        osis = rx['introductions.ib'].sub('\uFDE7<lb type="x-p"/>', osis)
         osis = osis.replace('\n</l>', '</l>\n')
         
         # \iq#_text...
-        osis = re.sub(r'\\iq\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\(iq\d?|fig|q\d?|b)\b|<(lb|title|item|/?div)\b))', r'<l level="1" subType="x-introduction">\1</l>', osis, flags=re.DOTALL)
-        osis = re.sub(r'\\iq(\d)\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\(iq\d?|fig|q\d?|b)\b|<(lb|title|item|/?div)\b))', r'<l level="\1" subType="x-introduction">\2</l>', osis, flags=re.DOTALL)
+        osis = rx['introductions.iq'].sub(r'<l level="1" subType="x-introduction">\1</l>', osis)
+        osis = rx['introductions.iqN'].sub(r'<l level="\1" subType="x-introduction">\2</l>', osis)
 
         # \ili#_text...
-        osis = re.sub(r'\\ili\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\(ili\d?|c|p|iot|io\d?|iex?)\b|<(lb|title|item|/?div)\b))', '<item type="x-indent-1" subType="x-introduction">\uFDE0\\1\uFDE0</item>', osis, flags=re.DOTALL)
-        osis = re.sub(r'\\ili(\d)\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\(ili\d?|c|p|iot|io\d?|iex?)\b|<(lb|title|item|/?div)\b))', '<item type="x-indent-\\1" subType="x-introduction">\uFDE0\\2\uFDE0</item>', osis, flags=re.DOTALL)
+        osis = rx['introductions.ili'].sub('<item type="x-indent-1" subType="x-introduction">\uFDE0\\1\uFDE0</item>', osis)
+        osis = rx['introductions.iliN'].sub('<item type="x-indent-\\1" subType="x-introduction">\uFDE0\\2\uFDE0</item>', osis)
         osis = osis.replace('\n</item>', '</item>\n')
-        osis = re.sub('(<item [^\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4]+</item>)', '\uFDD3<list>'+r'\1'+'</list>\uFDD3', osis, flags=re.DOTALL)
+        osis = rx['introductions.itemList'].sub('\uFDD3<list>'+r'\1'+'</list>\uFDD3', osis)
 
         # \iot_text...
         # \io#_text...(references range)
-        osis = re.sub(r'\\io\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\(iot|io\d?|iex?|c|p)\b|<(lb|title|item|/?div)\b))', '<item type="x-indent-1" subType="x-introduction">\uFDE1\\1\uFDE1</item>', osis, flags=re.DOTALL)
-        osis = re.sub(r'\\io(\d)\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\(iot|io\d?|iex?|c|p)\b|<(lb|title|item|/?div)\b))', '<item type="x-indent-\\1" subType="x-introduction">\uFDE1\\2\uFDE1</item>', osis, flags=re.DOTALL)
-        osis = re.sub(r'\\iot\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\(iot|io\d?|iex?|c|p)\b|<(lb|title|item|/?div)\b))', '<item type="head">\uFDE1\\1\uFDE1</item type="head">', osis, flags=re.DOTALL)
+        osis = rx['introductions.io'].sub('<item type="x-indent-1" subType="x-introduction">\uFDE1\\1\uFDE1</item>', osis)
+        osis = rx['introductions.ioN'].sub('<item type="x-indent-\\1" subType="x-introduction">\uFDE1\\2\uFDE1</item>', osis)
+        osis = rx['introductions.iot'].sub('<item type="head">\uFDE1\\1\uFDE1</item type="head">', osis)
         osis = osis.replace('\n</item>', '</item>\n')
-        osis = re.sub('(<item [^\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE0]+</item>)', '\uFDD3<div type="outline" subType="x-introduction"><list>\\1</list></div>\uFDD3', osis, flags=re.DOTALL)
-        osis = re.sub('item type="head"', 'head', osis)
+        osis = rx['introductions.outlineList'].sub('\uFDD3<div type="outline" subType="x-introduction"><list>\\1</list></div>\uFDD3', osis)
+        osis = rx['introductions.outlineHead'].sub('head', osis)
 
         # \ior_text...\ior*
-        osis = re.sub(r'\\ior\b\s+(.+?)\\ior\*', r'<reference>\1</reference>', osis, flags=re.DOTALL)
+        osis = rx['introductions.ior'].sub(r'<reference>\1</reference>', osis)
 
         # \iex  # TODO: look for example; I have no idea what this would look like in context
-        osis = re.sub(r'\\iex\b\s*(.+?)(?=(\s*(\\c|</div type="book">'+'\uFDD0)))', r'<div type="bridge" subType="x-introduction">\1</div>', osis, flags=re.DOTALL)
+        osis = rx['introductions.iex'].sub(r'<div type="bridge" subType="x-introduction">\1</div>', osis)
 
         # \iqt_text...\iqt*
-        osis = re.sub(r'\\iqt\s+(.+?)\\iqt\*', r'<q subType="x-introduction">\1</q>', osis, flags=re.DOTALL)
+        osis = rx['introductions.iqt'].sub(r'<q subType="x-introduction">\1</q>', osis)
 
         # \ie
-        osis = re.sub(r'\\ie\b\s*', '<milestone type="x-usfm-ie"/>', osis)
+        osis = rx['introductions.ie'].sub('<milestone type="x-usfm-ie"/>', osis)
 
         return osis
 
@@ -600,66 +1523,90 @@ def convertToOsis(sFile):
         relaxedConformance -- Boolean value indicating whether to process non-standard & deprecated USFM tags.
 
         """
+        if not holds('ms', 'mr', 's', 'ss', 'sss', 'sr', 'r', 'rq', 'd', 'sp', 'mt', 'mte'):
+            return osis
 
         # \ms#_text...
-        osis = re.sub(r'\\ms1?\s+(.+)', lambda m: '\uFDD5<div type="majorSection">\uFDD4<title>' + m.group(1) + '</title>', osis)
-        osis = re.sub('(\uFDD5[^\uFDD5\uFDD0\uFDE8]+)', r'\1'+'</div>\uFDD5\n', osis, flags=re.DOTALL)
-        osis = re.sub(r'\\ms2\s+(.+)', lambda m: '\uFDD6<div type="majorSection" n="2">\uFDD4<title level="2">' + m.group(1) + '</title>', osis)
-        osis = re.sub('(\uFDD6[^\uFDD5\uFDD0\uFDE8\uFDD6]+)', r'\1'+'</div>\uFDD6\n', osis, flags=re.DOTALL)
-        osis = re.sub(r'\\ms3\s+(.+)', lambda m: '\uFDD7<div type="majorSection" n="3">\uFDD4<title level="3">' + m.group(1) + '</title>', osis)
-        osis = re.sub('(\uFDD7[^\uFDD5\uFDD0\uFDE8\uFDD6\uFDD7]+)', r'\1'+'</div>\uFDD7\n', osis, flags=re.DOTALL)
-        osis = re.sub(r'\\ms4\s+(.+)', lambda m: '\uFDD8<div type="majorSection" n="4">\uFDD4<title level="4">' + m.group(1) + '</title>', osis)
-        osis = re.sub('(\uFDD8[^\uFDD5\uFDD0\uFDE8\uFDD6\uFDD7\uFDD8]+)', r'\1'+'</div>\uFDD8\n', osis, flags=re.DOTALL)
-        osis = re.sub(r'\\ms5\s+(.+)', lambda m: '\uFDD9<div type="majorSection" n="5">\uFDD4<title level="5">' + m.group(1) + '</title>', osis)
-        osis = re.sub('(\uFDD9[^\uFDD5\uFDD0\uFDE8\uFDD6\uFDD7\uFDD8\uFDD9]+)', r'\1'+'</div>\uFDD9\n', osis, flags=re.DOTALL)
+        if holds('ms'):
+            osis = rx['titles.ms1'].sub(lambda m: '\uFDD5<div type="majorSection">\uFDD4<title>' + m.group(1) + '</title>', osis)
+            if engine == 'regex':
+                osis = rx['titles.ms1Close'].sub(r'\1'+'</div>\uFDD5\n', osis)
+            osis = rx['titles.ms2'].sub(lambda m: '\uFDD6<div type="majorSection" n="2">\uFDD4<title level="2">' + m.group(1) + '</title>', osis)
+            if engine == 'regex':
+                osis = rx['titles.ms2Close'].sub(r'\1'+'</div>\uFDD6\n', osis)
+            osis = rx['titles.ms3'].sub(lambda m: '\uFDD7<div type="majorSection" n="3">\uFDD4<title level="3">' + m.group(1) + '</title>', osis)
+            if engine == 'regex':
+                osis = rx['titles.ms3Close'].sub(r'\1'+'</div>\uFDD7\n', osis)
+            osis = rx['titles.ms4'].sub(lambda m: '\uFDD8<div type="majorSection" n="4">\uFDD4<title level="4">' + m.group(1) + '</title>', osis)
+            if engine == 'regex':
+                osis = rx['titles.ms4Close'].sub(r'\1'+'</div>\uFDD8\n', osis)
+            osis = rx['titles.ms5'].sub(lambda m: '\uFDD9<div type="majorSection" n="5">\uFDD4<title level="5">' + m.group(1) + '</title>', osis)
+            if engine == 'regex':
+                osis = rx['titles.ms5Close'].sub(r'\1'+'</div>\uFDD9\n', osis)
 
         # \mr_text...
-        osis = re.sub(r'\\mr\s+(.+)', '\uFDD4<title type="scope"><reference>'+r'\1</reference></title>', osis)
+        if holds('mr'):
+            osis = rx['titles.mr'].sub('\uFDD4<title type="scope"><reference>'+r'\1</reference></title>', osis)
 
         # \s#_text...
         # At some point, usfm2osis.py was changed to remove the \s2 through \s4 title "level"  
         # attributes. Perhaps this was done to follow the OSIS manual recommendation, however 
         # the current implementation still does not strictly follow that recommendation. 
         # Since the level attribute is useful and appropriate, it has been reinstated. !-->
-        osis = re.sub(r'\\s1?\s+(.+)', lambda m: '\uFDDA<div type="section">\uFDD4<title>' + m.group(1) + '</title>', osis)
-        osis = re.sub(r'(\uFDDA<div type="section">.*?)(?=\uFDD5|\uFDD0|\uFDE8|\uFDD6|\uFDD7|\uFDD8|\uFDD9|\uFDDA|\\mt(\d?))', r'\1'+'</div>\uFDDA\n', osis, flags=re.DOTALL)
+        osis = rx['titles.s1'].sub(lambda m: '\uFDDA<div type="section">\uFDD4<title>' + m.group(1) + '</title>', osis)
+        if engine == 'regex':
+            osis = rx['titles.s1Close'].sub(r'\1'+'</div>\uFDDA\n', osis)
         if relaxedConformance:
-            osis = re.sub(r'\\ss\s+', r'\\s2 ', osis)
-            osis = re.sub(r'\\sss\s+', r'\\s3 ', osis)
-        osis = re.sub(r'\\s2\s+(.+)', lambda m: '\uFDDB<div type="subSection">\uFDD4<title level="2">' + m.group(1) + '</title>', osis)
-        osis = re.sub(r'(\uFDDB<div type="subSection">.*?)(?=\uFDD5|\uFDD0|\uFDE8|\uFDD6|\uFDD7|\uFDD8|\uFDD9|\uFDDA|\uFDDB|\\mt(\d?))', r'\1'+'</div>\uFDDB\n', osis, flags=re.DOTALL)
-        osis = re.sub(r'\\s3\s+(.+)', lambda m: '\uFDDC<div type="x-subSubSection">\uFDD4<title level="3">' + m.group(1) + '</title>', osis)
-        osis = re.sub(r'(\uFDDC<div type="x-subSubSection">.*?)(?=\uFDD5|\uFDD0|\uFDE8|\uFDD6|\uFDD7|\uFDD8|\uFDD9|\uFDDA|\uFDDB|\uFDDC|\\mt(\d?))', r'\1'+'</div>\uFDDC\n', osis, flags=re.DOTALL)
-        osis = re.sub(r'\\s4\s+(.+)', lambda m: '\uFDDD<div type="x-subSubSubSection">\uFDD4<title level="4">' + m.group(1) + '</title>', osis)
-        osis = re.sub(r'(\uFDDD<div type="x-subSubSubSection">.*?)(?=\uFDD5|\uFDD0|\uFDE8|\uFDD6|\uFDD7|\uFDD8|\uFDD9|\uFDDA|\uFDDB|\uFDDC|\uFDDD|\\mt(\d?))', r'\1'+'</div>\uFDDD\n', osis, flags=re.DOTALL)
-        osis = re.sub(r'\\s5\s+(.+)', lambda m: '\uFDDE<div type="x-subSubSubSubSection">\uFDD4<title level="5">' + m.group(1) + '</title>', osis)
-        osis = re.sub(r'(\uFDDE<div type="x-subSubSubSubSection">.*?)(?=\uFDD5|\uFDD0|\uFDE8|\uFDD6|\uFDD7|\uFDD8|\uFDD9|\uFDDA|\uFDDB|\uFDDC|\uFDDD|\uFDDE|\\mt(\d?))', r'\1'+'</div>\uFDDE\n', osis, flags=re.DOTALL)
+            osis = rx['titles.ss'].sub(r'\\s2 ', osis)
+            osis = rx['titles.sss'].sub(r'\\s3 ', osis)
+        osis = rx['titles.s2'].sub(lambda m: '\uFDDB<div type="subSection">\uFDD4<title level="2">' + m.group(1) + '</title>', osis)
+        if engine == 'regex':
+            osis = rx['titles.s2Close'].sub(r'\1'+'</div>\uFDDB\n', osis)
+        osis = rx['titles.s3'].sub(lambda m: '\uFDDC<div type="x-subSubSection">\uFDD4<title level="3">' + m.group(1) + '</title>', osis)
+        if engine == 'regex':
+            osis = rx['titles.s3Close'].sub(r'\1'+'</div>\uFDDC\n', osis)
+        osis = rx['titles.s4'].sub(lambda m: '\uFDDD<div type="x-subSubSubSection">\uFDD4<title level="4">' + m.group(1) + '</title>', osis)
+        if engine == 'regex':
+            osis = rx['titles.s4Close'].sub(r'\1'+'</div>\uFDDD\n', osis)
+        osis = rx['titles.s5'].sub(lambda m: '\uFDDE<div type="x-subSubSubSubSection">\uFDD4<title level="5">' + m.group(1) + '</title>', osis)
+        if engine == 'regex':
+            osis = rx['titles.s5Close'].sub(r'\1'+'</div>\uFDDE\n', osis)
+        if engine != 'regex':
+            osis = closeDivisions(osis, rx['titles.divisions'], '\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE', 5)
 
         # \sr_text...
-        osis = re.sub(r'\\sr\s+(.+)', '\uFDD4<title type="scope"><reference>'+r'\1</reference></title>', osis)
+        if holds('sr'):
+            osis = rx['titles.sr'].sub('\uFDD4<title type="scope"><reference>'+r'\1</reference></title>', osis)
         # \r_text...
-        osis = re.sub(r'\\r\s+(.+)', '\uFDD4<title type="parallel"><reference type="parallel">'+r'\1</reference></title>', osis)
+        if holds('r'):
+            osis = rx['titles.r'].sub('\uFDD4<title type="parallel"><reference type="parallel">'+r'\1</reference></title>', osis)
         # \rq_text...\rq*
-        osis = re.sub(r'\\rq\s+(.+?)\\rq\*', r'<reference type="source">\1</reference>', osis, flags=re.DOTALL)
+        if holds('rq'):
+            osis = rx['titles.rq'].sub(r'<reference type="source">\1</reference>', osis)
 
         # \d_text...
-        osis = re.sub(r'\\d\s+(\\v\s+\S+\s+)?(.+)', lambda m: (m.group(1) if m.group(1) else '') + '\uFDD4<title canonical="true" type="psalm">' + m.group(2) + '</title>', osis)
+        if holds('d'):
+            osis = rx['titles.d'].sub(lambda m: (m.group(1) if m.group(1) else '') + '\uFDD4<title canonical="true" type="psalm">' + m.group(2) + '</title>', osis)
 
         # \sp_text...
         # USFM \sp tags represent printed non-canonical secondary titles, whereas the OSIS <speaker> tag is indended to hold a canonical name associated with <speech> elements.
         # A type attribute is required so that osis2mod recognizes \sp as a pre-verse title.
-        osis = re.sub(r'\\sp\s+(.+)', '\uFDD4<title level="2" subType="x-speaker" type="x-speaker">'+r'\1</title>', osis)
+        if holds('sp'):
+            osis = rx['titles.sp'].sub('\uFDD4<title level="2" subType="x-speaker" type="x-speaker">'+r'\1</title>', osis)
 
         # \mt#_text...
-        osis = re.sub(r'\\mt(\d?)\s+(.+)', lambda m: '\uFDD4<title ' + ('level="'+m.group(1)+'" ' if m.group(1) else '') + 'type="main">' + m.group(2) + '</title>', osis)
+        osis = rx['titles.mt'].sub(lambda m: '\uFDD4<title ' + ('level="'+m.group(1)+'" ' if m.group(1) else '') + 'type="main">' + m.group(2) + '</title>', osis)
         # \mte#_text...
-        osis = re.sub(r'\\mte(\d?)\s+(.+)', lambda m: '\uFDD4<title ' + ('level="'+m.group(1)+'" ' if m.group(1) else '') + 'type="main" subType="x-end">' + m.group(2) + '</title>', osis)
+        if holds('mte'):
+            osis = rx['titles.mte'].sub(lambda m: '\uFDD4<title ' + ('level="'+m.group(1)+'" ' if m.group(1) else '') + 'type="main" subType="x-end">' + m.group(2) + '</title>', osis)
 
         return osis
 
 
     def cvtChaptersAndVerses(osis, relaxedConformance):
         r"""Converts USFM **Chapter and Verse** tags to OSIS, returning the processed text as a string.
+        The token engine finds the chapters, then the verses, each in one sweep over the tag positions, and writes the real book & chapter IDs
+        into the milestones, so processOsisIDs does not need to be run afterwards.
 
         Supported tags: \c, \ca...\ca*, \cl, \cp, \cd, \v, \va...\va*, \vp...\vp*
 
@@ -668,76 +1615,217 @@ def convertToOsis(sFile):
         relaxedConformance -- Boolean value indicating whether to process non-standard & deprecated USFM tags.
 
         """
+        if not holds('c', 'ca', 'cp', 'cl', 'cd', 'v', 'va', 'vp'):
+            return osis
 
-        # \c_#
-        osis = re.sub(r'\\c\s+([^\s]+)\b(.+?)(?=(\\c\s+|</div type="book"))', lambda m: '\uFDD1<chapter osisID="$BOOK$.' + m.group(1) + r'" sID="$BOOK$.' + m.group(1) + '"/>' + m.group(2) + '<chapter eID="$BOOK$.' + m.group(1) + '"/>\uFDD3\n', osis, flags=re.DOTALL)
+        def osisIDContext(osis, bookMarks, chapterMarks):
+            r"""Return functions giving the book ID and chapter number that processOsisIDs would fill in at a position of the document.
 
+            Keyword arguments:
+            osis -- The document as a string.
+            bookMarks -- Ascending positions of the \uFDD0 book boundaries in the document.
+            chapterMarks -- Ascending positions of both the \uFDD0 and the \uFDD1 boundaries in the document.
+
+            """
+            books = dict()
+            chapters = dict()
+
+            def bookAt(position):
+                i = bisect.bisect_left(bookMarks, position)
+                if i not in books:
+                    book = rx['osisIDs.book'].search(osis, bookMarks[i-1]+1 if i else 0, bookMarks[i] if i < len(bookMarks) else len(osis))
+                    books[i] = book.group(1) if book else None
+                return books[i]
+
+            def chapterAt(position):
+                i = bisect.bisect_left(chapterMarks, position)
+                if i not in chapters:
+                    chapter = rx['osisIDs.chapter'].search(osis, chapterMarks[i-1]+1 if i else 0, chapterMarks[i] if i < len(chapterMarks) else len(osis))
+                    chapters[i] = chapter.group(1) if chapter else None
+                return chapters[i]
+
+            return bookAt, chapterAt
+
+        def milestoneSpans(osis, starts, ends, header, span):
+            r"""Yield the start, number, contents, and end of each span that the lazy span pattern would match, in a single pass over the tag positions.
+            A span runs from its tag to the first possible end after its number; only a span with no such end is left to the pattern, so that it can backtrack.
+
+            Keyword arguments:
+            osis -- The document as a string.
+            starts -- Ascending positions of the start tags.
+            ends -- Ascending positions at which a span can end.
+            header -- The compiled pattern matching a start tag & its number.
+            span -- The compiled pattern matching a whole span, with its number & contents as groups 1 & 2.
+
+            """
+            last = 0
+            for pos in starts:
+                if pos < last:
+                    continue
+                m = header.match(osis, pos)
+                if not m:
+                    continue
+                i = bisect.bisect_right(ends, m.end())
+                if i < len(ends):
+                    last = ends[i]
+                    yield pos, m.group(1), osis[m.end():last], last
+                else:
+                    m = span.match(osis, pos)
+                    if m:
+                        last = m.end()
+                        yield pos, m.group(1), m.group(2), last
+
+        # \c_#
         # \cp_#
         # \ca_#\ca*
-        def replaceChapterNumber(matchObject):
-            r"""Regex helper function to replace chapter numbers from \c_# with values that appeared in \cp_# and \ca_#\ca*, returing the chapter text as a string.
+        def replaceChapterNumber(ctext):
+            r"""Replace chapter numbers from \c_# with values that appeared in \cp_# and \ca_#\ca*, returing the chapter text as a string.
 
             Keyword arguments:
-            matchObject -- a regex match object in which the first element is the chapter text
+            ctext -- the chapter text, from its start milestone through its end milestone
 
             """
-            ctext = matchObject.group(1)
-            cp = re.search(r'\\cp\s+(.+?)(?=(\\|\s))', ctext)
+            cp = rx['chapters.cp'].search(ctext)
             if cp:
-                ctext = re.sub(r'\\cp\s+(.+?)(?=(\\|\s))', '', ctext, flags=re.DOTALL)
+                ctext = rx['chapters.cpStrip'].sub('', ctext)
                 cp = cp.group(1)
-                ctext = re.sub(r'"\$BOOK\$\.([^"\.]+)"', '"$BOOK$.'+cp+'"', ctext)
-            ca = re.search(r'\\ca\s+(.+?)\\ca\*', ctext)
+                ctext = rx['chapters.chapterRef'].sub('"$BOOK$.'+cp+'"', ctext)
+            ca = rx['chapters.ca'].search(ctext)
             if ca:
-                ctext = re.sub(r'\\ca\s+(.+?)\\ca\*', '', ctext, flags=re.DOTALL)
+                ctext = rx['chapters.caStrip'].sub('', ctext)
                 ca = ca.group(1)
-                ctext = re.sub(r'(osisID="\$BOOK\$\.[^"\.]+)"', r'\1 $BOOK$.'+ca+'"', ctext)
+                ctext = rx['chapters.chapterOsisID'].sub(r'\1 $BOOK$.'+ca+'"', ctext)
             return ctext
-        osis = re.sub(r'(<chapter [^<]+sID[^<]+/>.+?<chapter eID[^>]+/>)', replaceChapterNumber, osis, flags=re.DOTALL)
 
-        # \cl_ 
+        if engine == 'regex':
+            osis = rx['chapters.c'].sub(lambda m: '\uFDD1<chapter osisID="$BOOK$.' + m.group(1) + r'" sID="$BOOK$.' + m.group(1) + '"/>' + m.group(2) + '<chapter eID="$BOOK$.' + m.group(1) + '"/>\uFDD3\n', osis)
+            osis = rx['chapters.chapterSpan'].sub(lambda m: replaceChapterNumber(m.group(1)), osis)
+        else:
+            bookMarks = [m.start() for m in rx['chapters.bookMark'].finditer(osis)]
+            starts = [m.start() for m in rx['chapters.cStart'].finditer(osis)]
+            ends = [m.start() for m in rx['chapters.cEnd'].finditer(osis)]
+            bookAt = osisIDContext(osis, bookMarks, bookMarks)[0]
+            chapters = list(milestoneSpans(osis, starts, ends, rx['chapters.cHeader'], rx['chapters.c']))
+            # A \c without a number takes the next tag as its number, which later stages convert within the milestone,
+            # so the IDs are then left for processOsisIDs to fill in from the final text.
+            fillIDs = not any('\\' in number or '<' in number for pos, number, body, end in chapters)
+            parts = list()
+            last = 0
+            for pos, number, body, end in chapters:
+                ctext = '<chapter osisID="$BOOK$.' + number + '" sID="$BOOK$.' + number + '"/>' + body + '<chapter eID="$BOOK$.' + number + '"/>'
+                # a start milestone holding a < is not matched by chapters.chapterSpan
+                if ('\\cp' in body or '\\ca' in body) and '<' not in number:
+                    ctext = replaceChapterNumber(ctext)
+                # only a chapter begun before the first book crosses a \uFDD0 boundary, and one stripped away leaves its IDs to processOsisIDs
+                if fillIDs and ctext.count('\uFDD0') == body.count('\uFDD0'):
+                    first = bisect.bisect_left(bookMarks, pos)
+                    ctext = ctext.split('\uFDD0')
+                    for i in range(len(ctext)):
+                        book = bookAt(bookMarks[first+i-1]+1 if i else pos)
+                        if book:
+                            ctext[i] = ctext[i].replace('$BOOK$', book)
+                    ctext = '\uFDD0'.join(ctext)
+                parts.append(osis[last:pos])
+                parts.append('\uFDD1' + ctext + '\uFDD3\n')
+                last = end
+            parts.append(osis[last:])
+            osis = ''.join(parts)
+
+        # \cl_
         # If \cl is found only before the first \c it is a generic term to be utilized at the top of every chapter.
         # Otherwise \cl is a single chapter label.
-        genericLabelRE = r'\\cl\s+([^\n]*?)((.{0,2}</[^>]+>.{0,2})*<chapter osisID="[^\.]+\.1")';
-        genericLabel = re.search(genericLabelRE, osis, flags=re.DOTALL)
+        genericLabel = rx['chapters.genericLabel'].search(osis)
         if genericLabel is not None and osis.count('\\cl ') == 1:
-            osis = re.sub(genericLabelRE, r'\2', osis, flags=re.DOTALL)
-            osis = re.sub(r'(<chapter osisID="[^\.]+\.(\d+)"[^>]*>)', lambda m: m.group(1)+'\uFDD4<title type="x-chapterLabel">'+(re.sub(r'\d+', m.group(2), genericLabel.group(1), 1) if re.search(r'\d+', genericLabel.group(1)) else genericLabel.group(1)+' '+m.group(2))+'</title>', osis)
-        osis = re.sub(r'\\cl\s+(.+)', '\uFDD4<title type="x-chapterLabel">'+r'\1</title>', osis)
+            osis = rx['chapters.genericLabel'].sub(r'\2', osis)
+            osis = rx['chapters.chapterStart'].sub(lambda m: m.group(1)+'\uFDD4<title type="x-chapterLabel">'+(rx['chapters.number'].sub(m.group(2), genericLabel.group(1), 1) if rx['chapters.number'].search(genericLabel.group(1)) else genericLabel.group(1)+' '+m.group(2))+'</title>', osis)
+        osis = rx['chapters.cl'].sub('\uFDD4<title type="x-chapterLabel">'+r'\1</title>', osis)
 
         # \cd_#   <--This # seems to be an error
-        osis = re.sub(r'\\cd\b\s+(.+)', '\uFDD4<title type="x-description">'+r'\1</title>', osis)
+        osis = rx['chapters.cd'].sub('\uFDD4<title type="x-description">'+r'\1</title>', osis)
 
         # \v_#
-        osis = re.sub(r'\\v\s+([\d\-]+)[\s\u00A0]*(.+?)(?=(\\v\s+|</div type="book"|<chapter eID))', lambda m: '\uFDD2<verse osisID="$BOOK$.$CHAP$.' + m.group(1) + '" sID="$BOOK$.$CHAP$.' + m.group(1) + '"/>' + m.group(2) + '<verse eID="$BOOK$.$CHAP$.' + m.group(1) + '"/>\uFDD2\n', osis, flags=re.DOTALL)
-
-        # \va_#\va*
-        if not relaxedConformance:
-            osis = re.sub(r'\\va\s(\d+)\\va\*', r'<hi type="italic" subType="x-alternate"><hi type="super">(\1)</hi></hi>', osis)
-        else:
-            osis = re.sub(r'\\va\s(.*?)\\va\*', r'<hi type="italic" subType="x-alternate"><hi type="super">(\1)</hi></hi>', osis)
-            
         # \vp_#\vp*
-        def replaceVerseNumber(matchObject):
-            r"""Regex helper function to replace verse numbers from \v_# with values that appeared in \vp_#\vp* and \va_#\va*, returing the verse text as a string.
+        def replaceVerseNumber(vtext):
+            r"""Replace verse numbers from \v_# with values that appeared in \vp_#\vp* and \va_#\va*, returing the verse text as a string.
 
             Keyword arguments:
-            matchObject -- a regex match object in which the first element is the verse text
+            vtext -- the verse text, from its start milestone through its end milestone
 
             """
-            vtext = matchObject.group(1)
-            vp = re.search(r'\\vp\s+(.+?)\\vp\*', vtext)
+            vp = rx['chapters.vp'].search(vtext)
             if vp:
-                vtext = re.sub(r'\\vp\s+(.+?)\\vp\*', '', vtext, flags=re.DOTALL)
+                vtext = rx['chapters.vpStrip'].sub('', vtext)
                 vp = vp.group(1)
-                vtext = re.sub(r'"\$BOOK\$\.\$CHAP\$\.([^"\.]+)"', '"$BOOK$.$CHAP$.'+vp+'"', vtext)
-            va = re.search(r'\\va\s+(.+?)\\va\*', vtext)
+                vtext = rx['chapters.verseRef'].sub('"$BOOK$.$CHAP$.'+vp+'"', vtext)
+            va = rx['chapters.va'].search(vtext)
             if va:
-                vtext = re.sub(r'\\va\s+(.+?)\\va\*', '', vtext, flags=re.DOTALL)
+                vtext = rx['chapters.vaStrip'].sub('', vtext)
                 va = va.group(1)
-                vtext = re.sub(r'(osisID="\$BOOK\$\.\$CHAP\$\.[^"\.]+)"', r'\1 $BOOK$.$CHAP$.'+va+'"', vtext)
+                vtext = rx['chapters.verseOsisID'].sub(r'\1 $BOOK$.$CHAP$.'+va+'"', vtext)
             return vtext
-        osis = re.sub(r'(<verse [^<]+sID[^<]+/>.+?<verse eID[^>]+/>)', replaceVerseNumber, osis, flags=re.DOTALL)
+
+        # a \uFDD2 already in the text would pair with those of the milestones, so the verses are then split by the verseSpan pattern,
+        # and their IDs left to processOsisIDs
+        strays = engine != 'regex' and '\uFDD2' in osis
+        if strays:
+            fillIDs = False
+        if engine == 'regex':
+            osis = rx['chapters.v'].sub(lambda m: '\uFDD2<verse osisID="$BOOK$.$CHAP$.' + m.group(1) + '" sID="$BOOK$.$CHAP$.' + m.group(1) + '"/>' + m.group(2) + '<verse eID="$BOOK$.$CHAP$.' + m.group(1) + '"/>\uFDD2\n', osis)
+        else:
+            bookMarks = [m.start() for m in rx['chapters.bookMark'].finditer(osis)]
+            chapterMarks = [m.start() for m in rx['chapters.chapterMark'].finditer(osis)]
+            starts = [m.start() for m in rx['chapters.vStart'].finditer(osis)]
+            ends = [m.start() for m in rx['chapters.vEnd'].finditer(osis)]
+            bookAt, chapterAt = osisIDContext(osis, bookMarks, chapterMarks)
+            parts = list()
+            osisIDs = list()
+            last = 0
+            for pos, number, body, end in milestoneSpans(osis, starts, ends, rx['chapters.vHeader'], rx['chapters.v']):
+                parts.append(osis[last:pos])
+                parts.append('\uFDD2<verse osisID="$BOOK$.$CHAP$.' + number + '" sID="$BOOK$.$CHAP$.' + number + '"/>' + body + '<verse eID="$BOOK$.$CHAP$.' + number + '"/>\uFDD2\n')
+                osisIDs.append((bookAt(pos), chapterAt(pos), bookAt(end), chapterAt(end)))
+                last = end
+            parts.append(osis[last:])
+            osis = ''.join(parts)
+
+        # \va_#\va*
+        osis = rx['chapters.vaInline'].sub(r'<hi type="italic" subType="x-alternate"><hi type="super">(\1)</hi></hi>', osis)
+
+        if engine == 'regex' or strays:
+            osis = rx['chapters.verseSpan'].sub(lambda m: replaceVerseNumber(m.group(1)), osis)
+        else:
+            # each verse lies between a pair of \uFDD2, from its start milestone through its end milestone
+            parts = osis.split('\uFDD2')
+            for i in range(1, len(parts), 2):
+                if '\\vp' in parts[i] or '\\va' in parts[i]:
+                    vtext = replaceVerseNumber(parts[i])
+                    # a \vp or \va stripped across a book or chapter start changes the IDs processOsisIDs would find, so leave them to it
+                    if vtext.count('\uFDD0') + vtext.count('\uFDD1') < parts[i].count('\uFDD0') + parts[i].count('\uFDD1'):
+                        fillIDs = False
+                    parts[i] = vtext
+
+            def fillOsisIDs(milestone, book, chapter):
+                r"""Expand the ranges & series in a verse milestone and fill in its book & chapter IDs, returning the milestone as a string."""
+                if '-' in milestone or ',' in milestone:
+                    milestone = expandVerseRanges(milestone)
+                if book:
+                    milestone = milestone.replace('$BOOK$', book)
+                    if chapter:
+                        milestone = milestone.replace('$CHAP$', chapter)
+                return milestone
+
+            if fillIDs:
+                for i in range(1, len(parts), 2):
+                    vtext = parts[i]
+                    start = vtext.find('/>')
+                    end = vtext.rfind('<verse eID')
+                    # a span that is not a whole verse keeps its IDs for processOsisIDs
+                    if start == -1 or end == -1:
+                        continue
+                    start += 2
+                    startBook, startChapter, endBook, endChapter = osisIDs[i//2]
+                    parts[i] = fillOsisIDs(vtext[:start], startBook, startChapter) + vtext[start:end] + fillOsisIDs(vtext[end:], endBook, endChapter)
+            osis = '\uFDD2'.join(parts)
 
         return osis
 
@@ -752,12 +1840,10 @@ def convertToOsis(sFile):
         relaxedConformance -- Boolean value indicating whether to process non-standard & deprecated USFM tags.
 
         """
-        paragraphregex = 'pc|pr|m|pmo|pm|pmc|pmr|pi|pi1|pi2|pi3|pi4|pi5|mi|nb'
-        if relaxedConformance:
-            paragraphregex += '|phi|ps|psi|p1|p2|p3|p4|p5'
-
+        if not holds('p', 'pc', 'pr', 'm', 'pmo', 'pm', 'pmc', 'pmr', 'pi', 'mi', 'nb', 'phi', 'ps', 'psi', 'ph', 'li', 'b', 'ili', 'io', 'iot'):
+            return osis
         # \p(_text...)
-        osis = re.sub(r'\\p\s+(.*?)(?=(\\(i?m|i?p|lit|cls|tr|p|q|q1|q2|q3|q4|qm|qm1|qm2|qm3|qm4|qr|qc|li\d?|ph\d?|'+paragraphregex+r')\b|<chapter eID|\uFDD4|<(/?div|p|closer)\b))', lambda m: '\uFDD3<p>\n' + m.group(1) + '\uFDD3</p>\n', osis, flags=re.DOTALL)
+        osis = rx['paragraphs.p'].sub(lambda m: '\uFDD3<p>\n' + m.group(1) + '\uFDD3</p>\n', osis)
 
         # \pc(_text...)
         # \pr(_text...)
@@ -774,22 +1860,25 @@ def convertToOsis(sFile):
         # \psi # deprecated
         # \p# # deprecated
         pType = {'pc':'x-center', 'pr':'x-right', 'm':'x-noindent', 'pmo':'x-embedded-opening', 'pm':'x-embedded', 'pmc':'x-embedded-closing', 'pmr':'x-right', 'pi':'x-indented-1', 'pi1':'x-indented-1', 'pi2':'x-indented-2', 'pi3':'x-indented-3', 'pi4':'x-indented-4', 'pi5':'x-indented-5', 'mi':'x-noindent-indented', 'nb':'x-nobreak', 'phi':'x-indented-hanging', 'ps':'x-nobreakNext', 'psi':'x-nobreakNext-indented', 'p1':'x-level-1', 'p2':'x-level-2', 'p3':'x-level-3', 'p4':'x-level-4', 'p5':'x-level-5'}
-        osis = re.sub(r'\\('+paragraphregex+r')\s+(.*?)(?=(\\(i?m|i?p|lit|cls|tr|q|q1|q2|q3|q4|qm|qm1|qm2|qm3|qm4|qr|qc|li\d?|ph\d?|'+paragraphregex+r')\b|<chapter eID|\uFDD4|<(/?div|p|closer)\b))', lambda m: '\uFDD3<p type="' + pType[m.group(1)] + '">\n' + m.group(2) + '\uFDD3</p>\n', osis, flags=re.DOTALL)
+        osis = rx['paragraphs.pTypes'].sub(lambda m: '\uFDD3<p type="' + pType[m.group(1)] + '">\n' + m.group(2) + '\uFDD3</p>\n', osis)
 
         # \cls_text...
-        osis = re.sub(r'\\m\s+(.+?)(?=(\\(i?m|i?p|lit|cls|tr)\b|<chapter eID|<(/?div|p|closer)\b))', lambda m: '\uFDD3<closer>' + m.group(1) + '\uFDD3</closer>\n', osis, flags=re.DOTALL)
+        if holds('m'):
+            osis = rx['paragraphs.cls'].sub(lambda m: '\uFDD3<closer>' + m.group(1) + '\uFDD3</closer>\n', osis)
 
         # \ph#(_text...)
         # \li#(_text...)
-        osis = re.sub(r'\\ph\b\s*', r'\\li ', osis)
-        osis = re.sub(r'\\ph(\d)\b\s*', r'\\li\1 ', osis)
-        osis = re.sub(r'\\li\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE0\uFDE1\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE\uFDE7'+r']|\\li\d?\b|<(lb|title|item|/?div|/?chapter)\b))', r'<item type="x-indent-1">\1</item>', osis, flags=re.DOTALL)
-        osis = re.sub(r'\\li(\d)\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE0\uFDE1\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE\uFDE7'+r']|\\li\d?\b|<(lb|title|item|/?div|/?chapter)\b))', r'<item type="x-indent-\1">\2</item>', osis, flags=re.DOTALL)
+        if holds('li', 'ph'):
+            osis = rx['paragraphs.ph'].sub(r'\\li ', osis)
+            osis = rx['paragraphs.phN'].sub(r'\\li\1 ', osis)
+            osis = rx['paragraphs.li'].sub(r'<item type="x-indent-1">\1</item>', osis)
+            osis = rx['paragraphs.liN'].sub(r'<item type="x-indent-\1">\2</item>', osis)
         osis = osis.replace('\n</item>', '</item>\n')
-        osis = re.sub('(<item [^\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE0\uFDE1\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE]+</item>)', '\uFDD3<list>'+r'\1'+'</list>\uFDD3', osis, flags=re.DOTALL)
+        osis = rx['paragraphs.itemList'].sub('\uFDD3<list>'+r'\1'+'</list>\uFDD3', osis)
 
         # \b
-        osis = re.sub(r'\\b\b\s?', '\uFDE7<lb type="x-p"/>', osis)
+        if holds('b'):
+            osis = rx['paragraphs.b'].sub('\uFDE7<lb type="x-p"/>', osis)
 
         return osis
 
@@ -804,34 +1893,42 @@ def convertToOsis(sFile):
         relaxedConformance -- Boolean value indicating whether to process non-standard & deprecated USFM tags.
 
         """
+        if not holds('qa', 'qac', 'qs', 'fig', 'q', 'qr', 'qc', 'qm', 'iq'):
+            return osis
 
         # \qa_text...
-        osis = re.sub(r'\\qa\s+(.+)', '\uFDD4<title type="acrostic">'+r'\1</title>', osis)
+        if holds('qa'):
+            osis = rx['poetry.qa'].sub('\uFDD4<title type="acrostic">'+r'\1</title>', osis)
 
         # \qac_text...\qac*
-        osis = re.sub(r'\\qac\s+(.+?)\\qac\*', r'<hi type="acrostic">\1</hi>', osis, flags=re.DOTALL)
+        if holds('qac'):
+            osis = rx['poetry.qac'].sub(r'<hi type="acrostic">\1</hi>', osis)
 
         # \qs_(Selah)\qs*
-        osis = re.sub(r'\\qs\b\s(.+?)\\qs\*', r'<l type="selah">\1</l>', osis, flags=re.DOTALL)
+        if holds('qs'):
+            osis = rx['poetry.qs'].sub(r'<l type="selah">\1</l>', osis)
         
         # Add \uFDE9 so both <l> and <lg> can end at \fig (OSIS does not allow figure elements within l or lg elements)
-        osis = re.sub(r'(\\fig)(?!\*)', '\uFDE9'+r'\1', osis, flags=re.DOTALL)
+        if holds('fig'):
+            osis = rx['poetry.fig'].sub('\uFDE9'+r'\1', osis)
 
         # \q#(_text...)
-        osis = re.sub(r'\\q\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE\uFDE7\uFDE9'+r']|\\(q[\drcm]?|qm\d)\b|<(l|lb|title|list|/?div)\b))', r'<l level="1">\1</l>', osis, flags=re.DOTALL)
-        osis = re.sub(r'\\q(\d)\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE\uFDE7\uFDE9'+r']|\\(q[\drcm]?|qm\d)\b|<(l|lb|title|list|/?div)\b))', r'<l level="\1">\2</l>', osis, flags=re.DOTALL)
+        if holds('q'):
+            osis = rx['poetry.q'].sub(r'<l level="1">\1</l>', osis)
+            osis = rx['poetry.qN'].sub(r'<l level="\1">\2</l>', osis)
 
         # \qr_text...
         # \qc_text...
         # \qm#(_text...)
         qType = {'qr':'x-right', 'qc':'x-center', 'qm':'x-embedded" level="1', 'qm1':'x-embedded" level="1', 'qm2':'x-embedded" level="2', 'qm3':'x-embedded" level="3', 'qm4':'x-embedded" level="4', 'qm5':'x-embedded" level="5'}
-        osis = re.sub(r'\\(qr|qc|qm\d?)\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE\uFDE7\uFDE9'+r']|\\(q[\drcm]?|qm\d)\b|<(l|lb|title|list|/?div)\b))', lambda m: '<l type="' + qType[m.group(1)] + '">' + m.group(2) + '</l>', osis, flags=re.DOTALL)
+        if holds('qr', 'qc', 'qm'):
+            osis = rx['poetry.qTypes'].sub(lambda m: '<l type="' + qType[m.group(1)] + '">' + m.group(2) + '</l>', osis)
 
         osis = osis.replace('\n</l>', '</l>\n')
-        osis = re.sub('(<l [^\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE\uFDE7\uFDE9]+</l>)', r'<lg>\1</lg>', osis, flags=re.DOTALL)
+        osis = rx['poetry.lineGroup'].sub(r'<lg>\1</lg>', osis)
 
         # x-to-next-level allows line folding like Paratext
-        osis = re.sub(r'(<l level="(\d)")(>.*?</l>(\s*<l level="(\d)">)?)', lambda m: m.group(1)+' subType="x-to-next-level"'+m.group(3) if m.group(4) and int(m.group(2))+1 == int(m.group(5)) else m.group(1)+m.group(3), osis, flags=re.DOTALL)
+        osis = rx['poetry.nextLevel'].sub(lambda m: m.group(1)+' subType="x-to-next-level"'+m.group(3) if m.group(4) and int(m.group(2))+1 == int(m.group(5)) else m.group(1)+m.group(3), osis)
         
         return osis
 
@@ -846,18 +1943,20 @@ def convertToOsis(sFile):
         relaxedConformance -- Boolean value indicating whether to process non-standard & deprecated USFM tags.
 
         """
+        if not holds('tr', 'th', 'thr', 'tc', 'tcr'):
+            return osis
 
         # \tr_
-        osis = re.sub(r'\\tr\b\s*(.*?)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\tr\s|<(lb|/?div|title)\b))', r'<row>\1</row>', osis, flags=re.DOTALL)
+        osis = rx['tables.tr'].sub(r'<row>\1</row>', osis)
 
         # \th#_text...
         # \thr#_text...
         # \tc#_text...
         # \tcr#_text...
         tType = {'th':' role="label"', 'thr':' role="label" type="x-right"', 'tc':'', 'tcr':' type="x-right"'}
-        osis = re.sub(r'\\(thr?|tcr?)\d*\b\s*(.*?)(?=(\\t[hc]|</row))', lambda m: '<cell' + tType[m.group(1)] + '>' + m.group(2) + '</cell>', osis, flags=re.DOTALL)
+        osis = rx['tables.cell'].sub(lambda m: '<cell' + tType[m.group(1)] + '>' + m.group(2) + '</cell>', osis)
 
-        osis = re.sub(r'(<row>.*?</row>)(?=(['+'\uFDD0\uFDE8\uFDD1\uFDD3\uFDD4\uFDE7'+r']|\\tr\s|<(lb|/?div|title)\b))', r'<table>\1</table>', osis, flags=re.DOTALL)
+        osis = rx['tables.table'].sub(r'<table>\1</table>', osis)
 
         return osis
 
@@ -873,46 +1972,162 @@ def convertToOsis(sFile):
         note = note.replace('\n', ' ')
 
         # \fdc_refs...\fdc*
-        note = re.sub(r'\\fdc\b\s(.+?)\\fdc\*', r'<seg editions="dc">\1</seg>', note)
+        note = rx['notes.fdc'].sub(r'<seg editions="dc">\1</seg>', note)
 
         # \fq_
-        note = re.sub(r'\\fq\b\s(.+?)(?=(\\f|'+'\uFDDF))', '\uFDDF'+r'<catchWord>\1</catchWord>', note)
-        note = re.sub(r'\\\+fq\b\s(.+?)(?=(\\f|\\\+fq\*|'+'\uFDDF))', r'<catchWord>\1</catchWord>', note)
+        note = rx['notes.fq'].sub('\uFDDF'+r'<catchWord>\1</catchWord>', note)
+        note = rx['notes.fqNested'].sub(r'<catchWord>\1</catchWord>', note)
 
         # \fqa_
-        note = re.sub(r'\\fqa\b\s(.+?)(?=(\\f|'+'\uFDDF))', '\uFDDF'+r'<rdg type="alternate">\1</rdg>', note)
-        note = re.sub(r'\\\+fqa\b\s(.+?)(?=(\\f|\\\+fqa\*|'+'\uFDDF))', r'<rdg type="alternate">\1</rdg>', note)
+        note = rx['notes.fqa'].sub('\uFDDF'+r'<rdg type="alternate">\1</rdg>', note)
+        note = rx['notes.fqaNested'].sub(r'<rdg type="alternate">\1</rdg>', note)
 
         # \fr_
-        note = re.sub(r'\\fr\b\s(.+?)(?=(\\f|'+'\uFDDF))', '\uFDDF'+r'<reference type="annotateRef">\1</reference>', note)
-        note = re.sub(r'\\\+fr\b\s(.+?)(?=(\\f|\\\+fr\*|'+'\uFDDF))', r'<reference type="annotateRef">\1</reference>', note)
+        note = rx['notes.fr'].sub('\uFDDF'+r'<reference type="annotateRef">\1</reference>', note)
+        note = rx['notes.frNested'].sub(r'<reference type="annotateRef">\1</reference>', note)
 
         # \fk_
-        note = re.sub(r'\\fk\b\s(.+?)(?=(\\f|'+'\uFDDF))', '\uFDDF'+r'<catchWord>\1</catchWord>', note)
-        note = re.sub(r'\\\+fk\b\s(.+?)(?=(\\f|\\\+fk\*|'+'\uFDDF))', r'<catchWord>\1</catchWord>', note)
+        note = rx['notes.fk'].sub('\uFDDF'+r'<catchWord>\1</catchWord>', note)
+        note = rx['notes.fkNested'].sub(r'<catchWord>\1</catchWord>', note)
 
         # \fl_
-        note = re.sub(r'\\fl\b\s(.+?)(?=(\\f|'+'\uFDDF))', '\uFDDF'+r'<label>\1</label>', note)
-        note = re.sub(r'\\\+fl\b\s(.+?)(?=(\\f|\\\+fl\*|'+'\uFDDF))', r'<label>\1</label>', note)
+        note = rx['notes.fl'].sub('\uFDDF'+r'<label>\1</label>', note)
+        note = rx['notes.flNested'].sub(r'<label>\1</label>', note)
 
         # \fv_
-        note = re.sub(r'\\fv\b\s(.+?)(?=(\\f|'+'\uFDDF))', '\uFDDF'+r'<hi type="super">\1</hi>', note)
-        note = re.sub(r'\\\+fv\b\s(.+?)(?=(\\f|\\\+fv\*|'+'\uFDDF))', r'<hi type="super">\1</hi>', note)
+        note = rx['notes.fv'].sub('\uFDDF'+r'<hi type="super">\1</hi>', note)
+        note = rx['notes.fvNested'].sub(r'<hi type="super">\1</hi>', note)
 
         # \fp_
-        note = re.sub(r'\\fp\b\s(.+?)(?=(\\fp|\uFDDF</note>|$))', r'<p>\1</p>', note)
-        note = re.sub(r'(<note\b[^>]*?>)(.*?)<p>', r'\1<p>\2</p><p>', note)
+        note = rx['notes.fp'].sub(r'<p>\1</p>', note)
+        note = rx['notes.fpFirst'].sub(r'\1<p>\2</p><p>', note)
         
         # \ft_ handle this lastly, so it may properly end any previous footnote tag
-        note = re.sub(r'\\ft\s', '', note)
+        note = rx['notes.ft'].sub('', note)
 
         # \fq*,\fqa*,\ft*,\fr*,\fk*,\fl*,\fp*,\fv*
-        note = re.sub(r'\\\+?f(q|qa|t|r|k|l|p|v)\*', '', note)
+        note = rx['notes.closers'].sub('', note)
 
         note = note.replace('\uFDDF', '')
         return note
 
 
+    # note-internal tags: OSIS start tag, OSIS end tag, and the place of the tag's pattern in the processNote or processXref cascade
+    noteTags = {'fq':('<catchWord>', '</catchWord>', 0), '+fq':('<catchWord>', '</catchWord>', 1),
+                'fqa':('<rdg type="alternate">', '</rdg>', 2), '+fqa':('<rdg type="alternate">', '</rdg>', 3),
+                'fr':('<reference type="annotateRef">', '</reference>', 4), '+fr':('<reference type="annotateRef">', '</reference>', 5),
+                'fk':('<catchWord>', '</catchWord>', 6), '+fk':('<catchWord>', '</catchWord>', 7),
+                'fl':('<label>', '</label>', 8), '+fl':('<label>', '</label>', 9),
+                'fv':('<hi type="super">', '</hi>', 10), '+fv':('<hi type="super">', '</hi>', 11),
+                'fp':('<p>', '</p>', 12)}
+    xrefTags = {'xot':('<seg editions="ot">', '</seg>', 0), 'xnt':('<seg editions="nt">', '</seg>', 1), 'xdc':('<seg editions="dc">', '</seg>', 2),
+                'xq':('<catchWord>', '</catchWord>', 3), 'xo':('<reference type="annotateRef">', '</reference>', 4),
+                'xk':('<catchWord>', '</catchWord>', 5), 'xt':('<reference>', '</reference>', 6)}
+
+    def scanNoteTags(note, tagPattern, tags):
+        r"""Convert the note-internal tags of a note to OSIS in a single scan, returning the note as a string, or None if the note must be left to the regex cascade.
+        The text of a tag runs to the first later tag of its family (\f... or \x...), its own nested end tag, or the end of the note, just as the
+        lazy patterns of processNote & processXref do; end tags falling at the same point are written in the order that cascade would write them.
+
+        Keyword arguments:
+        note -- The note as a string, ending in \uFDDF</note>.
+        tagPattern -- The compiled pattern matching every tag of the family, with groups for the +, the name, the * and the following space, and matching the \uFDDF.
+        tags -- A dict of the tags to convert, as in noteTags.
+
+        """
+        if note.find('\uFDDF') != len(note) - len('\uFDDF</note>'):
+            return None
+
+        stops = list()
+        paragraphStops = list()
+        nestedStops = dict()
+        starts = list()
+        for m in tagPattern.finditer(note):
+            plus, name, star, space = m.groups()
+            if name is None:
+                stops.append(m.start())
+                paragraphStops.append(m.start())
+            elif plus:
+                if star:
+                    nestedStops.setdefault(name, list()).append(m.start())
+            else:
+                stops.append(m.start())
+                if name.startswith('fp'):
+                    paragraphStops.append(m.start())
+            if name and space and not star and plus+name in tags:
+                starts.append((m.start(), m.end(), plus+name))
+
+        edits = list()
+        nestedEnds = dict()
+        for start, textStart, tag in starts:
+            if tag[0] == '+':
+                # a nested tag within the text of the same nested tag is not matched again
+                if start < nestedEnds.get(tag, 0):
+                    continue
+                ends = (stops, nestedStops.get(tag[1:], list()))
+            elif tag == 'fp':
+                ends = (paragraphStops,)
+            else:
+                ends = (stops,)
+            textEnd = None
+            for positions in ends:
+                i = bisect.bisect_left(positions, textStart)
+                if i < len(positions):
+                    # a tag without text takes in the tag after it, which only the regex cascade reproduces
+                    if positions[i] == textStart:
+                        return None
+                    textEnd = positions[i] if textEnd is None else min(textEnd, positions[i])
+            if textEnd is None:
+                continue
+            startTag, endTag, order = tags[tag]
+            edits.append((start, 1, order, textStart, startTag))
+            edits.append((textEnd, 0, order, textEnd, endTag))
+            if tag[0] == '+':
+                nestedEnds[tag] = textEnd
+
+        edits.sort()
+        parts = list()
+        last = 0
+        for position, isStart, order, resume, text in edits:
+            parts.append(note[last:position])
+            parts.append(text)
+            last = resume
+        parts.append(note[last:])
+        return ''.join(parts)
+
+    def scanNote(note):
+        r"""Convert note-internal USFM tags to OSIS in a single scan, returning the note as a string.
+        Notes that scanNoteTags cannot convert exactly are passed to processNote.
+
+        Keyword arguments:
+        note -- The note as a string.
+
+        """
+        original = note
+        note = note.replace('\n', ' ')
+
+        # \fdc_refs...\fdc*
+        if '\\fdc' in note:
+            note = rx['notes.fdc'].sub(r'<seg editions="dc">\1</seg>', note)
+
+        # \fq_, \fqa_, \fr_, \fk_, \fl_, \fv_, \fp_
+        note = scanNoteTags(note, rx['notes.tags'], noteTags)
+        if note is None:
+            return processNote(original)
+        if '<p>' in note:
+            note = rx['notes.fpFirst'].sub(r'\1<p>\2</p><p>', note)
+
+        # \ft_
+        if '\\ft' in note:
+            note = rx['notes.ft'].sub('', note)
+
+        # \fq*,\fqa*,\ft*,\fr*,\fk*,\fl*,\fp*,\fv*
+        if '*' in note:
+            note = rx['notes.closers'].sub('', note)
+
+        return note.replace('\uFDDF', '')
+
+
     def cvtFootnotes(osis, relaxedConformance):
         r"""Converts USFM **Footnote** tags to OSIS, returning the processed text as a string.
 
@@ -923,17 +2138,22 @@ def convertToOsis(sFile):
         relaxedConformance -- Boolean value indicating whether to process non-standard & deprecated USFM tags.
 
         """
+        if not holds('f', 'fe', 'fm'):
+            return osis
 
         # \f_+_...\f*
-        osis = re.sub(r'\\f\s+([^\s\\]+)?\s*(.+?)\s*\\f\*', lambda m: '<note' + ((' n=""') if (m.group(1) == '-') else ('' if ((relaxedConformance and not m.group(1)) or m.group(1) == '+') else (' n="' + m.group(1) + '"'))) + ' placement="foot">' + m.group(2) + '\uFDDF</note>', osis, flags=re.DOTALL)
+        osis = rx['footnotes.f'].sub(lambda m: '<note' + ((' n=""') if (m.group(1) == '-') else ('' if ((relaxedConformance and not m.group(1)) or m.group(1) == '+') else (' n="' + m.group(1) + '"'))) + ' placement="foot">' + m.group(2) + '\uFDDF</note>', osis)
 
         # \fe_+_...\fe*
-        osis = re.sub(r'\\fe\s+([^\s\\]+?)\s*(.+?)\s*\\fe\*', lambda m: '<note' + ((' n=""') if (m.group(1) == '-') else ('' if ((relaxedConformance and not m.group(1)) or m.group(1) == '+') else (' n="' + m.group(1) + '"'))) + ' placement="end">' + m.group(2) + '\uFDDF</note>', osis, flags=re.DOTALL)
+        osis = rx['footnotes.fe'].sub(lambda m: '<note' + ((' n=""') if (m.group(1) == '-') else ('' if ((relaxedConformance and not m.group(1)) or m.group(1) == '+') else (' n="' + m.group(1) + '"'))) + ' placement="end">' + m.group(2) + '\uFDDF</note>', osis)
 
-        osis = re.sub(r'(<note\b[^>]*?>.*?</note>)', lambda m: processNote(m.group(1)), osis, flags=re.DOTALL)
+        if engine == 'regex':
+            osis = rx['footnotes.note'].sub(lambda m: processNote(m.group(1)), osis)
+        else:
+            osis = rx['footnotes.note'].sub(lambda m: scanNote(m.group(1)), osis)
 
         # \fm_...\fm*
-        osis = re.sub(r'\\fm\b\s(.+?)\\fm\*', r'<hi type="super">\1</hi>', osis)
+        osis = rx['footnotes.fm'].sub(r'<hi type="super">\1</hi>', osis)
 
         return osis
 
@@ -949,40 +2169,66 @@ def convertToOsis(sFile):
         note = note.replace('\n', ' ')
 
         # \xot_
-        note = re.sub(r'\\xot\b\s(.+?)(?=(\\x|'+'\uFDDF))', '\uFDDF'+r'<seg editions="ot">\1</seg>', note)
+        note = rx['xrefs.xot'].sub('\uFDDF'+r'<seg editions="ot">\1</seg>', note)
 
         # \xnt_
-        note = re.sub(r'\\xnt\b\s(.+?)(?=(\\x|'+'\uFDDF))', '\uFDDF'+r'<seg editions="nt">\1</seg>', note)
+        note = rx['xrefs.xnt'].sub('\uFDDF'+r'<seg editions="nt">\1</seg>', note)
 
         # \xdc_
-        note = re.sub(r'\\xdc\b\s(.+?)(?=(\\x|'+'\uFDDF))', '\uFDDF'+r'<seg editions="dc">\1</seg>', note)
+        note = rx['xrefs.xdc'].sub('\uFDDF'+r'<seg editions="dc">\1</seg>', note)
 
         # \xq_
-        note = re.sub(r'\\xq\b\s(.+?)(?=(\\x|'+'\uFDDF))', '\uFDDF'+r'<catchWord>\1</catchWord>', note)
+        note = rx['xrefs.xq'].sub('\uFDDF'+r'<catchWord>\1</catchWord>', note)
 
         # \xo_##SEP##
-        note = re.sub(r'\\xo\b\s(.+?)(?=(\\x|'+'\uFDDF))', '\uFDDF'+r'<reference type="annotateRef">\1</reference>', note)
+        note = rx['xrefs.xo'].sub('\uFDDF'+r'<reference type="annotateRef">\1</reference>', note)
 
         # \xk_
-        note = re.sub(r'\\xk\b\s(.+?)(?=(\\x|'+'\uFDDF))', '\uFDDF'+r'<catchWord>\1</catchWord>', note)
+        note = rx['xrefs.xk'].sub('\uFDDF'+r'<catchWord>\1</catchWord>', note)
 
         # \xt_  # This isn't guaranteed to be *the* reference, but it's a good guess.
-        note = re.sub(r'\\xt\b\s(.+?)(?=(\\x|'+'\uFDDF))', '\uFDDF'+r'<reference>\1</reference>', note)
+        note = rx['xrefs.xt'].sub('\uFDDF'+r'<reference>\1</reference>', note)
 
         if relaxedConformance:
             # TODO: move this to a concorance/index-specific section?
             # \xtSee..\xtSee*: Concordance and Names Index markup for an alternate entry target reference.
-            note = re.sub(r'\\xtSee\b\s(.+?)\\xtSee\*', '\uFDDF'+r'<reference osisRef="\1">See: \1</reference>', note)
+            note = rx['xrefs.xtSee'].sub('\uFDDF'+r'<reference osisRef="\1">See: \1</reference>', note)
             # \xtSeeAlso...\xtSeeAlso: Concordance and Names Index markup for an additional entry target reference.
-            note = re.sub(r'\\xtSeeAlso\b\s(.+?)\\xtSeeAlso\*', '\uFDDF'+r'<reference osisRef="\1">See also: \1</reference>', note)
+            note = rx['xrefs.xtSeeAlso'].sub('\uFDDF'+r'<reference osisRef="\1">See also: \1</reference>', note)
 
         # \xot*,\xnt*,\xdc*,\xq*,\xt*,\xo*,\xk*
-        note = re.sub(r'\\x(ot|nt|dc|q|t|o|k)\*', '', note)
+        note = rx['xrefs.closers'].sub('', note)
 
         note = note.replace('\uFDDF', '')
         return note
 
 
+    def scanXref(note):
+        r"""Convert cross-reference note-internal USFM tags to OSIS in a single scan, returning the cross-reference note as a string.
+        Cross references that scanNoteTags cannot convert exactly are passed to processXref.
+
+        Keyword arguments:
+        note -- The cross-reference note as a string.
+
+        """
+        if relaxedConformance and '\\xtSee' in note:
+            return processXref(note)
+
+        original = note
+        note = note.replace('\n', ' ')
+
+        # \xot_, \xnt_, \xdc_, \xq_, \xo_, \xk_, \xt_
+        note = scanNoteTags(note, rx['xrefs.tags'], xrefTags)
+        if note is None:
+            return processXref(original)
+
+        # \xot*,\xnt*,\xdc*,\xq*,\xt*,\xo*,\xk*
+        if '*' in note:
+            note = rx['xrefs.closers'].sub('', note)
+
+        return note.replace('\uFDDF', '')
+
+
     def cvtCrossReferences(osis, relaxedConformance):
         r"""Converts USFM **Cross Reference** tags to OSIS, returning the processed text as a string.
 
@@ -993,11 +2239,18 @@ def convertToOsis(sFile):
         relaxedConformance -- Boolean value indicating whether to process non-standard & deprecated USFM tags.
 
         """
+        # notes from earlier stages are also matched by the crossReferences.note pattern if they hold its type attribute
+        if '<note' not in osis and not holds('x'):
+            return osis
 
         # \x_+_...\x*
-        osis = re.sub(r'\\x\s+([^\s]+?)\s+(.+?)\s*\\x\*', lambda m: '<note' + ((' n=""') if (m.group(1) == '-') else ('' if (m.group(1) == '+') else (' n="' + m.group(1) + '"'))) + ' type="crossReference">' + m.group(2) + '\uFDDF</note>', osis, flags=re.DOTALL)
+        osis = rx['crossReferences.x'].sub(lambda m: '<note' + ((' n=""') if (m.group(1) == '-') else ('' if (m.group(1) == '+') else (' n="' + m.group(1) + '"'))) + ' type="crossReference">' + m.group(2) + '\uFDDF</note>', osis)
 
-        osis = re.sub(r'(<note [^>]*?type="crossReference"[^>]*>.*?</note>)', lambda m: processXref(m.group(1)), osis, flags=re.DOTALL)
+        if engine == 'regex':
+            osis = rx['crossReferences.note'].sub(lambda m: processXref(m.group(1)), osis)
+        else:
+            # footnote tags within a cross reference are left to the pass of the notes through processNote in cvtStudyBibleContent
+            osis = rx['crossReferences.note'].sub(lambda m: processXref(m.group(1)) if '\\f' in m.group(1) else scanXref(m.group(1)), osis)
 
         return osis
 
@@ -1015,54 +2268,54 @@ def convertToOsis(sFile):
         """
 
         # \add_...\add*
-        osis = re.sub(r'\\add\s+(.+?)\\add\*', r'<transChange type="added">\1</transChange>', osis, flags=re.DOTALL)
+        osis = rx['specialText.add'].sub(r'<transChange type="added">\1</transChange>', osis)
 
         # \wj_...\wj*
-        osis = re.sub(r'\\wj\s+(.+?)\\wj\*', r'<q who="Jesus" marker="">\1</q>', osis, flags=re.DOTALL)
+        osis = rx['specialText.wj'].sub(r'<q who="Jesus" marker="">\1</q>', osis)
 
         # \nd_...\nd*
-        osis = re.sub(r'\\nd\s+(.+?)\\nd\*', r'<divineName>\1</divineName>', osis, flags=re.DOTALL)
+        osis = rx['specialText.nd'].sub(r'<divineName>\1</divineName>', osis)
 
         # \pn_...\pn*
-        osis = re.sub(r'\\pn\s+(.+?)\\pn\*', r'<name>\1</name>', osis, flags=re.DOTALL)
+        osis = rx['specialText.pn'].sub(r'<name>\1</name>', osis)
 
         # \qt_...\qt* # TODO:should this be <q>?
-        osis = re.sub(r'\\qt\s+(.+?)\\qt\*', r'<seg type="otPassage">\1</seg>', osis, flags=re.DOTALL)
+        osis = rx['specialText.qt'].sub(r'<seg type="otPassage">\1</seg>', osis)
 
         # \sig_...\sig*
-        osis = re.sub(r'\\sig\s+(.+?)\\sig\*', r'<signed>\1</signed>', osis, flags=re.DOTALL)
+        osis = rx['specialText.sig'].sub(r'<signed>\1</signed>', osis)
 
         # \ord_...\ord*
-        osis = re.sub(r'\\ord\s+(.+?)\\ord\*', r'<hi type="super">\1</hi>', osis, flags=re.DOTALL) # semantic incongruity (ordinal -> superscript)
+        osis = rx['specialText.ord'].sub(r'<hi type="super">\1</hi>', osis) # semantic incongruity (ordinal -> superscript)
 
         # \tl_...\tl*
-        osis = re.sub(r'\\tl\s+(.+?)\\tl\*', r'<foreign>\1</foreign>', osis, flags=re.DOTALL)
+        osis = rx['specialText.tl'].sub(r'<foreign>\1</foreign>', osis)
 
         # \bk_...\bk*
-        osis = re.sub(r'\\bk\s+(.+?)\\bk\*', r'<name type="x-workTitle">\1</name>', osis, flags=re.DOTALL)
+        osis = rx['specialText.bk'].sub(r'<name type="x-workTitle">\1</name>', osis)
 
         # \k_...\k*
-        osis = re.sub(r'\\k\s+(.+?)\\k\*', r'<seg type="keyword">\1</seg>', osis, flags=re.DOTALL)
+        osis = rx['specialText.k'].sub(r'<seg type="keyword">\1</seg>', osis)
 
         # \lit
-        osis = re.sub(r'\\lit\s+(.*?)(?=(\\(i?m|i?p|nb|lit|cls|tr)\b|<(chapter eID|/?div|p|closer)\b))', lambda m: '\uFDD3<p type="x-liturgical">\n' + m.group(1) + '\uFDD3</p>\n', osis, flags=re.DOTALL)
+        osis = rx['specialText.lit'].sub(lambda m: '\uFDD3<p type="x-liturgical">\n' + m.group(1) + '\uFDD3</p>\n', osis)
 
         # \dc_...\dc*  # TODO: Find an example---should this really be transChange?
-        osis = re.sub(r'\\dc\b\s*(.+?)\\dc\*', r'<transChange type="added" editions="dc">\1</transChange>', osis, flags=re.DOTALL)
+        osis = rx['specialText.dc'].sub(r'<transChange type="added" editions="dc">\1</transChange>', osis)
 
         # \sls_...\sls*
-        osis = re.sub(r'\\sls\b\s*(.+?)\\sls\*', r'<foreign>/1</foreign>', osis, flags=re.DOTALL)  # TODO: find a better mapping than <foreign>?
+        osis = rx['specialText.sls'].sub(r'<foreign>/1</foreign>', osis)  # TODO: find a better mapping than <foreign>?
 
         if relaxedConformance:
             # \addpn...\addpn*
-            osis = re.sub(r'\\addpn\s+(.+?)\\addpn\*', r'<hi type="x-dotUnderline">\1</hi>', osis, flags=re.DOTALL)
+            osis = rx['specialText.addpn'].sub(r'<hi type="x-dotUnderline">\1</hi>', osis)
             # \k# # TODO: unsure of this tag's purpose
-            osis = re.sub(r'\\k1\s+(.+?)\\k1\*', r'<seg type="keyword" n="1">\1</seg>', osis, flags=re.DOTALL)
-            osis = re.sub(r'\\k2\s+(.+?)\\k2\*', r'<seg type="keyword" n="2">\1</seg>', osis, flags=re.DOTALL)
-            osis = re.sub(r'\\k3\s+(.+?)\\k3\*', r'<seg type="keyword" n="3">\1</seg>', osis, flags=re.DOTALL)
-            osis = re.sub(r'\\k4\s+(.+?)\\k4\*', r'<seg type="keyword" n="4">\1</seg>', osis, flags=re.DOTALL)
-            osis = re.sub(r'\\k5\s+(.+?)\\k5\*', r'<seg type="keyword" n="5">\1</seg>', osis, flags=re.DOTALL)
-            osis = re.sub(r'\\xt\s+(.+?)\\xt\*', r'<reference>\1</reference>', osis, flags=re.DOTALL)
+            osis = rx['specialText.k1'].sub(r'<seg type="keyword" n="1">\1</seg>', osis)
+            osis = rx['specialText.k2'].sub(r'<seg type="keyword" n="2">\1</seg>', osis)
+            osis = rx['specialText.k3'].sub(r'<seg type="keyword" n="3">\1</seg>', osis)
+            osis = rx['specialText.k4'].sub(r'<seg type="keyword" n="4">\1</seg>', osis)
+            osis = rx['specialText.k5'].sub(r'<seg type="keyword" n="5">\1</seg>', osis)
+            osis = rx['specialText.xt'].sub(r'<reference>\1</reference>', osis)
 
         return osis
 
@@ -1079,22 +2332,112 @@ def convertToOsis(sFile):
         """
 
         # \em_...\em*
-        osis = re.sub(r'\\em\s+(.+?)\\em\*', r'<hi type="emphasis">\1</hi>', osis, flags=re.DOTALL)
+        osis = rx['characterStyling.em'].sub(r'<hi type="emphasis">\1</hi>', osis)
 
         # \bd_...\bd*
-        osis = re.sub(r'\\bd\s+(.+?)\\bd\*', r'<hi type="bold">\1</hi>', osis, flags=re.DOTALL)
+        osis = rx['characterStyling.bd'].sub(r'<hi type="bold">\1</hi>', osis)
 
         # \it_...\it*
-        osis = re.sub(r'\\it\s+(.+?)\\it\*', r'<hi type="italic">\1</hi>', osis, flags=re.DOTALL)
+        osis = rx['characterStyling.it'].sub(r'<hi type="italic">\1</hi>', osis)
 
         # \bdit_...\bdit*
-        osis = re.sub(r'\\bdit\s+(.+?)\\bdit\*', r'<hi type="bold"><hi type="italic">\1</hi></hi>', osis, flags=re.DOTALL)
+        osis = rx['characterStyling.bdit'].sub(r'<hi type="bold"><hi type="italic">\1</hi></hi>', osis)
 
         # \no_...\no*
-        osis = re.sub(r'\\no\s+(.+?)\\no\*', r'<hi type="normal">\1</hi>', osis, flags=re.DOTALL)
+        osis = rx['characterStyling.no'].sub(r'<hi type="normal">\1</hi>', osis)
 
         # \sc_...\sc*
-        osis = re.sub(r'\\sc\s+(.+?)\\sc\*', r'<hi type="small-caps">\1</hi>', osis, flags=re.DOTALL)
+        osis = rx['characterStyling.sc'].sub(r'<hi type="small-caps">\1</hi>', osis)
+
+        return osis
+
+
+    # paired character styles: OSIS start tag & end tag; each style may also be nested within another as \+marker...\+marker*
+    # \sls is not listed, since the regex cascade discards its text; books holding it are passed to cvtSpecialText & cvtCharacterStyling
+    characterStyles = {'add':('<transChange type="added">', '</transChange>'), 'wj':('<q who="Jesus" marker="">', '</q>'),
+                       'nd':('<divineName>', '</divineName>'), 'pn':('<name>', '</name>'),
+                       'qt':('<seg type="otPassage">', '</seg>'), 'sig':('<signed>', '</signed>'),
+                       'ord':('<hi type="super">', '</hi>'), 'tl':('<foreign>', '</foreign>'),
+                       'bk':('<name type="x-workTitle">', '</name>'), 'k':('<seg type="keyword">', '</seg>'),
+                       'dc':('<transChange type="added" editions="dc">', '</transChange>'),
+                       'em':('<hi type="emphasis">', '</hi>'), 'bd':('<hi type="bold">', '</hi>'), 'it':('<hi type="italic">', '</hi>'),
+                       'bdit':('<hi type="bold"><hi type="italic">', '</hi></hi>'), 'no':('<hi type="normal">', '</hi>'),
+                       'sc':('<hi type="small-caps">', '</hi>')}
+    relaxedCharacterStyles = {'addpn':('<hi type="x-dotUnderline">', '</hi>'),
+                              'k1':('<seg type="keyword" n="1">', '</seg>'), 'k2':('<seg type="keyword" n="2">', '</seg>'),
+                              'k3':('<seg type="keyword" n="3">', '</seg>'), 'k4':('<seg type="keyword" n="4">', '</seg>'),
+                              'k5':('<seg type="keyword" n="5">', '</seg>'), 'xt':('<reference>', '</reference>')}
+    # styles whose start tag need not be followed by a space
+    unspacedCharacterStyles = ('dc',)
+
+    def cvtCharacterStyles(osis, relaxedConformance):
+        r"""Converts USFM **Special Text** & **Character Styling** tags to OSIS in a single scan, returning the processed text as a string.
+        The text of a style runs from its start tag to the first end tag of the same style after it, as the lazy patterns of cvtSpecialText
+        & cvtCharacterStyling match it, so every style in characterStyles is paired from one list of tag positions.
+
+        Supported tags: \add...\add*, \bk...\bk*, \dc...\dc*, \k...\k*, \lit, \nd...\nd*, \ord...\ord*, \pn...\pn*, \qt...\qt*, \sig...\sig*, \tl...\tl*, \wj...\wj*,
+                        \em...\em*, \bd...\bd*, \it...\it*, \bdit...\bdit*, \no...\no*, \sc...\sc*, and each of these nested as \+add...\+add*, etc.
+
+        Keyword arguments:
+        osis -- The document as a string.
+        relaxedConformance -- Boolean value indicating whether to process non-standard & deprecated USFM tags.
+
+        """
+        if not holds('lit', *(list(characterStyles) + list(relaxedCharacterStyles))):
+            return osis
+        styles = dict(characterStyles)
+        if relaxedConformance:
+            styles.update(relaxedCharacterStyles)
+
+        starts = dict()
+        ends = dict()
+        for m in rx['characterStyles.tags'].finditer(osis):
+            plus, name, space = m.groups()
+            if name not in styles:
+                continue
+            if space == '*':
+                ends.setdefault(plus+name, list()).append((m.start(), m.end()))
+                # the end tag of an unspaced style can also start one, its text beginning with the *
+                if name in unspacedCharacterStyles:
+                    starts.setdefault(plus+name, list()).append((m.start(), m.end()-1, m.end()-1))
+            elif space or name in unspacedCharacterStyles:
+                # the text starts after all the spaces, or after as few as the start tag needs if no end tag follows those
+                starts.setdefault(plus+name, list()).append((m.start(), m.end(), m.start(3) + (0 if name in unspacedCharacterStyles else 1)))
+
+        edits = list()
+        for style in starts:
+            if style not in ends:
+                continue
+            startTag, endTag = styles[style.lstrip('+')]
+            endPositions = [start for start, end in ends[style]]
+            last = 0
+            for start, textStart, firstTextStart in starts[style]:
+                if start < last:
+                    continue
+                # the text holds at least one character
+                i = bisect.bisect_right(endPositions, textStart)
+                if i == len(endPositions):
+                    if textStart > firstTextStart and endPositions[-1] == textStart:
+                        i -= 1
+                        textStart -= 1
+                    else:
+                        continue
+                edits.append((start, textStart, startTag))
+                edits.append(ends[style][i] + (endTag,))
+                last = ends[style][i][1]
+
+        edits.sort()
+        parts = list()
+        last = 0
+        for start, end, text in edits:
+            parts.append(osis[last:start])
+            parts.append(text)
+            last = end
+        parts.append(osis[last:])
+        osis = ''.join(parts)
+
+        # \lit
+        osis = rx['specialText.lit'].sub(lambda m: '\uFDD3<p type="x-liturgical">\n' + m.group(1) + '\uFDD3</p>\n', osis)
 
         return osis
 
@@ -1117,7 +2460,8 @@ def convertToOsis(sFile):
         osis = osis.replace('//', '\uFDE7<lb type="x-optional"/>')
 
         # \pb
-        osis = re.sub(r'\\pb\s*', '<milestone type="pb"/>\n', osis, flags=re.DOTALL)
+        if holds('pb'):
+            osis = rx['spacingAndBreaks.pb'].sub('<milestone type="pb"/>\n', osis)
 
         return osis
 
@@ -1163,29 +2507,35 @@ def convertToOsis(sFile):
                 figure += '<!-- fig LOC - ' + fig_loc + ' -->\n'
             figure += '</figure>'
             return figure
-        osis = re.sub(r'\\fig\b\s+([^\|]*)\s*\|([^\|]*)\s*\|([^\|]*)\s*\|([^\|]*)\s*\|([^\|]*)\s*\|([^\|]*)\s*\|([^\\]*)\s*\\fig\*', makeFigure, osis)
+        if holds('fig'):
+            osis = rx['specialFeatures.fig'].sub(makeFigure, osis)
 
         # \ndx_...\ndx* # TODO tag with x-glossary instead of <index/>? Is <index/> containerable?
-        osis = re.sub(r'\\ndx\s+(.+?)(\s*)\\ndx\*', r'\1<index index="Index" level1="\1"/>\2', osis, flags=re.DOTALL)
+        if holds('ndx'):
+            osis = rx['specialFeatures.ndx'].sub(r'\1<index index="Index" level1="\1"/>\2', osis)
 
         # \pro_...\pro*
-        osis = re.sub(r'([^\s]+)(\s*)\\pro\s+(.+?)(\s*)\\pro\*', r'<w xlit="\3">\1</w>\2\4', osis, flags=re.DOTALL)
+        if holds('pro'):
+            osis = rx['specialFeatures.pro'].sub(r'<w xlit="\3">\1</w>\2\4', osis)
 
         # \w_...\w*
-        if relaxedConformance:
-            osis = re.sub(r'\\w\s+(([^\|\\]*)[^\\]*?)(\s*)\\w\*', r'\2<index index="Glossary" level1="\1"/>\3', osis, flags=re.DOTALL)
-        else:
-            osis = re.sub(r'\\w\s+(.+?)(\s*)\\w\*', r'\1<index index="Glossary" level1="\1"/>\2', osis, flags=re.DOTALL)
+        if holds('w'):
+            if relaxedConformance:
+                osis = rx['specialFeatures.wRelaxed'].sub(r'\2<index index="Glossary" level1="\1"/>\3', osis)
+            else:
+                osis = rx['specialFeatures.w'].sub(r'\1<index index="Glossary" level1="\1"/>\2', osis)
 
         # \wg_...\wg*
-        osis = re.sub(r'\\wg\s+(.+?)(\s*)\\wg\*', r'\1<index index="Greek" level1="\1"/>\2', osis, flags=re.DOTALL)
+        if holds('wg'):
+            osis = rx['specialFeatures.wg'].sub(r'\1<index index="Greek" level1="\1"/>\2', osis)
 
         # \wh_...\wh*
-        osis = re.sub(r'\\wh\s+(.+?)(\s*)\\wh\*', r'\1<index index="Hebrew" level1="\1"/>\2', osis, flags=re.DOTALL)
+        if holds('wh'):
+            osis = rx['specialFeatures.wh'].sub(r'\1<index index="Hebrew" level1="\1"/>\2', osis)
 
-        if relaxedConformance:
+        if relaxedConformance and holds('wr'):
             # \wr...\wr*
-            osis = re.sub(r'\\wr\s+(.+?)(\s*)\\wr\*', r'\1<index index="Reference" level1="\1"/>\2', osis, flags=re.DOTALL)
+            osis = rx['specialFeatures.wr'].sub(r'\1<index index="Reference" level1="\1"/>\2', osis)
 
         return osis
 
@@ -1200,20 +2550,49 @@ def convertToOsis(sFile):
         relaxedConformance -- Boolean value indicating whether to process non-standard & deprecated USFM tags.
 
         """
+        # notes whose pattern did not match them in their own stage still end in \uFDDF and are converted here, and the notes converted
+        # by the earlier stages are passed through processNote & processXref again
+        if '<note' not in osis and not holds('ef', 'ex', 'esb', 'cat'):
+            return osis
+
+        def repassNote(note, convert, process):
+            r"""Convert a note still ending in \uFDDF, or pass a converted note through the regex cascade again where that may change it,
+            returning the note as a string. That pass replaces the newlines put in the note by \fig, \lit & \pb, and opens a note holding a
+            \fp paragraph with another paragraph.
+
+            Keyword arguments:
+            note -- The note as a string.
+            convert -- The function converting a new note, scanNote or scanXref.
+            process -- The function of the regex cascade, processNote or processXref.
+
+            """
+            if '\uFDDF' in note:
+                return convert(note)
+            if '\n' in note or '\\' in note or (process is processNote and '<p>' in note):
+                return process(note)
+            return note
 
         # \ef...\ef*
-        osis = re.sub(r'\\ef\s+([^\s\\]+?)\s*(.+?)\s*\\ef\*', lambda m: '<note' + ((' n=""') if (m.group(1) == '-') else ('' if (m.group(1) == '+') else (' n="' + m.group(1) + '"'))) + ' type="study">' + m.group(2) + '\uFDDF</note>', osis, flags=re.DOTALL)
-        osis = re.sub(r'(<note\b[^>]*?>.*?</note>)', lambda m: processNote(m.group(1)), osis, flags=re.DOTALL)
+        osis = rx['studyBible.ef'].sub(lambda m: '<note' + ((' n=""') if (m.group(1) == '-') else ('' if (m.group(1) == '+') else (' n="' + m.group(1) + '"'))) + ' type="study">' + m.group(2) + '\uFDDF</note>', osis)
+        if engine == 'regex':
+            osis = rx['footnotes.note'].sub(lambda m: processNote(m.group(1)), osis)
+        else:
+            # only the notes still ending in \uFDDF are new; the footnotes & cross references were converted by their own stages, and
+            # are passed through the cascade again only where it may change them
+            osis = rx['footnotes.note'].sub(lambda m: repassNote(m.group(1), scanNote, processNote), osis)
 
         # \ex...\ex*
-        osis = re.sub(r'\\ex\s+([^\s]+?)\s+(.+?)\s*\\ex\*', lambda m: '<note' + ((' n=""') if (m.group(1) == '-') else ('' if (m.group(1) == '+') else (' n="' + m.group(1) + '"'))) + ' type="crossReference" subType="x-study"><reference>' + m.group(2) + '</reference>\uFDDF</note>', osis, flags=re.DOTALL)
-        osis = re.sub(r'(<note [^>]*?type="crossReference"[^>]*>.*?</note>)', lambda m: processXref(m.group(1)), osis, flags=re.DOTALL)
+        osis = rx['studyBible.ex'].sub(lambda m: '<note' + ((' n=""') if (m.group(1) == '-') else ('' if (m.group(1) == '+') else (' n="' + m.group(1) + '"'))) + ' type="crossReference" subType="x-study"><reference>' + m.group(2) + '</reference>\uFDDF</note>', osis)
+        if engine == 'regex':
+            osis = rx['crossReferences.note'].sub(lambda m: processXref(m.group(1)), osis)
+        else:
+            osis = rx['crossReferences.note'].sub(lambda m: repassNote(m.group(1), scanXref, processXref), osis)
 
         # \esb...\esbex  # TODO: this likely needs to go much earlier in the process
-        osis = re.sub(r'\\esb\b\s*(.+?)\\esbe\b\s*', '\uFDD5<div type="x-sidebar">'+r'\1'+'</div>\uFDD5\n', osis, flags=re.DOTALL)
+        osis = rx['studyBible.esb'].sub('\uFDD5<div type="x-sidebar">'+r'\1'+'</div>\uFDD5\n', osis)
 
         # \cat_<TAG>\cat*
-        osis = re.sub(r'\\cat\b\s+(.+?)\\cat\*', r'<index index="category" level1="\1"/>', osis)
+        osis = rx['studyBible.cat'].sub(r'<index index="category" level1="\1"/>', osis)
 
         return osis
 
@@ -1228,6 +2607,8 @@ def convertToOsis(sFile):
         relaxedConformance -- Boolean value indicating whether to process non-standard & deprecated USFM tags.
 
         """
+        if not holds('z'):
+            return osis
 
         ### We can't really know what these mean, but will preserve them as <milestone/> elements.
 
@@ -1240,25 +2621,23 @@ def convertToOsis(sFile):
         # these can all be handled by the default \z Namespace handlers:
 
         # \z{X}...\z{X}*
-        osis = re.sub(r'\\z([^\s]+)\s(.+?)(\\z\1\*)', r'<seg type="x-\1">\2</seg>', osis, flags=re.DOTALL)
+        osis = rx['privateUse.zPaired'].sub(r'<seg type="x-\1">\2</seg>', osis)
 
         # \z{X}
-        osis = re.sub(r'\\z([^\s]+)', r'<milestone type="x-usfm-z-\1"/>', osis)
+        osis = rx['privateUse.z'].sub(r'<milestone type="x-usfm-z-\1"/>', osis)
 
         return osis
 
 
-    def processOsisIDs(osis):
-        r"""Perform postprocessing on an OSIS document, returning the processed text as a string.
-        Recurses through chapter & verses, substituting acutal book IDs & chapter numbers for placeholders.
+    def expandVerseRanges(osis):
+        r"""Expands the verse ranges & series in placeholder osisIDs into lists of single verses, returning the processed text as a string.
 
         Keyword arguments:
-        osis -- The document as a string.
+        osis -- The document (or a single verse milestone) as a string.
 
         """
         # TODO: add support for subverses, including in ranges/series, e.g. Matt.1.1!b-Matt.2.5,Matt.2.7!a
         # TODO: make sure that descending ranges generate invalid markup (osisID="")
-        # expand verse ranges, series
         def expandRange(vRange):
             r"""Expands a verse range into its constituent verses as a string.
 
@@ -1266,12 +2645,12 @@ def convertToOsis(sFile):
             vRange -- A string of the lower & upper bounds of the range, with a hypen in between.
             
             """
-            vRange = re.findall(r'\d+', vRange)
+            vRange = rx['osisIDs.number'].findall(vRange)
             osisID = list()
             for n in range(int(vRange[0]), int(vRange[1])+1):
                 osisID.append('$BOOK$.$CHAP$.'+str(n))
             return ' '.join(osisID)
-        osis = re.sub(r'\$BOOK\$\.\$CHAP\$\.(\d+-\d+)"', lambda m: expandRange(m.group(1))+'"', osis)
+        osis = rx['osisIDs.verseRange'].sub(lambda m: expandRange(m.group(1))+'"', osis)
 
         def expandSeries(vSeries):
             r"""Expands a verse series (list) into its constituent verses as a string.
@@ -1281,25 +2660,39 @@ def convertToOsis(sFile):
             
             """
 
-            vSeries = re.findall(r'\d+', vSeries)
+            vSeries = rx['osisIDs.number'].findall(vSeries)
             osisID = list()
             for n in vSeries:
                 osisID.append('$BOOK$.$CHAP$.'+str(n))
             return ' '.join(osisID)
-        osis = re.sub(r'\$BOOK\$\.\$CHAP\$\.(\d+(,\d+)+)"', lambda m: expandSeries(m.group(1))+'"', osis)
+        osis = rx['osisIDs.verseSeries'].sub(lambda m: expandSeries(m.group(1))+'"', osis)
+
+        return osis
+
+
+    def processOsisIDs(osis):
+        r"""Perform postprocessing on an OSIS document, returning the processed text as a string.
+        Recurses through chapter & verses, substituting acutal book IDs & chapter numbers for placeholders.
+
+        Keyword arguments:
+        osis -- The document as a string.
+
+        """
+        # expand verse ranges, series
+        osis = expandVerseRanges(osis)
 
         # fill in book & chapter values
         bookChunks = osis.split('\uFDD0')
         osis = ''
         for bc in bookChunks:
-            bookValue = re.search(r'<div type="book" osisID="([^"]+?)"', bc)
+            bookValue = rx['osisIDs.book'].search(bc)
             if bookValue:
                 bookValue = bookValue.group(1)
                 bc = bc.replace('$BOOK$', bookValue)
                 chapChunks = bc.split('\uFDD1')
                 newbc = ''
                 for cc in chapChunks:
-                    chapValue = re.search(r'<chapter osisID="[^\."]+\.([^"]+)', cc)
+                    chapValue = rx['osisIDs.chapter'].search(cc)
                     if chapValue:
                         chapValue = chapValue.group(1)
                         cc = cc.replace('$CHAP$', chapValue)
@@ -1309,93 +2702,476 @@ def convertToOsis(sFile):
         return osis
 
 
-    def osisReorderAndCleanup(osis):
-        r"""Perform postprocessing on an OSIS document, returning the processed text as a string.
-        Reorders elements, strips non-characters, and cleans up excess spaces & newlines
+    slideSectionChars = '\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE'
+    # a title, other than a canonical title or running head, may slide
+    unslidTitles = (' canonical="true"', ' type="runningHead"')
+
+    def slideStartTags(osis, slide, milestone, titles):
+        r"""Slide the start tags (and titles) before each milestone to after it in a single pass, returning the processed text as a string.
+        This matches the slide pattern exactly. The positions from which a run of tags reaches a milestone are found by walking back from
+        each milestone, and the pattern's own choices (the first tag of the run, lazy title ends) are then followed forward through them.
 
         Keyword arguments:
         osis -- The document as a string.
-        relaxedConformance -- Boolean value indicating whether to process non-standard & deprecated USFM tags.
+        slide -- The compiled slide pattern this replaces, which is used if the run found is not the pattern's.
+        milestone -- The compiled pattern matching the milestone.
+        titles -- Boolean value indicating whether titles slide along with start tags.
 
         """
 
-        # assorted re-orderings
+        def titleEnds(start):
+            r"""Yield, shortest first, the positions of the </title> tags on the line ending a title whose text starts at start."""
+            lineEnd = osis.find('\n', start)
+            if lineEnd == -1:
+                lineEnd = len(osis)
+            end = osis.find('</title>', start, lineEnd)
+            while end != -1:
+                yield end
+                end = osis.find('</title>', end+1, lineEnd)
+
+        def followers(position):
+            r"""Yield, in the order the pattern tries them, the ends of the tags of the run that can start at position."""
+            c = osis[position]
+            if c in slideSectionChars:
+                if titles:
+                    m = rx['slides.sectionTitle'].match(osis, position)
+                    if m:
+                        for end in titleEnds(m.end()):
+                            sectionEnd = rx['slides.sectionEnd'].match(osis, end+8)
+                            if sectionEnd:
+                                yield sectionEnd.end()
+                            yield end+8
+            elif c == '<':
+                if osis.startswith('<title', position):
+                    if titles and not osis.startswith(unslidTitles, position+6):
+                        tagEnd = osis.find('>', position)
+                        if tagEnd != -1:
+                            for end in titleEnds(tagEnd+1):
+                                yield end+8
+                else:
+                    m = rx['slides.container'].match(osis, position)
+                    if m:
+                        yield m.end()
+            elif c.isspace():
+                yield position+1
+
+        def titleStarts(end, section):
+            r"""Yield the starts of the titles, or with section the section titles, whose text can end at the </title> at end."""
+            lineStart = osis.rfind('\n', 0, end) + 1
+            start = osis.find('<title', osis.rfind('>', 0, lineStart) + 1, end)
+            while start != -1:
+                if osis.find('>', start) < end:
+                    if not section and not osis.startswith(unslidTitles, start+6):
+                        yield start
+                    if start and osis[start-1] == '>':
+                        div = osis.find('<div', osis.rfind('>', 0, start-1) + 1, start-1)
+                        while div != -1:
+                            if div and osis[div-1] in slideSectionChars and rx['slides.div'].match(osis, div):
+                                yield div-1
+                            div = osis.find('<div', div+1, start-1)
+                start = osis.find('<title', start+1, end)
+
+        def leaders(position):
+            r"""Yield the starts of the tags of the run that can end at position."""
+            if not position:
+                return
+            c = osis[position-1]
+            if c.isspace():
+                yield position-1
+            elif c == '>':
+                tag = osis.find('<', osis.rfind('>', 0, position-1) + 1, position-1)
+                while tag != -1:
+                    if rx['slides.container'].match(osis, tag):
+                        yield tag
+                    tag = osis.find('<', tag+1, position-1)
+                if titles and position >= 8 and osis.startswith('</title>', position-8):
+                    for start in titleStarts(position-8, False):
+                        yield start
+            elif titles and c in slideSectionChars and position >= 7 and osis.startswith('</div>', position-7):
+                end = position-7
+                while end and osis[end-1].isspace():
+                    end -= 1
+                if end >= 8 and osis.startswith('</title>', end-8):
+                    for start in titleStarts(end-8, True):
+                        yield start
+
+        milestones = dict((m.start(), m.end()) for m in milestone.finditer(osis))
+        # positions from which a run of tags reaches a milestone, and those a run can start from
+        reaching = set(milestones)
+        starts = set()
+        pending = list(milestones)
+        while pending:
+            for start in leaders(pending.pop()):
+                starts.add(start)
+                if start not in reaching:
+                    reaching.add(start)
+                    pending.append(start)
+
+        starts = sorted(starts)
+        parts = list()
+        last = 0
+        i = 0
+        while True:
+            i = bisect.bisect_left(starts, last, i)
+            if i == len(starts):
+                break
+            start = starts[i]
+            end = start
+            while True:
+                for following in followers(end):
+                    if following in reaching:
+                        end = following
+                        break
+                else:
+                    break
+            if end not in milestones:
+                return slide.sub(r'\g<vc>\1', osis)
+            parts.append(osis[last:start])
+            parts.append(osis[end:milestones[end]])
+            parts.append(osis[start:end])
+            last = milestones[end]
+        parts.append(osis[last:])
+        return ''.join(parts)
+
+    endBlocks = ['p', 'div', 'note', 'l', 'lg', 'chapter', 'verse', 'head', 'title', 'item', 'list']
+    inlineContainers = ('<title>', '</title>', '<list>', '</list>', '<lg>', '</lg>')
+    # the whitespace around a word, or at either end of the document, is laid out as that around a tag with no part in the layout
+    plainLayout = (None, None, False, None)
+
+    def tagLayout(tag):
+        r"""Return the layout of a tag for layoutOsis, as a tuple of the tag, with any attributes of an end tag removed, the index of the
+        endBlocks pass that moves the whitespace before it to after it, or None, whether it is an end tag, and the name of the cleanup
+        pattern that lays out the whitespace around it, or None.
 
-        # delete Unicode non-characters (except section divs for now)
-        for c in '\uFDD0\uFDD1\uFDD2\uFDD3\uFDD4\uFDDF\uFDE0\uFDE1\uFDE2\uFDE3\uFDE4\uFDE5\uFDE6\uFDE7\uFDE8\uFDE9\uFDEA\uFDEB\uFDEC\uFDED\uFDEE\uFDEF':
-            osis = osis.replace(c, '')
-            
-        # adjust tag order for Bible books
-        if re.search('<div type="book" osisID="(' + "|".join([x for x in list(bookDict.values()) if x not in specialBooks]) + ')"', osis):
-            # </div-book></div-section> --> </div-section></div-book>
-            sectionDivChar = '[\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE]'
-            osis = re.sub('(</div type="book">)(</div>'+sectionDivChar+')', r'\2\1', osis)
-            
+        Keyword arguments:
+        tag -- The tag as a string.
+
+        """
+        if tag.startswith('</'):
+            m = rx['cleanup.endTagAttributes'].match(tag)
+            if m:
+                tag = m.group(1) + '>'
+        elif tag == '<lb type="x-p"/>':
+            tag = '<lb/>'
+
+        endPass = None
+        if tag[2:-1] in endBlocks and tag.startswith('</'):
+            endPass = 2 * endBlocks.index(tag[2:-1])
+        else:
+            m = rx['layout.endBlockMilestone'].fullmatch(tag)
+            if m:
+                endPass = 2 * endBlocks.index(m.group(1)) + 1
+
+        if tag in inlineContainers:
+            layout = 'inlineContainers'
+        elif rx['layout.blockEnd'].match(tag):
+            layout = 'blockEnd'
+        elif rx['layout.blockStart'].match(tag):
+            layout = 'blockStart'
+        elif tag.startswith('<verse osisID='):
+            layout = 'verseStart'
+        elif tag.startswith('<verse eID='):
+            layout = 'verseEnd'
+        elif tag.startswith('<chapter'):
+            layout = 'chapter'
+        else:
+            layout = None
+        return tag, endPass, tag.startswith('</') and len(tag) > 3, layout
+
+    def layoutGap(space, before, after, chain, endRun):
+        r"""Lay out the whitespace between two tags or words as the cleanup patterns of osisReorderAndCleanup do, returning the whitespace,
+        and the chain & endRun to pass on to the next gap.
+
+        Keyword arguments:
+        space -- The whitespace as a string, possibly empty.
+        before -- The layout (see tagLayout) of the tag before the whitespace, or plainLayout.
+        after -- The layout of the tag after the whitespace, or plainLayout.
+        chain -- For the gap before the tag before, a tuple of whether it held whitespace, the endBlocks pass of the tag before it, and whether that pass added a newline to it.
+        endRun -- Boolean value indicating whether the tag before is one of a run of end tags that the endTagSpaces pattern moves spaces after.
+
+        """
+        # \s+</p> --> </p>\n, etc., in the order of endBlocks; the newline is added only if the gap before the tag still holds whitespace
+        # when the tag's pass comes, and a gap is emptied by the pass of the tag after it
+        held = bool(space)
+        newline = False
+        if before[1] is not None:
+            newline = chain[0] or (chain[1] is not None and chain[1] < before[1] and chain[2])
+            if after[1] is None:
+                space = ('\n' if newline else '') + space
+            elif after[1] <= before[1]:
+                space = '\n' if newline else ''
+            else:
+                space = ''
+        elif after[1] is not None:
+            space = ''
+        chain = (held, before[1], newline)
+
+        # spaces before a run of end tags --> a space after it
+        if endRun:
+            if space or not after[2]:
+                space = space.lstrip(' ')
+                endRun = after[2] and space.endswith(' ')
+                space = ' ' + (space.rstrip(' ') if endRun else space)
+        elif after[2] and space.endswith(' '):
+            space = space.rstrip(' ')
+            endRun = True
+
+        # newlines around containers, verses & chapters
+        if before[3] or after[3]:
+            if 'inlineContainers' in (before[3], after[3]) or 'blockEnd' in (before[3], after[3]):
+                space = ''
+            if before[3] == 'blockStart':
+                space = ''
+            if after[3] == 'blockStart':
+                space = '\n'
+            if before[3] == 'verseStart':
+                space = ''
+            if after[3] == 'verseStart':
+                space = '\n'
+            if after[3] == 'verseEnd':
+                space = ''
+            if before[3] == 'verseEnd':
+                space = '\n'
+            if 'chapter' in (before[3], after[3]):
+                space = ('\n' if before[3] == 'chapter' else '') + ('\n' if after[3] == 'chapter' else '')
+
+        return collapseSpaces(space), chain, endRun
+
+    def collapseSpaces(text):
+        r"""Strip extra spaces & newlines from a string, returning the string."""
+        if '  ' in text:
+            text = rx['cleanup.spaces'].sub(' ', text)
+        if '\n\n' in text:
+            text = rx['cleanup.newlines'].sub('\n', text)
+        return text
+
+    def layoutOsis(osis):
+        r"""Delete attributes from end tags and lay out the whitespace between tags in a single sweep, returning the processed text as a string,
+        or None if the text holds a < outside a tag, so that the cleanup patterns must be run instead.
+        The patterns each only change the whitespace next to particular tags, so the whitespace between each pair of tags or words is laid
+        out from the two on either side of it and the gap before, as the sequence of patterns would leave it.
+
+        Keyword arguments:
+        osis -- The document as a string.
+
+        """
+        layouts = dict()
+        parts = list()
+        before = plainLayout
+        chain = (False, None, False)
+        endRun = False
+        last = 0
+        count = 0
+        for m in rx['layout.tag'].finditer(osis):
+            count += 1
+            after = layouts.get(m.group())
+            if after is None:
+                after = layouts[m.group()] = tagLayout(m.group())
+            text = osis[last:m.start()]
+            words = text.strip()
+            if words:
+                space, chain, endRun = layoutGap(text[:len(text)-len(text.lstrip())], before, plainLayout, chain, endRun)
+                parts.append(space)
+                parts.append(collapseSpaces(words))
+                text = text[len(text.rstrip()):]
+                before = plainLayout
+            space, chain, endRun = layoutGap(text, before, after, chain, endRun)
+            parts.append(space)
+            parts.append(collapseSpaces(after[0]))
+            before = after
+            last = m.end()
+        if count != osis.count('<'):
+            return None
+
+        text = osis[last:]
+        words = text.strip()
+        if words:
+            space, chain, endRun = layoutGap(text[:len(text)-len(text.lstrip())], before, plainLayout, chain, endRun)
+            parts.append(space)
+            parts.append(collapseSpaces(words))
+            text = text[len(text.rstrip()):]
+            before = plainLayout
+        parts.append(layoutGap(text, before, plainLayout, chain, endRun)[0])
+        return ''.join(parts)
+
+    def osisReorderAndCleanup(osis, bibleBook=None):
+        r"""Perform postprocessing on an OSIS document, returning the processed text as a string.
+        Reorders elements, strips non-characters, and cleans up excess spaces & newlines
+
+        Keyword arguments:
+        osis -- The document as a string.
+        bibleBook -- Boolean value indicating whether the document is a Bible book, rather than a peripheral; None finds this in the document.
+
+        """
+
+        # assorted re-orderings
+
+        # delete Unicode non-characters (except section divs for now)
+        osis = rx['cleanup.nonCharacters'].sub('', osis)
+            
+        # adjust tag order for Bible books
+        if bibleBook is None:
+            bibleBook = rx['cleanup.bibleBook'].search(osis) is not None
+        if bibleBook:
+            # </div-book></div-section> --> </div-section></div-book>
+            osis = rx['cleanup.bookEnd'].sub(r'\2\1', osis)
+            
             # <start-tags-belonging-to-next-verse></verse><verse> --> </verse><verse><start-tags-belonging-to-next-verse>
-            slideTags = '(('+sectionDivChar+r'<div\s[^>]*><title[^>]*>.*?</title>(\s*</div>'+sectionDivChar+r')?|<title(?! (canonical="true"|type="runningHead"))[^>]*>.*?</title>|<([pl]|lg|list|item)(\s[^>]*)?>|\s)+)';
-            osis = re.sub(slideTags+r'(?P<vc><verse eID=[^>]*>)', r'\g<vc>\1', osis)
-            osis = re.sub(slideTags+r'(?P<vc><chapter eID=[^>]*/>)', r'\g<vc>\1', osis)
-            osis = re.sub(slideTags+r'(?P<vc><chapter [^>]*sID=[^>]*/>)', r'\g<vc>\1', osis)
-            slideTags = r'((<([pl]|lg|list|item)(\s[^>]*)?>|\s)+)' # last slide doesn't include titles
-            osis = re.sub(slideTags+r'(?P<vc><verse osisID=[^>]*>)', r'\g<vc>\1', osis)
+            if engine == 'regex':
+                osis = rx['cleanup.slideVerseEnd'].sub(r'\g<vc>\1', osis)
+                osis = rx['cleanup.slideChapterEnd'].sub(r'\g<vc>\1', osis)
+                osis = rx['cleanup.slideChapterStart'].sub(r'\g<vc>\1', osis)
+                osis = rx['cleanup.slideVerseStart'].sub(r'\g<vc>\1', osis)
+            else:
+                osis = slideStartTags(osis, rx['cleanup.slideVerseEnd'], rx['slides.verseEnd'], True)
+                osis = slideStartTags(osis, rx['cleanup.slideChapterEnd'], rx['slides.chapterEnd'], True)
+                osis = slideStartTags(osis, rx['cleanup.slideChapterStart'], rx['slides.chapterStart'], True)
+                osis = slideStartTags(osis, rx['cleanup.slideVerseStart'], rx['slides.verseStart'], False)
             
             # </verse><verse></end-tags-belonging-to-previous-verse> --> </end-tags-belonging-to-previous-verse></verse><verse>
-            slideTags = r'((</div>'+sectionDivChar+r'|</([pl]|lg|list|item)(\s[^>]*)?>|\s)+)'
-            osis = re.sub(r'(<verse osisID=[^>]*>)'+slideTags, r'\2\1', osis)
-            osis = re.sub(r'(<chapter [^>]*sID=[^>]*/>)'+slideTags, r'\2\1', osis)
-            osis = re.sub(r'(<chapter eID=[^>]*/>)'+slideTags, r'\2\1', osis)
-            slideTags = r'((</([pl]|lg|list|item)(\s[^>]*)?>|\s)+)' # last slide doesn't include titles
-            osis = re.sub(r'(<verse eID=[^>]*>)'+slideTags, r'\2\1', osis)
+            osis = rx['cleanup.slideBackVerseStart'].sub(r'\2\1', osis)
+            osis = rx['cleanup.slideBackChapterStart'].sub(r'\2\1', osis)
+            osis = rx['cleanup.slideBackChapterEnd'].sub(r'\2\1', osis)
+            osis = rx['cleanup.slideBackVerseEnd'].sub(r'\2\1', osis)
         
         # delete rest of Unicode non-characters
-        for c in '\uFDD5\uFDD6\uFDD7\uFDD8\uFDD9\uFDDA\uFDDB\uFDDC\uFDDD\uFDDE':
-            osis = osis.replace(c, '')
+        osis = rx['cleanup.sectionDivs'].sub('', osis)
 
         # Because SWORD's osis2mod complains about and effectively removes majorSection divs 
         # that begin within a verse, adjust for this special case...
-        osis = re.sub(r'(<verse osisID=[^>]*>)([\s\n]*<div type="majorSection"[^>]*>)', r'\2\1', osis)
+        osis = rx['cleanup.majorSection'].sub(r'\2\1', osis)
             
         # </l>NOTE --> NOTE</l>
-        osis = re.sub(r'(</l>)(<note .+?</note>)', r'\2\1', osis)
+        osis = rx['cleanup.lineNote'].sub(r'\2\1', osis)
 
         # delete attributes from end tags (since they are invalid)
-        osis = re.sub(r'(</[^\s>]+) [^>]*>', r'\1>', osis)
+        if compact:
+            # the whitespace is left as converted, for output that is not read as it is laid out
+            osis = rx['cleanup.endTagAttributes'].sub(r'\1>', osis)
+            return osis.replace('<lb type="x-p"/>', '<lb/>')
+        if engine != 'regex':
+            layout = layoutOsis(osis)
+            if layout is not None:
+                return layout
+        osis = rx['cleanup.endTagAttributes'].sub(r'\1>', osis)
         osis = osis.replace('<lb type="x-p"/>', '<lb/>')
 
-        for endBlock in ['p', 'div', 'note', 'l', 'lg', 'chapter', 'verse', 'head', 'title', 'item', 'list']:
-            osis = re.sub(r'\s+</'+endBlock+'>', '</'+endBlock+'>\n', osis)
-            osis = re.sub(r'\s+<'+endBlock+r'( eID=[^/>]+/>)', '<'+endBlock+'\\1\n', osis)
-        osis = re.sub(r' +((</[^>]+>)+) *', r'\1 ', osis)
+        for endBlock in endBlocks:
+            osis = rx['cleanup.endBlock.'+endBlock].sub('</'+endBlock+'>\n', osis)
+            osis = rx['cleanup.endBlockMilestone.'+endBlock].sub('<'+endBlock+'\\1\n', osis)
+        osis = rx['cleanup.endTagSpaces'].sub(r'\1 ', osis)
         
         # normalize p, lg, l and other containers for prettier OSIS
-        osis = re.sub(r'\s*(</?(title|list|lg)>)\s*', r'\1', osis)
-        osis = re.sub(r'\s*(</(p|l|item)(?=[\s>])[^>]*>)\s*', '\\1', osis)
-        osis = re.sub(r'\s*(<(p|l|item)(?=[\s>])[^>]*>)\s*', '\n\\1', osis)
-        osis = re.sub(r'\s*(<verse osisID=[^>]*>)\s*', '\n\\1', osis)
-        osis = re.sub(r'\s*(<verse eID=[^>]*>)\s*', '\\1\n', osis)
-        osis = re.sub(r'\s*(<chapter[^>]*>)\s*', '\n\\1\n', osis)
+        osis = rx['cleanup.inlineContainers'].sub(r'\1', osis)
+        osis = rx['cleanup.blockEnd'].sub('\\1', osis)
+        osis = rx['cleanup.blockStart'].sub('\n\\1', osis)
+        osis = rx['cleanup.verseStart'].sub('\n\\1', osis)
+        osis = rx['cleanup.verseEnd'].sub('\\1\n', osis)
+        osis = rx['cleanup.chapter'].sub('\n\\1\n', osis)
 
         # strip extra spaces & newlines
-        osis = re.sub('  +', ' ', osis)
-        osis = re.sub(' ?\n\n+', '\n', osis)
+        osis = rx['cleanup.spaces'].sub(' ', osis)
+        osis = rx['cleanup.newlines'].sub('\n', osis)
+        return osis
+
+    def convertChapterText(osis):
+        r"""Run the conversions that act within chapters on a document whose chapters & verses are already converted, returning the processed
+        text as a string. None of their patterns reach past a chapter, so that a book may also be converted in chapter ranges by shardOsis.
+
+        Keyword arguments:
+        osis -- The document as a string.
+
+        """
+        osis = runStage(cvtParagraphs, osis, relaxedConformance)
+        osis = runStage(cvtPoetry, osis, relaxedConformance)
+        osis = runStage(cvtTables, osis, relaxedConformance)
+        osis = runStage(cvtFootnotes, osis, relaxedConformance)
+        osis = runStage(cvtCrossReferences, osis, relaxedConformance)
+        # the token engine pairs all the character styles in one scan, except in books holding \sls
+        if engine == 'regex' or '\\sls' in osis:
+            osis = runStage(cvtSpecialText, osis, relaxedConformance)
+            osis = runStage(cvtCharacterStyling, osis, relaxedConformance)
+        else:
+            osis = runStage(cvtCharacterStyles, osis, relaxedConformance)
+        osis = runStage(cvtSpacingAndBreaks, osis, relaxedConformance)
+        osis = runStage(cvtSpecialFeatures, osis, relaxedConformance)
+        osis = runStage(cvtStudyBibleContent, osis, relaxedConformance)
+        osis = runStage(cvtPrivateUseExtensions, osis, relaxedConformance)
+        return osis
+
+    def shardOsis(osis, index, count):
+        r"""Convert one of count chapter ranges of a document whose chapters & verses are already converted, returning its finished OSIS as
+        a string, which joined to those of the other ranges in order gives the OSIS of the whole book; or None if the book cannot be split.
+
+        The chapters are split into ranges of about equal size. Each range is converted together with the chapters after it up to a cut, at
+        which the final clean-up of the neighbouring ranges meets: a point between two letters, outside any tag, on a line holding no note
+        or title, which no clean-up pattern can match across. A book is not split if any USFM tag is left unconverted in a range, since its
+        partner may lie in another range, nor if its IDs or styles must be resolved over the whole book.
+
+        Keyword arguments:
+        osis -- The document as a string.
+        index -- The index of the chapter range to convert, from 0.
+        count -- The number of chapter ranges.
+
+        """
+        if '$BOOK$' in osis or '\\sls' in osis:
+            return None
+        bibleBook = rx['cleanup.bibleBook'].search(osis) is not None
+
+        # chapters begin at their ﷑, and the text before the first chapter goes with it
+        starts = [m.start() for m in rx['shards.chapter'].finditer(osis)]
+        if not starts or starts[0] != 0:
+            starts.insert(0, 0)
+        starts.append(len(osis))
+        chapters = len(starts) - 1
+        first = min(bisect.bisect_left(starts, len(osis)*index//count), chapters) if index else 0
+        last = min(bisect.bisect_left(starts, len(osis)*(index+1)//count), chapters) if index+1 < count else chapters
+        if first >= last:
+            return ''
+
+        # convert the range with as many chapters after it as it takes to reach the cut ending it
+        end = min(last + 1, chapters)
+        while True:
+            text = convertChapterText(osis[starts[first]:starts[end]])
+            if '\\' in text:
+                return None
+            bounds = [m.start() for m in rx['shards.chapter'].finditer(text)]
+            if bounds[:1] != [0]:
+                bounds.insert(0, 0)
+            if len(bounds) != end - first:
+                return None
+            if last == chapters:
+                cutEnd = len(text)
+                break
+            cutEnd = rx['shards.cut'].search(text, bounds[last - first])
+            if cutEnd:
+                cutEnd = cutEnd.end()
+                break
+            if end == chapters:
+                cutEnd = len(text)
+                break
+            end += 1
+
+        if index:
+            cutStart = rx['shards.cut'].search(text)
+            cutStart = cutStart.end() if cutStart else len(text)
+        else:
+            cutStart = 0
+        if cutStart >= cutEnd:
+            return ''
+
+        osis = runStage(osisReorderAndCleanup, text[cutStart:cutEnd], bibleBook)
+        # change type on special books
+        for sb in specialBooks:
+            osis = osis.replace('<div type="book" osisID="' + sb + '">', '<div type="' + sb.lower() + '">')
         return osis
 
     ### Processing starts here
-    if encoding:
-        osis = codecs.open(sFile, 'r', encoding).read().strip() + '\n'
-    else:
-        encoding = 'utf-8'
-        osis = codecs.open(sFile, 'r', encoding).read().strip() + '\n'
-        # \ide_<ENCODING>
-        encoding = re.search(r'\\ide\s+(.+)'+'\n', osis)
-        if encoding:
-            encoding = encoding.group(1).lower().strip()
-            if encoding != 'utf-8':
-                if encoding in aliases:
-                    osis = codecs.open(sFile, 'r', encoding).read().strip() + '\n'
-                else:
-                    print(('WARNING: Encoding "' + encoding + '" unknown, processing ' + sFile + ' as UTF-8'))
-                    encoding = 'utf-8'
+    if cleanupOnly:
+        return runStage(osisReorderAndCleanup, usfm)
+    if usfm is None:
+        usfm = runStage(converter.readUsfm, sFile)
+    osis = usfm.strip() + '\n'
 
     if sys.version_info[0] < 3:
         osis = osis.lstrip(chr(0xFEFF))
@@ -1403,34 +3179,46 @@ def convertToOsis(sFile):
         osis = osis.lstrip(chr(0xFEFF))
 
     # call individual conversion processors in series
-    osis = cvtPreprocess(osis, relaxedConformance)
-    osis = cvtRelaxedConformanceRemaps(osis, relaxedConformance)
-    osis = cvtIdentification(osis, relaxedConformance)
-    osis = cvtPeripherals(osis, relaxedConformance)
-    osis = cvtIntroductions(osis, relaxedConformance)
-    osis = cvtTitles(osis, relaxedConformance)
-    osis = cvtChaptersAndVerses(osis, relaxedConformance)
-    osis = cvtParagraphs(osis, relaxedConformance)
-    osis = cvtPoetry(osis, relaxedConformance)
-    osis = cvtTables(osis, relaxedConformance)
-    osis = cvtFootnotes(osis, relaxedConformance)
-    osis = cvtCrossReferences(osis, relaxedConformance)
-    osis = cvtSpecialText(osis, relaxedConformance)
-    osis = cvtCharacterStyling(osis, relaxedConformance)
-    osis = cvtSpacingAndBreaks(osis, relaxedConformance)
-    osis = cvtSpecialFeatures(osis, relaxedConformance)
-    osis = cvtStudyBibleContent(osis, relaxedConformance)
-    osis = cvtPrivateUseExtensions(osis, relaxedConformance)
-
-    osis = processOsisIDs(osis)
-    osis = osisReorderAndCleanup(osis)
+    osis = runStage(cvtPreprocess, osis, relaxedConformance)
+    if engine == 'regex':
+        osis = runStage(cvtRelaxedConformanceRemaps, osis, relaxedConformance)
+        osis = runStage(cvtIdentification, osis, relaxedConformance)
+        osis = runStage(cvtPeripherals, osis, relaxedConformance)
+    else:
+        # a pass removing the marker after a doubled backslash could join that backslash to the text after it, making a marker not listed
+        if '\\\\' not in osis and '\\+\\' not in osis:
+            inventory = set(rx['inventory.marker'].findall(osis))
+            inventory.discard('')
+            # markers that a pass matches by their start, as \pb\s* matches \pbx, are also listed under that start
+            for prefix in ('fig', 'pb', 'z'):
+                if [marker for marker in inventory if marker.startswith(prefix)]:
+                    inventory.add(prefix)
+            verbosePrint('Markers in ' + sFile + ': ' + ' '.join(sorted(inventory)))
+        tokens = runStage(tokenizeUsfm, osis, relaxedConformance)
+        tokens = runStage(cvtRelaxedConformanceRemapsTokens, tokens, relaxedConformance)
+        tokens = runStage(cvtIdentificationTokens, tokens, relaxedConformance)
+        tokens = runStage(cvtPeripheralsTokens, tokens, relaxedConformance)
+        osis = runStage(joinTokens, tokens)
+    osis = runStage(cvtIntroductions, osis, relaxedConformance)
+    osis = runStage(cvtTitles, osis, relaxedConformance)
+    osis = runStage(cvtChaptersAndVerses, osis, relaxedConformance)
+    if shard:
+        return shardOsis(osis, shard[0], shard[1])
+    osis = convertChapterText(osis)
+
+    # the token engine fills in the IDs as it builds the milestones, leaving only those it cannot resolve
+    if engine == 'regex' or '$BOOK$' in osis:
+        osis = runStage(processOsisIDs, osis)
+    osis = runStage(osisReorderAndCleanup, osis)
+    if inventory is not None:
+        verbosePrint('Ran ' + str(passCounts[1]) + ' of ' + str(passCounts[0]) + ' marker-dependent conversion passes on ' + sFile)
 
     # change type on special books
     for sb in specialBooks:
         osis = osis.replace('<div type="book" osisID="' + sb + '">', '<div type="' + sb.lower() + '">')
 
     if DEBUG:
-        localUnhandledTags = set(re.findall(r'(\\[^\s]*)', osis))
+        localUnhandledTags = set(rx['debug.unhandledTags'].findall(osis))
         enc = 'utf-8'
         if encoding: enc = encoding
         if localUnhandledTags:
@@ -1438,46 +3226,492 @@ def convertToOsis(sFile):
 
     return osis
 
-def readIdentifiersFromOsis(filename):
-    r"""Reads the USFM file and stores information about which Bible book it represents and localized abbrevations in global variables.
+class Converter(object):
+    r"""Converts USFM to OSIS with a set of options, so that a program can convert books in-process and keep one Converter for many books.
+    The options are held by the Converter rather than in globals, so Converters with different options can be used side by side;
+    the regexes of each conformance mode are compiled once, by the first Converter of that mode, and shared by every Converter.
+    The conversion stages are still closures within convertToOsis, which reads the options from the Converter it is given. The worker
+    processes of the command line still hold the Converter, schema, cache directory & profiling switch they run with in module globals, set by initWorker.
 
     Keyword arguments:
-    filename -- a USFM filename
+    encoding -- The input encoding override, or '' to read each file's \ide value or assume UTF-8 encoding in its absence
+    relaxedConformance -- Boolean value indicating whether to process non-standard & deprecated USFM tags
+    engine -- The conversion engine: 'token' tokenizes the identification & peripheral stages and sweeps some passes in one scan, 'regex' runs only the original regex cascade
+    compact -- Boolean value indicating whether to leave the whitespace of the OSIS as converted, rather than laying it out with line breaks
+    verbose -- Boolean value indicating whether to print progress
+    debug -- Boolean value indicating whether to print the tags of each book left unconverted
 
     """
+    def __init__(self, encoding='', relaxedConformance=False, engine='token', compact=False, verbose=False, debug=False):
+        self.encoding = encoding
+        self.relaxedConformance = relaxedConformance
+        self.engine = engine
+        self.compact = compact
+        self.verbose = verbose
+        self.debug = debug
+        self.bookDict = dict(list(bookDict.items()) + list(addBookDict.items())) if relaxedConformance else bookDict
+        # compile the patterns of this mode alone, before any worker is started
+        regexes[relaxedConformance]
+
+    def verbosePrint(self, text):
+        r"""Wraper for print() that only prints if verbose is True."""
+        if self.verbose:
+            print(text)
+
+    def convertText(self, usfm, name='<text>'):
+        r"""Convert USFM text, returning its OSIS as a string: the OSIS of its books, without the document's header & footer.
 
-    global encoding
-    global loc2osisBk, osis2locBk, filename2osis
+        Keyword arguments:
+        usfm -- The USFM text as a string
+        name -- A name for the text in messages
 
-    ### Processing starts here
-    if encoding:
-        osis = codecs.open(filename, 'r', encoding).read().strip() + '\n'
-    else:
-        encoding = 'utf-8'
-        osis = codecs.open(filename, 'r', encoding).read().strip() + '\n'
+        """
+        return convertToOsis(name, None, self, usfm)
+
+    def cleanupText(self, osis, name='<text>'):
+        r"""Give converted OSIS text only the final clean-up of a conversion, which slides tags past the verse & chapter milestones and lays
+        out the whitespace, returning it as a string. The clean-up is the same as that of a book, so that the engines can be checked against
+        one another on any text.
+
+        Keyword arguments:
+        osis -- The OSIS text as a string
+        name -- A name for the text in messages
+
+        """
+        return convertToOsis(name, None, self, osis, True)
+
+    def convertFile(self, sFile, shard=None):
+        r"""Convert a USFM file, returning its OSIS as a string, as convertText does.
+        With shard, return only the OSIS of one chapter range of the book, or None if the book cannot be split (see convertToOsis).
+
+        Keyword arguments:
+        sFile -- Path to the USFM file
+        shard -- A tuple of the index of the chapter range to convert, from 0, and the number of ranges
+
+        """
+        return convertToOsis(sFile, shard, self)
+
+    def convertMany(self, sFiles, processes=1):
+        r"""Convert USFM files, yielding a tuple of the path & OSIS of each, in the order given.
+        With more than one process, the files are converted in that many worker processes at once, each given a copy of the Converter.
+
+        Keyword arguments:
+        sFiles -- The paths of the USFM files
+        processes -- The number of files to convert at once
+
+        """
+        sFiles = list(sFiles)
+        if processes > 1 and len(sFiles) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(min(processes, len(sFiles)))
+            try:
+                for sFile, osis in zip(sFiles, pool.map(self.convertFile, sFiles)):
+                    yield sFile, osis
+            finally:
+                pool.shutdown()
+        else:
+            for sFile in sFiles:
+                yield sFile, self.convertFile(sFile)
+
+    async def convertManyAsync(self, sFiles, processes=1, ordered=True, executor=None):
+        r"""Convert USFM files in worker processes without blocking the event loop, asynchronously yielding a tuple of the path & OSIS of each,
+        in the order given, or else as each is converted. An error converting a file is raised when its turn comes, stopping the conversion.
+        Stopping the iteration, by closing it or cancelling the task iterating over it, cancels the files not yet begun; the files already
+        converting are left to finish in their workers.
+
+        Keyword arguments:
+        sFiles -- The paths of the USFM files
+        processes -- The number of files to convert at once, taken as 1 if less
+        ordered -- Boolean value indicating whether to yield the files in the order given, rather than in the order they are converted
+        executor -- A concurrent.futures executor to share with other conversions, rather than starting a pool of processes for these files
+
+        """
+        import asyncio
+        from concurrent.futures import ProcessPoolExecutor
+        sFiles = list(sFiles)
+        # as in convertMany, fewer than one process converts one file at a time, rather than none
+        processes = max(1, processes)
+        loop = asyncio.get_running_loop()
+        pool = executor or ProcessPoolExecutor(max(1, min(processes, len(sFiles))))
+        pending = dict()
+        converted = dict()
+        nextFile = 0
+        nextYield = 0
+        try:
+            while nextYield < len(sFiles):
+                while nextFile < len(sFiles) and len(pending) < processes:
+                    pending[loop.run_in_executor(pool, self.convertFile, sFiles[nextFile])] = nextFile
+                    nextFile += 1
+                done = (await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED))[0]
+                for index, future in sorted([(pending.pop(future), future) for future in done]):
+                    converted[index] = future.result()
+                    if not ordered:
+                        nextYield += 1
+                        yield sFiles[index], converted.pop(index)
+                while ordered and nextYield in converted:
+                    yield sFiles[nextYield], converted.pop(nextYield)
+                    nextYield += 1
+        finally:
+            for future in pending:
+                future.cancel()
+            if not executor:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def usfmEncoding(self, data, sFile=None):
+        r"""Return the encoding of a USFM file, found from its raw bytes: the encoding override if given, else that of its byte order mark,
+        else that named by an \ide tag within its first ideScanSize bytes, else UTF-8.
+
+        Keyword arguments:
+        data -- The bytes of the file or of its start, or a memory map of the file
+        sFile -- Path to the USFM file, given to warn of an \ide tag naming an unknown encoding
+
+        """
+        if self.encoding:
+            return self.encoding
+        for mark, markEncoding in byteOrderMarks:
+            if data[:len(mark)] == mark:
+                return markEncoding
         # \ide_<ENCODING>
-        encoding = re.search(r'\\ide\s+(.+)'+'\n', osis)
-        if encoding:
-            encoding = encoding.group(1).lower().strip()
-            if encoding != 'utf-8':
-                if encoding in aliases:
-                    osis = codecs.open(filename, 'r', encoding).read().strip() + '\n'
-                else:
-                    #print(('WARNING: Encoding "' + encoding + '" unknown, processing ' + filename + ' as UTF-8'))
-                    encoding = 'utf-8'
-
-    # keep a copy of the OSIS book abbreviation for below (\toc3 processing) to store for mapping localized book names to/from OSIS
-    osisBook = re.search(r'\\id\s+([A-Z0-9]+)', osis)
-    if osisBook:
-        osisBook = bookDict[osisBook.group(1)]
-        filename2osis[filename] = osisBook
-
-    locBook = re.search(r'\\toc3\b\s+(.+)\s*'+'\n', osis)
-    if locBook:
-        locBook = locBook.group(1)
+        ide = regexes[self.relaxedConformance]['encoding.ide'].search(data, 0, ideScanSize)
+        if ide:
+            ide = ide.group(1).decode('utf-8', 'replace').lower().strip()
+            if ide == 'utf-8' or ide in aliases:
+                return ide
+            if sFile:
+                print(('WARNING: Encoding "' + ide + '" unknown, processing ' + sFile + ' as UTF-8'))
+        return 'utf-8'
+
+    def readUsfm(self, sFile):
+        r"""Read a USFM file & decode it once, in the encoding found by usfmEncoding, returning its text as a string.
+        Files of mmapSize bytes or more are decoded from a memory map of the file rather than from a copy of its bytes.
+
+        Keyword arguments:
+        sFile -- Path to the USFM file
+
+        """
+        with open(sFile, 'rb') as usfmFile:
+            if os.fstat(usfmFile.fileno()).st_size < mmapSize:
+                data = usfmFile.read()
+                return data.decode(self.usfmEncoding(data, sFile))
+            import mmap
+            data = mmap.mmap(usfmFile.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                return str(data, self.usfmEncoding(data, sFile))
+            finally:
+                data.close()
+
+    def readUsfmHeader(self, filename):
+        r"""Read the start of a USFM file, up to its first chapter or headerScanSize bytes, returning the text as a string.
+
+        Keyword arguments:
+        filename -- a USFM filename
+
+        """
+        rx = regexes[self.relaxedConformance]
+
+        with open(filename, 'rb') as usfmFile:
+            data = usfmFile.read(headerScanSize)
+        # the incremental decoder leaves out a character cut off at the end of the bytes read
+        header = codecs.getincrementaldecoder(self.usfmEncoding(data))().decode(data)
+        chapter = rx['identifiers.chapter'].search(header)
+        if chapter:
+            return header[:chapter.start()]
+        return header
+
+    def readIdentifiers(self, filename):
+        r"""Reads the header of the USFM file, returning which Bible book it represents and its localized abbrevation, each None if not found.
+        Only the text before the first \c is read, since the identifiers precede it.
+
+        Keyword arguments:
+        filename -- a USFM filename
+
+        """
+        rx = regexes[self.relaxedConformance]
+
+        ### Processing starts here
+        osis = self.readUsfmHeader(filename).strip() + '\n'
+
+        # keep a copy of the OSIS book abbreviation for below (\toc3 processing) to store for mapping localized book names to/from OSIS
+        osisBook = rx['identifiers.id'].search(osis)
         if osisBook:
-            osis2locBk[osisBook]=locBook
-            loc2osisBk[locBook]=osisBook
+            osisBook = self.bookDict[osisBook.group(1)]
+
+        locBook = rx['identifiers.toc3'].search(osis)
+        if locBook:
+            locBook = locBook.group(1)
+
+        return osisBook, locBook
+
+def scriptDigest():
+    r"""Return a hash of the script version & source, so that cached books are not reused once the converter changes."""
+    import hashlib
+    digest = hashlib.sha1(scriptVersion.encode('utf-8'))
+    try:
+        digest.update(open(__file__, 'rb').read())
+    except (IOError, OSError, NameError):
+        pass
+    return digest.hexdigest()
+
+def bookCacheKey(filename, language, converter, script):
+    r"""Return the key under which the OSIS conversion of a USFM file is cached: a hash of the file's bytes, the options that
+    change its conversion, and the script.
+
+    Keyword arguments:
+    filename -- Path to the USFM file
+    language -- The input language code
+    converter -- The Converter converting the file
+    script -- The hash of the script returned by scriptDigest, computed once for all the books of a run
+
+    """
+    import hashlib
+    digest = hashlib.sha1(script.encode('utf-8'))
+    options = '\n'.join((converter.engine, str(converter.relaxedConformance), str(converter.compact), converter.encoding or '', language)) + '\n'
+    digest.update(options.encode('utf-8'))
+    digest.update(open(filename, 'rb').read())
+    return digest.hexdigest()
+
+def bookCachePath(cacheDir, key):
+    r"""Return the path at which the OSIS conversion of a book is cached.
+
+    Keyword arguments:
+    cacheDir -- The cache directory
+    key -- The key returned by bookCacheKey
+
+    """
+    return os.path.join(cacheDir, key + '.osis.xml')
+
+def loadCachedBook(cacheDir, key):
+    r"""Return the cached OSIS conversion of a book as a string, or None if it is not cached.
+    Reading a book marks it as recently used, for pruneBookCache.
+
+    Keyword arguments:
+    cacheDir -- The cache directory
+    key -- The key returned by bookCacheKey
+
+    """
+    path = bookCachePath(cacheDir, key)
+    try:
+        osis = codecs.open(path, 'r', 'utf-8').read()
+        os.utime(path, None)
+    except (IOError, OSError):
+        return None
+    return osis
+
+def storeOsisFile(path, osis):
+    r"""Write the OSIS conversion of a book to a file, such as a book in the cache, writing it under a temporary name first and then
+    replacing the file in one step, so that an interrupted run leaves no partial book and a reader never finds the file missing.
+
+    Keyword arguments:
+    path -- The path of the file, as returned by bookCachePath for a cached book
+    osis -- The OSIS conversion of the book as a string
+
+    """
+    temp = path + '.' + str(os.getpid())
+    osisFile = codecs.open(temp, 'w', 'utf-8')
+    osisFile.write(osis)
+    osisFile.close()
+    os.replace(temp, path)
+
+def cacheOsisFile(path, osis):
+    r"""Write the OSIS conversion of a book to the cache with storeOsisFile, returning whether it was written.
+    A book that cannot be cached is only warned of, since the cache only saves converting it again.
+
+    Keyword arguments:
+    path -- The path of the book in the cache, as returned by bookCachePath
+    osis -- The OSIS conversion of the book as a string
+
+    """
+    try:
+        storeOsisFile(path, osis)
+    except (IOError, OSError) as e:
+        print('WARNING: Could not cache ' + path + ': ' + str(e))
+        return False
+    return True
+
+def pruneBookCache(cacheDir, maxSize):
+    r"""Remove the least recently used books from the cache until it holds no more than maxSize bytes, returning the number of books
+    kept, their total size, and the number of books removed.
+
+    Keyword arguments:
+    cacheDir -- The cache directory
+    maxSize -- The largest total size of the cached books, in bytes
+
+    """
+    books = list()
+    for name in os.listdir(cacheDir):
+        if name.endswith('.osis.xml'):
+            path = os.path.join(cacheDir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            books.append((stat.st_mtime, stat.st_size, path))
+    books.sort(reverse=True)
+
+    size = 0
+    kept = 0
+    removed = 0
+    for mtime, bookSize, path in books:
+        if size + bookSize <= maxSize:
+            size += bookSize
+            kept += 1
+        else:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                size += bookSize
+                kept += 1
+    return kept, size, removed
+
+def findOsisSchema(schemaPath=None):
+    r"""Return the path of a local copy of the OSIS schema, or None if there is none and it cannot be fetched.
+    The copy is schemaPath if given, else a copy of osisSchema bundled beside the script, else one kept in the user's cache directory,
+    which is downloaded once if it is missing, together with the schemas it imports by URL (xml.xsd), so that later runs validate offline.
+
+    Keyword arguments:
+    schemaPath -- Path to a local copy of the OSIS schema, given with --schema
+
+    """
+    if schemaPath:
+        return schemaPath
+    name = osisSchema.rsplit('/', 1)[-1]
+    bundled = os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    if os.path.exists(bundled):
+        return bundled
+    cached = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'usfm2osis', name)
+
+    def fetch(url, path):
+        r"""Download a schema to a path, if it is not there already."""
+        if os.path.exists(path):
+            return
+        import urllib.request
+        schema = urllib.request.urlopen(url, timeout=30).read()
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        temp = path + '.' + str(os.getpid())
+        with open(temp, 'wb') as schemaFile:
+            schemaFile.write(schema)
+        os.replace(temp, path)
+
+    try:
+        fetch(osisSchema, cached)
+        # the imported schemas are kept beside the OSIS schema, where loadOsisSchema reads them in place of their URLs
+        schema = codecs.open(cached, 'r', 'utf-8').read()
+        for url in regexes.either()['validation.schemaImport'].findall(schema):
+            fetch(url, os.path.join(os.path.dirname(cached), url.rsplit('/', 1)[-1]))
+    except (IOError, OSError):
+        return None
+    return cached
+
+def loadOsisSchema(path):
+    r"""Return the OSIS schema at a path, compiled with lxml, compiling each schema only once per process.
+
+    Keyword arguments:
+    path -- Path to a local copy of the OSIS schema, as returned by findOsisSchema
+
+    """
+    if path not in osisSchemas:
+        from lxml import etree
+        schema = etree.parse(path)
+        # a schema imported by URL, such as xml.xsd, is read from a copy beside the OSIS schema if there is one, so that no network is needed
+        for element in schema.iter('{http://www.w3.org/2001/XMLSchema}import', '{http://www.w3.org/2001/XMLSchema}include'):
+            location = element.get('schemaLocation')
+            if location and location.startswith(('http://', 'https://')):
+                local = os.path.join(os.path.dirname(os.path.abspath(path)), location.rsplit('/', 1)[-1])
+                if os.path.exists(local):
+                    element.set('schemaLocation', local)
+        osisSchemas[path] = etree.XMLSchema(schema)
+    return osisSchemas[path]
+
+def osisValidationErrors(document, name, firstLine):
+    r"""Check that an OSIS document is well-formed and valid against the schema at validationSchema, returning a list of its errors,
+    each naming the document and a line number.
+
+    Keyword arguments:
+    document -- The OSIS document as a string
+    name -- The name of the document to report its errors under
+    firstLine -- The line of the document numbered as line 1 in the errors
+
+    """
+    from lxml import etree
+    try:
+        doc = etree.fromstring(document.encode('utf-8'), etree.XMLParser(huge_tree=True))
+    except etree.XMLSyntaxError as eVal:
+        return [name + ' line ' + str(eVal.lineno - firstLine + 1) + ': ' + (eVal.msg or str(eVal))]
+    schema = loadOsisSchema(validationSchema)
+    if schema.validate(doc):
+        return []
+    return [name + ' line ' + str(error.line - firstLine + 1) + ': ' + error.message for error in schema.error_log]
+
+def validateOsisBook(osis, sFile):
+    r"""Validate the OSIS of one book, wrapped in a minimal OSIS document, returning a list of its errors, each naming the book and a line within it.
+
+    Keyword arguments:
+    osis -- The OSIS of the book as a string
+    sFile -- Path to the USFM file, to name the book by if it has no OSIS book ID
+
+    """
+    book = regexes.either()['validation.bookID'].search(osis)
+    return osisValidationErrors(osisBookEnvelope[0] + osis + osisBookEnvelope[1], book.group(1) if book else sFile, 2)
+
+def fileSignature(filename):
+    r"""Return a tuple of the modification time, size & inode of a file, which changes whenever the file is saved, or None if it cannot be read."""
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+def inotifyWaiter(directories):
+    r"""Return a function that waits until a file in any of the directories is written or moved into place, using Linux's inotify,
+    or None where inotify is not available.
+
+    Keyword arguments:
+    directories -- The paths of the directories to watch
+
+    """
+    try:
+        import ctypes, ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    # IN_CLOSE_WRITE | IN_MOVED_TO: a file written in place, or saved under another name & renamed over the old file
+    for directory in directories:
+        if libc.inotify_add_watch(fd, os.fsencode(directory), 0x8 | 0x80) < 0:
+            os.close(fd)
+            return None
+    return lambda: os.read(fd, 64 * 1024)
+
+def watchFiles(filenames):
+    r"""Wait for files to change, yielding the set of the files saved since the last time, for ever. The files' directories are watched
+    with inotify where it is available, else the files are checked every watchInterval seconds; either way, a file counts as changed only
+    once its signature (see fileSignature) has changed.
+
+    Keyword arguments:
+    filenames -- The paths of the files to watch
+
+    """
+    signatures = dict([(filename, fileSignature(filename)) for filename in filenames])
+    wait = inotifyWaiter(set([os.path.dirname(os.path.abspath(filename)) for filename in filenames]))
+    while True:
+        if wait:
+            wait()
+        else:
+            time.sleep(watchInterval)
+        time.sleep(watchSettle)
+        changed = set()
+        for filename in filenames:
+            signature = fileSignature(filename)
+            # a file missing while it is being replaced is checked again next time
+            if signature is not None and signature != signatures[filename]:
+                signatures[filename] = signature
+                changed.add(filename)
+        if changed:
+            yield changed
 
 def verbosePrint(text):
     r"""Wraper for print() that only prints if verbose is True."""
@@ -1490,17 +3724,55 @@ def printUsage():
     print(('                Revision: ' + rev + ' (' + date + ')'))
     print('')
     print('Usage: usfm2osis.py <osisWork> [OPTION] ...  <USFM filename|wildcard> ...')
+    print('       usfm2osis.py --serve ADDRESS [OPTION] ...')
     print('')
+    print('  -c DIRECTORY     cache each book\'s OSIS in DIRECTORY, converting only the books')
+    print('                     that have changed since they were cached')
+    print('  --cache-size MB  largest size of the cache, in megabytes (default is 256)')
+    print('  --compact        leave the OSIS unformatted, without the line breaks & spacing')
+    print('                     that lay it out for reading (for output going straight to')
+    print('                     osis2mod)')
     print('  -d               debug mode (single-threaded, verbose output)')
     print('  -e ENCODING      input encoding override (default is to read the USFM file\'s')
     print('                     \\ide value or assume UTF-8 encoding in its absence)')
     print('  -h, --help       print this usage information')
+    print('  -j JOBS          number of books to convert at once (default is one less than')
+    print('                     the number of CPUs; the debug mode converts one at a time)')
     print('  -l LANGUAGE      input language code - (default "und")')
     print('  -o FILENAME      output filename (default is: <osisWork>.osis.xml)')
+    print('  --profile FILE   write the time, regex substitutions & peak memory of each')
+    print('                     conversion stage of each book to FILE as JSON, and')
+    print('                     summarize the slowest stages, books & regex patterns')
+    print('  --queue N        most conversion requests a server holds at once, refusing any')
+    print('                     more with 503 Busy (default is 4 per job)')
     print('  -r               enable relaxed markup processing (for non-standard USFM)')
+    print('  --schema PATH    validate against the OSIS schema at PATH (default is a copy')
+    print('                     beside this script, else one cached in ~/.cache/usfm2osis,')
+    print('                     downloaded on first use with the xml.xsd it imports); to')
+    print('                     validate offline, keep xml.xsd beside the schema at PATH,')
+    print('                     and it is read in place of its URL')
+    print('  --shard-size KB  split books of at least KB kilobytes into chapter ranges that')
+    print('                     are converted in parallel (default is 512; 0 never splits)')
+    print('  --engine ENGINE  set conversion engine: token (default), regex; token converts')
+    print('                     the identification & peripheral markers from a token')
+    print('                     list, skips the passes for markers a book lacks, and')
+    print('                     pairs the character styles, slides tags & lays out the')
+    print('                     OSIS in single sweeps; the other stages are regex passes')
+    print('                     under either engine. The token engine leaves an \\is2-\\is5')
+    print('                     with no text at the end of a book without \\id as it is,')
+    print('                     where the regex engine makes a title holding its end tags')
     print('  -s mode          set book sorting mode: natural (default), alpha, canonical,')
     print('                     usfm, random, none')
+    print('  --serve ADDRESS  serve conversions over HTTP at ADDRESS, a port, host:port or')
+    print('                     Unix socket path, with a pool of -j worker processes: POST')
+    print('                     USFM to /convert?encoding=&relaxed=&engine=&compact=&name=')
+    print('                     for its OSIS; GET /health for the server\'s counts as JSON')
+    print('  --timing         report the time spent importing modules, starting up, and')
+    print('                     converting, separately')
     print('  -v               verbose feedback')
+    print('  --watch          after converting, watch the USFM files & reconvert each one')
+    print('                     saved, splicing its OSIS into the document in place of the')
+    print('                     old, until interrupted')
     print('  -x               disable XML validation')
     print('')
     print('As an example, if you want to generate the osisWork <Bible.KJV> and your USFM')
@@ -1510,41 +3782,341 @@ def printUsage():
     verbosePrint('Supported encodings: ' + ', '.join(aliases))
 
 
-class Worker(multiprocessing.Process):
-    r"""Worker object for multiprocessing."""
-    def __init__(self, work_queue, result_queue):
-        # base class initialization
-        multiprocessing.Process.__init__(self)
+def initWorker(settings):
+    r"""Set the conversion options in a worker process, which does not share the globals of the main process under every start method.
 
-        # job management stuff
-        self.work_queue = work_queue
-        self.result_queue = result_queue
-        self.kill_received = False
+    Keyword arguments:
+    settings -- A dict of the global variables to set
 
-    def run(self):
-        while not self.kill_received:
-            # get a task
-            try:
-                job = self.work_queue.get_nowait()
-            except Queue.Empty:
-                break
+    """
+    globals().update(settings)
+    if settings.get('profiling'):
+        startProfiling()
+
+def convertBook(job):
+    r"""Convert a USFM file in a worker process and write its OSIS to a file, so that only the file's path is passed back to the main process,
+    returning that path, or None if the path is in the cache & the book could not be cached, the time taken in seconds, the book's validation
+    errors (see validateOsisBook), or None if not validating, and its profile figures (see ConversionProfile), or None if not profiling.
 
-            # the actual processing
-            osis = convertToOsis(job)
-            # TODO: move XML validation here?
+    Keyword arguments:
+    job -- A tuple of the path to the USFM file and the path to write its OSIS to
 
-            # store the result
-            self.result_queue.put((job,osis))
+    """
+    filename, path = job
+    osis, duration, errors, figures = runBook(filename)
+    if not cacheDir:
+        storeOsisFile(path, osis)
+    elif not cacheOsisFile(path, osis):
+        path = None
+    return path, duration, errors, figures
+
+def runBook(filename):
+    r"""Convert a USFM file, in a worker process or in the main process, returning its OSIS as a string, the time taken in seconds,
+    the book's validation errors (see validateOsisBook), or None if not validating, and its profile figures (see ConversionProfile),
+    or None if not profiling.
+
+    Keyword arguments:
+    filename -- Path to the USFM file
+
+    """
+    global profile
+    start = time.time()
+    profile = ConversionProfile() if profiling else None
+    osis = converter.convertFile(filename)
+    errors = validateOsisBook(osis, filename) if validationSchema else None
+    return osis, time.time() - start, errors, profile and profile.figures()
+
+def validateBook(job):
+    r"""Validate the OSIS of a book already converted, such as a cached book or one joined from chapter ranges, in a worker process,
+    returning the path of the OSIS, the time taken in seconds, the book's validation errors (see validateOsisBook), and None for its profile.
+
+    Keyword arguments:
+    job -- A tuple of the path to the USFM file and the path of its OSIS
+
+    """
+    start = time.time()
+    filename, path = job
+    try:
+        osis = codecs.open(path, 'r', 'utf-8').read()
+    except (IOError, OSError):
+        # a cached book evicted since the cache was checked is converted & validated when its turn comes
+        return path, time.time() - start, [], None
+    return path, time.time() - start, validateOsisBook(osis, filename), None
+
+def convertShard(job):
+    r"""Convert one chapter range of a USFM file in a worker process and write its OSIS to a file, returning the path of the file, or None
+    in its place if the book cannot be split (see convertToOsis), the time taken in seconds, None for the validation errors, since
+    chapter ranges are validated only once joined into their book, and the profile figures of the range, or None if not profiling.
+
+    Keyword arguments:
+    job -- A tuple of the path to the USFM file, the index of the chapter range, the number of ranges, and the path to write its OSIS to
+
+    """
+    global profile
+    start = time.time()
+    profile = ConversionProfile() if profiling else None
+    filename, index, count, path = job
+    osis = converter.convertFile(filename, (index, count))
+    if osis is None:
+        return None, time.time() - start, None, profile and profile.figures()
+    storeOsisFile(path, osis)
+    return path, time.time() - start, None, profile and profile.figures()
+
+def warmWorker(index):
+    r"""Do nothing in a worker process, so that every worker of a pool is started before the first conversion, returning the worker's process ID."""
+    return os.getpid()
+
+def convertRequest(job):
+    r"""Convert the USFM of a conversion request in a worker process, returning the OSIS of its books as a string (see Converter.convertText).
+
+    Keyword arguments:
+    job -- A tuple of the raw bytes of the USFM, a name for it in messages, and a dict of the keyword arguments of its Converter
+
+    """
+    data, name, options = job
+    converter = Converter(**options)
+    return converter.convertText(data.decode(converter.usfmEncoding(data, name)), name)
+
+class ConversionService(object):
+    r"""Converts the USFM of requests in a pool of worker processes started once, for a long-running server, admitting at most queueSize
+    requests at once; requests beyond those are refused rather than left waiting, so that a busy server pushes back on its clients.
+
+    Keyword arguments:
+    converter -- The Converter whose options are used where a request gives none
+    processes -- The number of worker processes
+    queueSize -- The largest number of requests converting or waiting for a worker at once
+
+    """
+    def __init__(self, converter, processes, queueSize):
+        import threading
+        self.converter = converter
+        self.processes = processes
+        self.queueSize = queueSize
+        self.slots = threading.BoundedSemaphore(queueSize)
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.counts = {'active':0, 'converted':0, 'failed':0, 'refused':0, 'restarts':0, 'bytesIn':0, 'bytesOut':0, 'seconds':0.0}
+        self.pool = self.startPool()
+        self.warmPool(self.pool)
+
+    def startPool(self):
+        r"""Return a new pool of worker processes, whose workers start with its first task."""
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(self.processes)
+
+    def warmPool(self, pool):
+        r"""Wait for each worker of a pool to be ready, so that no request waits for the workers to start.
+
+        Keyword arguments:
+        pool -- The pool returned by startPool
+
+        """
+        list(pool.map(warmWorker, range(self.processes)))
+
+    def options(self, query):
+        r"""Return the Converter keyword arguments of a request, raising ValueError for an unknown option or value.
+
+        Keyword arguments:
+        query -- A dict of the request's options, each a list of values, as parsed by urllib.parse.parse_qs
+
+        """
+        options = {'encoding':self.converter.encoding, 'relaxedConformance':self.converter.relaxedConformance,
+                   'engine':self.converter.engine, 'compact':self.converter.compact}
+        flags = {'1':True, 'true':True, 'yes':True, '0':False, 'false':False, 'no':False}
+        for name, values in query.items():
+            value = values[-1]
+            if name == 'encoding':
+                if value:
+                    try:
+                        codecs.lookup(value)
+                    except LookupError:
+                        raise ValueError('unknown encoding: ' + value)
+                options['encoding'] = value
+            elif name in ('relaxed', 'compact'):
+                if value.lower() not in flags:
+                    raise ValueError('expected 0 or 1 for ' + name + ': ' + value)
+                options['relaxedConformance' if name == 'relaxed' else 'compact'] = flags[value.lower()]
+            elif name == 'engine':
+                if value not in ('token', 'regex'):
+                    raise ValueError('unknown engine: ' + value)
+                options['engine'] = value
+            elif name != 'name':
+                raise ValueError('unknown option: ' + name)
+        return options
+
+    def convert(self, data, name, options):
+        r"""Convert the USFM of a request in a worker process, returning its OSIS as a string, or None if the queue is full.
+        A pool broken by the death of a worker is replaced, and the error raised for the request that found it.
+
+        Keyword arguments:
+        data -- The raw bytes of the USFM
+        name -- A name for the USFM in messages
+        options -- A dict of the keyword arguments of the Converter (see options)
+
+        """
+        import concurrent.futures.process
+        if not self.slots.acquire(False):
+            with self.lock:
+                self.counts['refused'] += 1
+            return None
+        start = time.time()
+        with self.lock:
+            self.counts['active'] += 1
+            self.counts['bytesIn'] += len(data)
+            pool = self.pool
+        try:
+            osis = pool.submit(convertRequest, (data, name, options)).result()
+        except concurrent.futures.process.BrokenProcessPool:
+            # only the first request to find the pool broken replaces it; the new pool is only created under the lock, and the old one
+            # stopped & the new one warmed outside it, so that the health endpoint & other requests are not held up meanwhile
+            fresh = None
+            with self.lock:
+                self.counts['failed'] += 1
+                if self.pool is pool:
+                    self.counts['restarts'] += 1
+                    self.pool = fresh = self.startPool()
+            if fresh:
+                pool.shutdown(wait=False)
+                try:
+                    self.warmPool(fresh)
+                except concurrent.futures.process.BrokenProcessPool:
+                    # the next request to find it broken replaces it in turn
+                    pass
+            raise
+        except Exception:
+            with self.lock:
+                self.counts['failed'] += 1
+            raise
+        else:
+            with self.lock:
+                self.counts['converted'] += 1
+                self.counts['bytesOut'] += len(osis)
+            return osis
+        finally:
+            with self.lock:
+                self.counts['active'] -= 1
+                self.counts['seconds'] += time.time() - start
+            self.slots.release()
+
+    def stats(self):
+        r"""Return a dict of the state & counts of the service, for its health endpoint."""
+        with self.lock:
+            stats = dict(self.counts)
+        stats.update({'status':'ok', 'workers':self.processes, 'queueSize':self.queueSize, 'uptime':time.time() - self.started,
+                      'engine':self.converter.engine, 'version':scriptVersion})
+        return stats
+
+    def close(self):
+        r"""Stop the worker processes, once the conversions in progress are done."""
+        self.pool.shutdown()
+
+def serveConversions(address, converter, processes, queueSize):
+    r"""Serve conversions over HTTP until interrupted, on a TCP port or a Unix socket, with a warm pool of worker processes.
+    POST /convert with USFM as the body converts it, returning the OSIS of its books; the options encoding, relaxed, engine, compact & name
+    may be given in the query string, each defaulting to that of the command line. GET /health returns the service's counts as JSON.
+
+    Keyword arguments:
+    address -- A Unix socket path, if it holds a /, else a TCP port, or a host & port as host:port
+    converter -- The Converter whose options are used where a request gives none
+    processes -- The number of worker processes
+    queueSize -- The largest number of requests converting or waiting for a worker at once (see ConversionService)
+
+    """
+    import signal, socketserver, http.server, urllib.parse, json
+    service = ConversionService(converter, processes, queueSize)
+
+    class ConversionRequestHandler(http.server.BaseHTTPRequestHandler):
+        r"""Handles the requests of a conversion server, each in a thread of its own."""
+        protocol_version = 'HTTP/1.1'
+        server_version = 'usfm2osis/' + scriptVersion
+        # seconds to wait on a slow client
+        timeout = 60
+
+        def reply(self, status, body, contentType='text/plain; charset=utf-8', headers=()):
+            r"""Send a response with a body of bytes or text."""
+            if not isinstance(body, bytes):
+                body = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', contentType)
+            self.send_header('Content-Length', str(len(body)))
+            for header in headers:
+                self.send_header(*header)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            r"""Answer GET /health with the service's counts."""
+            if urllib.parse.urlsplit(self.path).path != '/health':
+                return self.reply(404, 'Not found\n')
+            self.reply(200, json.dumps(service.stats(), sort_keys=True) + '\n', 'application/json')
+
+        def do_POST(self):
+            r"""Answer POST /convert with the OSIS of the USFM in the request body."""
+            url = urllib.parse.urlsplit(self.path)
+            length = self.headers.get('Content-Length')
+            if url.path != '/convert':
+                self.close_connection = True
+                return self.reply(404, 'Not found\n')
+            if length is None or not length.isdigit():
+                self.close_connection = True
+                return self.reply(411, 'Content-Length required\n')
+            if int(length) > maxRequestSize:
+                self.close_connection = True
+                return self.reply(413, 'USFM larger than ' + str(maxRequestSize) + ' bytes\n')
+            data = self.rfile.read(int(length))
+            query = urllib.parse.parse_qs(url.query, keep_blank_values=True)
+            try:
+                options = service.options(query)
+            except ValueError as e:
+                return self.reply(400, str(e) + '\n')
+            name = query.get('name', ['<request>'])[-1]
+            try:
+                osis = service.convert(data, name, options)
+            except Exception as e:
+                return self.reply(500, 'Conversion of ' + name + ' failed: ' + (str(e) or e.__class__.__name__) + '\n')
+            if osis is None:
+                return self.reply(503, 'Busy: ' + str(queueSize) + ' requests already queued\n', headers=(('Retry-After', '1'),))
+            self.reply(200, osis, 'application/xml; charset=utf-8')
+
+        def log_message(self, format, *args):
+            r"""Log requests only in verbose mode; the client of a Unix socket has no address."""
+            converter.verbosePrint(format % args)
+
+    if '/' in address:
+        class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+        if os.path.exists(address):
+            os.remove(address)
+        server = ThreadingUnixHTTPServer(address, ConversionRequestHandler)
+    else:
+        host, port = address.rsplit(':', 1) if ':' in address else ('127.0.0.1', address)
+        server = http.server.ThreadingHTTPServer((host, int(port)), ConversionRequestHandler)
+
+    # stop as on an interrupt when the service manager stops the server
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print('Serving conversions at ' + address + ' with ' + str(processes) + ' worker processes')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if '/' in address and os.path.exists(address):
+            os.remove(address)
 
 if __name__ == "__main__":
     global encoding
     global relaxedConformance
 
-    num_processes = max(1,multiprocessing.cpu_count()-1)
-    num_jobs = num_processes
+    mainStart = time.time()
+
+    num_processes = max(1,(os.cpu_count() or 1)-1)
 
     encoding = ''
     relaxedConformance = False
+    engine = 'token'
+    compact = False
     inputFilesIdx = 2 # This marks the point in the sys.argv array, after which all values represent USFM files to be converted.
     usfmDocList = list()
 
@@ -1564,7 +4136,6 @@ if __name__ == "__main__":
         DEBUG = True
         inputFilesIdx += 1
         num_processes = 1
-        num_jobs = 1
         verbose = True
     else:
         DEBUG = False
@@ -1590,11 +4161,105 @@ if __name__ == "__main__":
             encoding = sys.argv[i]
             inputFilesIdx += 2 # increment 2, reflecting 2 args for -e
 
+        if '-j' in sys.argv:
+            i = sys.argv.index('-j')+1
+            if len(sys.argv) < i+1:
+                printUsage()
+            num_processes = max(1,int(sys.argv[i]))
+            inputFilesIdx += 2 # increment 2, reflecting 2 args for -j
+
+        if '--shard-size' in sys.argv:
+            i = sys.argv.index('--shard-size')+1
+            if len(sys.argv) < i+1:
+                printUsage()
+            shardSize = int(float(sys.argv[i]) * 1024)
+            inputFilesIdx += 2 # increment 2, reflecting 2 args for --shard-size
+        else:
+            shardSize = 512 * 1024
+
+        if '-c' in sys.argv:
+            i = sys.argv.index('-c')+1
+            if len(sys.argv) < i+1:
+                printUsage()
+            cacheDir = sys.argv[i]
+            inputFilesIdx += 2 # increment 2, reflecting 2 args for -c
+        else:
+            cacheDir = None
+
+        if '--cache-size' in sys.argv:
+            i = sys.argv.index('--cache-size')+1
+            if len(sys.argv) < i+1:
+                printUsage()
+            cacheSize = int(float(sys.argv[i]) * 1024 * 1024)
+            inputFilesIdx += 2 # increment 2, reflecting 2 args for --cache-size
+        else:
+            cacheSize = 256 * 1024 * 1024
+
+        if '--profile' in sys.argv:
+            i = sys.argv.index('--profile')+1
+            if len(sys.argv) < i+1:
+                printUsage()
+            profileFileName = sys.argv[i]
+            profiling = True
+            inputFilesIdx += 2 # increment 2, reflecting 2 args for --profile
+        else:
+            profileFileName = None
+
+        if '--schema' in sys.argv:
+            i = sys.argv.index('--schema')+1
+            if len(sys.argv) < i+1:
+                printUsage()
+            schemaPath = sys.argv[i]
+            inputFilesIdx += 2 # increment 2, reflecting 2 args for --schema
+        else:
+            schemaPath = None
+
+        if '--compact' in sys.argv:
+            compact = True
+            inputFilesIdx += 1
+
         if '-r' in sys.argv:
             relaxedConformance = True
-            bookDict = dict(list(bookDict.items()) + list(addBookDict.items()))
             inputFilesIdx += 1
+
+        if '--watch' in sys.argv:
+            watch = True
+            inputFilesIdx += 1
+        else:
+            watch = False
+
+        if '--timing' in sys.argv:
+            timing = True
+            inputFilesIdx += 1
+        else:
+            timing = False
         
+        if '--engine' in sys.argv:
+            i = sys.argv.index('--engine')+1
+            if len(sys.argv) < i+1:
+                printUsage()
+            if sys.argv[i].startswith('r'):
+                engine = 'regex'
+            verbosePrint('Using the ' + engine + ' conversion engine')
+            inputFilesIdx += 2 # increment 2, reflecting 2 args for --engine
+
+        converter = Converter(encoding, relaxedConformance, engine, compact, verbose, DEBUG)
+        verbosePrint(regexStats())
+
+        if '--serve' in sys.argv:
+            i = sys.argv.index('--serve')+1
+            if len(sys.argv) < i+1:
+                printUsage()
+            if '--queue' in sys.argv:
+                i = sys.argv.index('--queue')+1
+                if len(sys.argv) < i+1:
+                    printUsage()
+                queueSize = max(1,int(sys.argv[i]))
+            else:
+                queueSize = 4 * num_processes
+            serveConversions(sys.argv[sys.argv.index('--serve')+1], converter, num_processes, queueSize)
+            sys.exit()
+
         if '-l' in sys.argv:
             i = sys.argv.index('-l')+1
             if len(sys.argv) < i+1:
@@ -1621,6 +4286,7 @@ if __name__ == "__main__":
                 sortKey = keyusfm
                 print('Sorting book files by USFM book number')
             elif sys.argv[i].startswith('random'): # for testing only
+                import random
                 sortKey = lambda filename: int(random.random()*256)
                 print('Sorting book files randomly')
             else:
@@ -1633,60 +4299,303 @@ if __name__ == "__main__":
 
         usfmDocList = sys.argv[inputFilesIdx:]
 
-        for filename in usfmDocList:
-            readIdentifiersFromOsis(filename)
+        # read the identifiers of the books, for sorting them, in the worker processes if there are many files
+        if num_processes > 1 and len(usfmDocList) > inProcessJobs:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(min(num_processes, len(usfmDocList)))
+            identifiers = list(pool.map(converter.readIdentifiers, usfmDocList, chunksize=max(1, len(usfmDocList)//(4*num_processes))))
+            pool.shutdown()
+        else:
+            identifiers = [converter.readIdentifiers(filename) for filename in usfmDocList]
+        for filename, (osisBook, locBook) in zip(usfmDocList, identifiers):
+            if osisBook:
+                filename2osis[filename] = osisBook
+                if locBook:
+                    osis2locBk[osisBook]=locBook
+                    loc2osisBk[locBook]=osisBook
         usfmDocList = sorted(usfmDocList, key=sortKey)
 
-        # run
-        # load up work queue
-        work_queue = multiprocessing.Queue()
-        for job in usfmDocList:
-            work_queue.put(job)
-
-        # create a queue to pass to workers to store the results
-        result_queue = multiprocessing.Queue()
-
-        # spawn workers
-        print('Converting USFM documents to OSIS...')
-        for i in range(num_processes):
-            worker = Worker(work_queue, result_queue)
-            worker.start()
-
-        # collect the results off the queue
-        osisSegment = dict()
-        for i in usfmDocList:
-            k,v=result_queue.get()
-            osisSegment[k]=v
-
-        print('Assembling OSIS document')
+        # find the books whose cached OSIS can be reused, and convert only the rest
+        # each converted book is written to the cache, or else to a spool directory, and read back when its turn comes
+        cacheKeys = dict()
+        jobs = list()
+        spoolDir = None
+        if cacheDir:
+            if not os.path.isdir(cacheDir):
+                os.makedirs(cacheDir)
+            script = scriptDigest()
+            for filename in usfmDocList:
+                cacheKeys[filename] = bookCacheKey(filename, language, converter, script)
+                if not os.path.exists(bookCachePath(cacheDir, cacheKeys[filename])):
+                    jobs.append((filename, bookCachePath(cacheDir, cacheKeys[filename])))
+        else:
+            jobs = [(filename, None) for filename in usfmDocList]
+
+        # a run of one worker, or of a book or two, converts each book in this process when its turn comes, rather than starting a pool,
+        # unless a book is large enough to be split into chapter ranges converted at once
+        shardable = engine != 'regex' and num_processes > 1 and shardSize
+        inProcess = num_processes == 1 or (len(jobs) <= inProcessJobs and not (shardable and [job for job in jobs if os.path.getsize(job[0]) > shardSize]))
+        # the chapter ranges of a book are spooled even when caching, so that only whole books are written to the cache
+        if jobs and not inProcess and (not cacheDir or shardable):
+            import tempfile, shutil
+            spoolDir = tempfile.mkdtemp(prefix='usfm2osis-')
+        if spoolDir and not cacheDir:
+            jobs = [(jobs[i][0], os.path.join(spoolDir, str(i) + '.osis.xml')) for i in range(len(jobs))]
+
+        # write the header at once; each book is written as soon as it and every book before it in sort order are ready,
+        # so only the books converted ahead of their turn are held in memory
+        print('Writing OSIS document to ' + osisFileName)
         conversionInfo = '<!-- usfm2osis.py '+scriptVersion+', date='+date+', rev='+rev+', usfmVersion='+usfmVersion+', osisSchema='+osisSchema+' !-->\n'
-        osisDoc = '<osis xmlns="http://www.bibletechnologies.net/2003/OSIS/namespace" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://www.bibletechnologies.net/2003/OSIS/namespace '+osisSchema+'">\n<osisText osisRefWork="Bible" xml:lang="' + language + '" osisIDWork="' + osisWork + '">\n<header>\n' + conversionInfo + '<work osisWork="' + osisWork + '"/>\n</header>\n'
-
-        unhandledTags = set()
-        for doc in usfmDocList:
-            unhandledTags |= set(re.findall(r'(\\[^\s\*]*)', osisSegment[doc]))
-            osisDoc += osisSegment[doc]
-
-        osisDoc += '</osisText>\n</osis>\n'
+        osisHeader = '<?xml version="1.0" encoding="UTF-8"?>\n'
+        osisHeader += '<osis xmlns="http://www.bibletechnologies.net/2003/OSIS/namespace" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://www.bibletechnologies.net/2003/OSIS/namespace '+osisSchema+'">\n<osisText osisRefWork="Bible" xml:lang="' + language + '" osisIDWork="' + osisWork + '">\n<header>\n' + conversionInfo + '<work osisWork="' + osisWork + '"/>\n</header>\n'
+        osisFooter = '</osisText>\n</osis>\n'
+        osisFile = codecs.open(osisFileName, 'w', 'utf-8')
+        osisFile.write(osisHeader)
+        osisFile.flush()
 
+        # each worker validates the books it converts, so find & compile the schema before the run
         if validatexml:
             try:
-                import urllib.request, urllib.parse, urllib.error
                 from lxml import etree
-                print('Validating XML...')
-                #osisSchemaLocal = r''
-                #osisParser = etree.XMLParser(schema = etree.XMLSchema(etree.XML(osisSchemaLocal)))
-                osisParser = etree.XMLParser(schema = etree.XMLSchema(etree.XML(urllib.request.urlopen(osisSchema).read())))
-                etree.fromstring(osisDoc, osisParser)
-                print('XML Valid')
+                validationSchema = findOsisSchema(schemaPath)
+                if validationSchema:
+                    loadOsisSchema(validationSchema)
+                    print('Validating XML against ' + validationSchema)
+                else:
+                    print('The OSIS schema could not be fetched from ' + osisSchema + '; for validation offline, give a local copy with --schema, with the xml.xsd it imports beside it')
             except ImportError:
                 print('For schema validation, install lxml')
-            except etree.XMLSyntaxError as eVal:
-                print('XML Validation error: ' + str(eVal))
+            except (IOError, OSError, etree.XMLSchemaParseError, etree.XMLSyntaxError) as eSchema:
+                print('OSIS schema ' + validationSchema + ' could not be read: ' + str(eSchema))
+                validationSchema = None
 
-        osisFile = codecs.open(osisFileName, 'w', 'utf-8')
-        osisFile.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-        osisFile.write(osisDoc)
+        # run
+        # split the largest books into chapter ranges, so that they are converted by several workers at once
+        tasks = list()
+        shards = dict()
+        for index, job in enumerate(jobs):
+            size = os.path.getsize(job[0])
+            count = 0
+            if shardable:
+                count = min(num_processes, -(-size // shardSize))
+            if count > 1:
+                verbosePrint('Splitting ' + job[0] + ' into ' + str(count) + ' chapter ranges')
+                shards[job[0]] = [None] * count
+                for i in range(count):
+                    tasks.append((size // count, convertShard, (job[0], i, count, os.path.join(spoolDir, str(index) + '.osis.xml.' + str(i)))))
+            else:
+                tasks.append((size, convertBook, job))
+        # the cached books are validated too, since they may have been converted without validation
+        if validationSchema and cacheDir:
+            misses = dict(jobs)
+            for filename in usfmDocList:
+                if filename not in misses:
+                    path = bookCachePath(cacheDir, cacheKeys[filename])
+                    tasks.append((os.path.getsize(path) if os.path.exists(path) else 0, validateBook, (filename, path)))
+        # start the largest tasks first, estimating the time each takes by its size, so that no large book is left to run on alone at the end;
+        # the books are still written in sort order
+        tasks.sort(key=lambda task: -task[0])
+
+        # start no more workers than there are tasks, and none if converting in this process
+        watchProcesses = num_processes
+        num_processes = 0 if inProcess else min(num_processes, len(tasks))
+        futures = dict()
+        if inProcess:
+            print('Converting USFM documents to OSIS...')
+            if profiling:
+                startProfiling()
+        if num_processes:
+            import concurrent.futures
+            from concurrent.futures import ProcessPoolExecutor
+            print('Converting USFM documents to OSIS with ' + str(num_processes) + ' worker' + ('s' if num_processes > 1 else '') + '...')
+            pool = ProcessPoolExecutor(num_processes, initializer=initWorker, initargs=({'converter':converter, 'validationSchema':validationSchema,
+                                       'profiling':profiling, 'cacheDir':cacheDir},))
+            for size, task, job in tasks:
+                futures[pool.submit(task, job)] = (task, job[0], job[1] if task is convertShard else None)
+        pending = set(futures)
+        conversionStart = time.time()
+        durations = dict()
+        validationErrors = list()
+        profiles = dict()
+
+        # collect the results as they complete, writing out every book that is ready
+        unhandledTags = set()
+        nextDoc = 0
+        ready = dict()
+        # the length of each book's OSIS in the document, for --watch to find it by
+        bookLengths = dict()
+        converted = set(job[0] for job in jobs)
+        paths = dict(jobs)
+        # the OSIS of the joined books that could not be cached
+        uncached = dict()
+        while True:
+            while nextDoc < len(usfmDocList):
+                doc = usfmDocList[nextDoc]
+                if doc in converted and inProcess:
+                    try:
+                        osis, duration, errors, figures = runBook(doc)
+                    except Exception as e:
+                        print('ERROR: Converting ' + doc + ' failed: ' + (str(e) or e.__class__.__name__))
+                        osisFile.close()
+                        os.remove(osisFileName)
+                        sys.exit(1)
+                    durations[doc] = [duration]
+                    if figures:
+                        profiles[doc] = figures
+                    if errors:
+                        validationErrors.extend(errors)
+                    if cacheDir:
+                        cacheOsisFile(paths[doc], osis)
+                elif doc in converted:
+                    if doc not in ready:
+                        break
+                    osis = uncached.pop(doc, None)
+                    if osis is None:
+                        osis = codecs.open(ready.pop(doc), 'r', 'utf-8').read()
+                    else:
+                        del ready[doc]
+                else:
+                    osis = loadCachedBook(cacheDir, cacheKeys[doc])
+                    if osis is None:
+                        # evicted since the cache was checked, or not cached by the worker converting it
+                        osis = converter.convertFile(doc)
+                        if validationSchema:
+                            validationErrors.extend(validateOsisBook(osis, doc))
+                    else:
+                        verbosePrint('Reusing cached OSIS for: ' + doc)
+                        # the workers validate the cached books, but in this process each is validated when its turn comes
+                        if validationSchema and inProcess:
+                            validationErrors.extend(validateOsisBook(osis, doc))
+                unhandledTags |= set(regexes[relaxedConformance]['main.unhandledTags'].findall(osis))
+                osisFile.write(osis)
+                osisFile.flush()
+                bookLengths[doc] = len(osis)
+                nextDoc += 1
+            if not pending:
+                break
+
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                failed = False
+                try:
+                    result = future.result()
+                except concurrent.futures.process.BrokenProcessPool:
+                    # a worker that dies takes every unfinished book with it, so no single book can be named
+                    print('ERROR: A worker process died while converting USFM documents')
+                    failed = True
+                except Exception as e:
+                    # a book that raises an error stops the run at once
+                    print('ERROR: Converting ' + futures[future][1] + ' failed: ' + (str(e) or e.__class__.__name__))
+                    failed = True
+                if failed:
+                    for other in futures:
+                        other.cancel()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    osisFile.close()
+                    os.remove(osisFileName)
+                    if spoolDir:
+                        shutil.rmtree(spoolDir, True)
+                    sys.exit(1)
+
+                task,k,i=futures[future]
+                v,duration,errors,figures=result
+                durations.setdefault(k, list()).append(duration)
+                if figures:
+                    mergeProfiles(profiles.setdefault(k, dict()), figures)
+                if task is convertBook and v is None:
+                    # the worker could not cache the book, so it is converted & validated again in this process when its turn comes
+                    converted.discard(k)
+                    continue
+                if errors:
+                    validationErrors.extend(errors)
+                if task is not convertShard:
+                    # a cached book is read from the cache when its turn comes
+                    if k in converted:
+                        ready[k]=v
+                    continue
+
+                # a chapter range: once every range of the book is converted, join them into the book's OSIS
+                if shards[k] is None:
+                    # the book is already being converted whole
+                    if v:
+                        os.remove(v)
+                elif v is None:
+                    verbosePrint('Converting ' + k + ' whole, since it cannot be split into chapter ranges')
+                    for v in shards[k]:
+                        if v:
+                            os.remove(v)
+                    shards[k] = None
+                    job = (k, paths[k])
+                    future = pool.submit(convertBook, job)
+                    futures[future] = (convertBook, k, None)
+                    pending.add(future)
+                else:
+                    shards[k][i] = v
+                    if None not in shards[k]:
+                        osis = list()
+                        for v in shards[k]:
+                            osis.append(codecs.open(v, 'r', 'utf-8').read())
+                            os.remove(v)
+                        osis = ''.join(osis)
+                        if not cacheDir:
+                            storeOsisFile(paths[k], osis)
+                        elif not cacheOsisFile(paths[k], osis):
+                            # a book that could not be cached is held until its turn, and validated in this process
+                            uncached[k] = osis
+                            if validationSchema:
+                                validationErrors.extend(validateOsisBook(osis, k))
+                            ready[k] = paths[k]
+                            continue
+                        if validationSchema:
+                            future = pool.submit(validateBook, (k, paths[k]))
+                            futures[future] = (validateBook, k, None)
+                            pending.add(future)
+                        else:
+                            ready[k] = paths[k]
+
+        if num_processes:
+            pool.shutdown()
+        if durations:
+            # the critical path is the longest single task, which no number of workers could have shortened
+            critical = max(durations, key=lambda k: max(durations[k]))
+            for k in usfmDocList:
+                if k in durations:
+                    verbosePrint('Converted ' + k + ' in ' + ('%.2f' % sum(durations[k])) + ' s' +
+                                 (' (' + ' + '.join(['%.2f' % d for d in durations[k]]) + ' s)' if len(durations[k]) > 1 else ''))
+            print('Converted ' + str(len(jobs)) + ' books in ' + ('%.2f' % (time.time() - conversionStart)) + ' s, with ' +
+                  ('%.2f' % sum([sum(d) for d in durations.values()])) + ' s of work; critical path ' + ('%.2f' % max(durations[critical])) + ' s (' + critical + ')')
+        if spoolDir:
+            shutil.rmtree(spoolDir, True)
+
+        if profiling:
+            import json
+            with codecs.open(profileFileName, 'w', 'utf-8') as profileFile:
+                json.dump({'books':profiles, 'wallTime':time.time() - conversionStart}, profileFile, indent=1, sort_keys=True)
+            print(profileSummary(profiles))
+            print('Profile written to ' + profileFileName)
+
+        osisFile.write(osisFooter)
+        osisFile.close()
+        conversionEnd = time.time()
+
+        if cacheDir:
+            books, size, removed = pruneBookCache(cacheDir, cacheSize)
+            print('Book cache: ' + str(len(usfmDocList)-len(jobs)) + ' hits, ' + str(len(jobs)) + ' misses; ' + str(books) + ' books (' +
+                  str(size//1024) + ' KiB of ' + str(cacheSize//1024) + ' KiB) cached in ' + cacheDir + ', ' + str(removed) + ' evicted')
+
+        # the books have been validated by the workers, leaving only the header & footer around them
+        if validationSchema:
+            # an empty div stands in for the books
+            validationErrors.extend(osisValidationErrors(osisHeader + '<div type="bookGroup"/>\n' + osisFooter, osisFileName, 1))
+            for error in validationErrors:
+                print('XML Validation error in ' + error)
+            if not validationErrors:
+                print('XML Valid')
+
+        # the time before the run: importing the script's modules, then reading the options & the books' identifiers, and starting the workers
+        if timing:
+            print('Timing: import ' + ('%.3f' % (mainStart - importStart)) + ' s, startup ' + ('%.3f' % (conversionStart - mainStart)) +
+                  ' s, conversion ' + ('%.3f' % (conversionEnd - conversionStart)) + ' s')
 
         print('Done!')
 
@@ -1698,3 +4607,83 @@ if __name__ == "__main__":
             if not relaxedConformance:
                 print('Consider using the -r option for relaxed markup processing')
 
+        # reconvert each book as it is saved, and splice its OSIS into the document in place of the old, leaving the other books as they are
+        if watch:
+            print('Watching ' + str(len(usfmDocList)) + ' USFM files for changes; press Ctrl-C to stop')
+            # a pool kept ready for the whole watch converts a large book in chapter ranges at once, as in the run above
+            watchPool = None
+            if engine != 'regex' and watchProcesses > 1 and shardSize:
+                import concurrent.futures
+                from concurrent.futures import ProcessPoolExecutor
+                watchPool = ProcessPoolExecutor(watchProcesses)
+                list(watchPool.map(warmWorker, range(watchProcesses)))
+            try:
+                for changed in watchFiles(usfmDocList):
+                    start = time.time()
+                    try:
+                        document = codecs.open(osisFileName, 'r', 'utf-8').read()
+                    except (IOError, OSError, UnicodeDecodeError):
+                        document = ''
+                    books = dict()
+                    position = len(osisHeader)
+                    for doc in usfmDocList:
+                        books[doc] = document[position:position + bookLengths[doc]]
+                        position += bookLengths[doc]
+                    if document[:len(osisHeader)] != osisHeader or document[position:] != osisFooter:
+                        # the document was changed by something else, or removed, so its books can no longer be found; convert them all again
+                        print('WARNING: ' + osisFileName + ' was changed outside of this run or cannot be read; converting every book again')
+                        books = dict()
+                        changed = set(usfmDocList)
+
+                    for doc in usfmDocList:
+                        if doc not in changed:
+                            continue
+                        try:
+                            osis = None
+                            count = min(watchProcesses, -(-os.path.getsize(doc) // shardSize)) if watchPool else 0
+                            if count > 1:
+                                osis = list(watchPool.map(converter.convertFile, [doc] * count, [(i, count) for i in range(count)]))
+                                osis = None if None in osis else ''.join(osis)
+                            if osis is None:
+                                osis = converter.convertFile(doc)
+                        except Exception as e:
+                            # the book's last good OSIS is kept until it is saved again
+                            print('ERROR: Converting ' + doc + ' failed: ' + (str(e) or e.__class__.__name__))
+                            if watchPool and isinstance(e, concurrent.futures.process.BrokenProcessPool):
+                                watchPool.shutdown(wait=False)
+                                watchPool = ProcessPoolExecutor(watchProcesses)
+                                list(watchPool.map(warmWorker, range(watchProcesses)))
+                            continue
+                        books[doc] = osis
+                        if cacheDir:
+                            cacheOsisFile(bookCachePath(cacheDir, bookCacheKey(doc, language, converter, script)), osis)
+                        if validationSchema:
+                            for error in validateOsisBook(osis, doc):
+                                print('XML Validation error in ' + error)
+
+                        # a changed \id or \toc3 moves the book in the sort order
+                        osisBook, locBook = converter.readIdentifiers(doc)
+                        oldBook = filename2osis.pop(doc, None)
+                        if oldBook in osis2locBk:
+                            loc2osisBk.pop(osis2locBk.pop(oldBook), None)
+                        if osisBook:
+                            filename2osis[doc] = osisBook
+                            if locBook:
+                                osis2locBk[osisBook]=locBook
+                                loc2osisBk[locBook]=osisBook
+                    usfmDocList = sorted(usfmDocList, key=sortKey)
+
+                    # a document being rebuilt is only written once every book in it converts
+                    missing = [doc for doc in usfmDocList if doc not in books]
+                    if missing:
+                        print('WARNING: ' + osisFileName + ' is not updated until ' + ', '.join(missing) + ' can be converted')
+                        continue
+                    storeOsisFile(osisFileName, osisHeader + ''.join([books[doc] for doc in usfmDocList]) + osisFooter)
+                    for doc in usfmDocList:
+                        bookLengths[doc] = len(books[doc])
+                    print('Updated ' + osisFileName + ' with ' + ', '.join(sorted(changed)) + ' in ' + ('%.2f' % (time.time() - start)) + ' s')
+            except KeyboardInterrupt:
+                print('')
+            if watchPool:
+                watchPool.shutdown()
+
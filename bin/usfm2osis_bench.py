@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# usfm2osis_bench.py
+# Copyright 2012 by the CrossWire Bible Society <http://www.crosswire.org/>
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation version 2.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# The full text of the GNU General Public License is available at:
+# <http://www.gnu.org/licenses/gpl-2.0.txt>.
+
+# Generates synthetic USFM corpora and measures the throughput of usfm2osis.py
+# on them, end to end at several worker counts and per conversion stage, saving
+# the results as JSON so that they can be compared between commits.
+
+import sys, os, codecs, time, json, random, shutil, subprocess, tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import usfm2osis
+
+converter = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'usfm2osis.py')
+
+# the share of verses carrying each feature, except intros, which is the share of books with an introduction
+defaultMix = {'footnotes':0.2, 'xrefs':0.1, 'poetry':0.15, 'tables':0.02, 'sections':0.08, 'figs':0.01, 'intros':1.0}
+
+words = ('and', 'the', 'of', 'to', 'in', 'he', 'that', 'for', 'his', 'was', 'with', 'they', 'not', 'all', 'unto', 'lord', 'people',
+         'came', 'said', 'land', 'house', 'king', 'went', 'day', 'city', 'sons', 'hand', 'word', 'heart', 'over', 'before', 'earth',
+         'children', 'father', 'spirit', 'water', 'mountain', 'light', 'gave', 'great', 'behold', 'brought', 'upon', 'gate', 'peace')
+
+def sentence(rng, count):
+    r"""Return a sentence of random words.
+
+    Keyword arguments:
+    rng -- The random.Random to draw the words from
+    count -- The number of words
+
+    """
+    text = ' '.join([rng.choice(words) for i in range(count)])
+    return text[0].upper() + text[1:] + '.'
+
+def bibleBooks():
+    r"""Return the codes of the Bible books in usfm2osis.bookDict, leaving out the peripheral & non-biblical books."""
+    return [code for code in sorted(usfm2osis.bookDict) if usfm2osis.bookDict[code] not in usfm2osis.specialBooks + ['DICTIONARY']]
+
+def generateBook(code, chapters, verses, mix, seed):
+    r"""Generate a synthetic USFM book, returning it as a string. The same arguments always give the same book.
+
+    Keyword arguments:
+    code -- The USFM book code
+    chapters -- The number of chapters
+    verses -- The number of verses in each chapter
+    mix -- A dict of the share of verses carrying each feature, as in defaultMix
+    seed -- The seed of the random numbers
+
+    """
+    rng = random.Random(str(seed) + code)
+    name = usfm2osis.bookDict[code]
+    lines = ['\\id ' + code + ' Synthetic text for benchmarking', '\\h ' + name,
+             '\\toc1 The Book of ' + name, '\\toc2 ' + name, '\\toc3 ' + name[:3], '\\mt1 ' + name]
+    if rng.random() < mix['intros']:
+        lines += ['\\imt1 Introduction to ' + name, '\\is1 ' + sentence(rng, 3), '\\ip ' + sentence(rng, 40), '\\ip ' + sentence(rng, 30),
+                  '\\iot Outline', '\\io1 ' + sentence(rng, 4) + ' \\ior 1:1-5\\ior*', '\\io1 ' + sentence(rng, 4) + ' \\ior 2:1\\ior*', '\\ie']
+
+    for c in range(1, chapters+1):
+        if rng.random() < mix['sections']:
+            lines.append('\\ms1 ' + sentence(rng, 3))
+        lines.append('\\c ' + str(c))
+        if rng.random() < mix['sections']:
+            lines.append('\\s1 ' + sentence(rng, 4))
+        lines.append('\\p')
+        mode = 'prose'
+        for v in range(1, verses+1):
+            # the footnote follows the first word of the verse, and the cross reference & figure end it
+            text = sentence(rng, rng.randint(8, 30)).split(' ')
+            if rng.random() < mix['footnotes']:
+                text[0] += '\\f + \\fr ' + str(c) + ':' + str(v) + ' \\fk ' + rng.choice(words) + ': \\ft ' + sentence(rng, 12) + '\\f*'
+            if rng.random() < mix['xrefs']:
+                text[-1] += '\\x - \\xo ' + str(c) + ':' + str(v) + ' \\xt Gen 1:' + str(rng.randint(1, 31)) + '; Ps 23:' + str(rng.randint(1, 6)) + '.\\x*'
+            if rng.random() < mix['figs']:
+                text[-1] += ' \\fig ' + sentence(rng, 3) + '|image' + str(c) + '.jpg|col||||' + str(c) + ':' + str(v) + '\\fig*'
+
+            if rng.random() < mix['sections'] and v > 1:
+                lines.append('\\s1 ' + sentence(rng, 4))
+                lines.append('\\p')
+                mode = 'prose'
+            if rng.random() < mix['tables']:
+                if mode != 'table':
+                    lines.append('\\tr \\th1 ' + rng.choice(words) + ' \\thr2 ' + rng.choice(words))
+                lines.append('\\tr \\tc1 \\v ' + str(v) + ' ' + ' '.join(text) + ' \\tcr2 ' + str(rng.randint(1, 999)))
+                mode = 'table'
+            elif rng.random() < mix['poetry']:
+                third = len(text)//3
+                lines.append('\\q1 \\v ' + str(v) + ' ' + ' '.join(text[:third]))
+                lines.append('\\q2 ' + ' '.join(text[third:2*third]))
+                lines.append('\\q3 ' + ' '.join(text[2*third:]))
+                mode = 'poetry'
+            else:
+                if mode != 'prose':
+                    lines.append('\\p')
+                    mode = 'prose'
+                lines.append('\\v ' + str(v) + ' ' + ' '.join(text))
+    return '\n'.join(lines) + '\n'
+
+def generateCorpus(directory, chapters, verses, mix, seed):
+    r"""Write a synthetic USFM book for every Bible book to a directory, returning the paths of the files in order of their book codes.
+
+    Keyword arguments:
+    directory -- The directory to write the books to
+    chapters -- The number of chapters in each book
+    verses -- The number of verses in each chapter
+    mix -- A dict of the share of verses carrying each feature, as in defaultMix
+    seed -- The seed of the random numbers
+
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    files = list()
+    for code in bibleBooks():
+        path = os.path.join(directory, code + '.SFM')
+        usfmFile = codecs.open(path, 'w', 'utf-8')
+        usfmFile.write(generateBook(code, chapters, verses, mix, seed))
+        usfmFile.close()
+        files.append(path)
+    return files
+
+def timeConversion(files, workers, engine, repeat):
+    r"""Convert a corpus with usfm2osis.py, returning the shortest wall time of repeat runs in seconds.
+
+    Keyword arguments:
+    files -- The paths of the USFM files
+    workers -- The number of worker processes, given with -j
+    engine -- The conversion engine, given with --engine
+    repeat -- The number of runs
+
+    """
+    outDir = tempfile.mkdtemp(prefix='usfm2osis-bench-')
+    try:
+        best = None
+        for i in range(repeat):
+            start = time.time()
+            subprocess.check_call([sys.executable, converter, 'Bible.Bench', '-x', '-s', 'none', '-j', str(workers), '--engine', engine,
+                                   '-o', os.path.join(outDir, 'bench.osis.xml')] + files, stdout=subprocess.DEVNULL)
+            seconds = time.time() - start
+            if best is None or seconds < best:
+                best = seconds
+        return best
+    finally:
+        shutil.rmtree(outDir, True)
+
+def timeStages(files, engine):
+    r"""Convert a corpus in this process, one book at a time, returning a dict of the total seconds spent in each conversion stage.
+
+    Keyword arguments:
+    files -- The paths of the USFM files
+    engine -- The conversion engine
+
+    """
+    converter = usfm2osis.Converter(engine=engine)
+    totals = dict()
+    for filename in files:
+        usfm2osis.profile = usfm2osis.ConversionProfile()
+        converter.convertFile(filename)
+        usfm2osis.mergeProfiles(totals, usfm2osis.profile.figures())
+    usfm2osis.profile = None
+    return dict([(name, figures['time']) for name, figures in totals['stages'].items()])
+
+def gitCommit():
+    r"""Return the git commit of the script, or None if it is not in a git repository."""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(converter), stderr=subprocess.DEVNULL).decode('utf-8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compareResults(old, new):
+    r"""Return a text comparison of the end-to-end times of two benchmark results, for the corpora & worker counts that both measured.
+
+    Keyword arguments:
+    old -- The earlier results, as loaded from their JSON
+    new -- The later results
+
+    """
+    lines = ['Compared with ' + str(old.get('commit')) + ':']
+    oldRuns = dict()
+    for corpus in old['corpora']:
+        for run in corpus['runs']:
+            oldRuns[(corpus['chapters'], corpus['verses'], run['workers'])] = run['seconds']
+    for corpus in new['corpora']:
+        for run in corpus['runs']:
+            key = (corpus['chapters'], corpus['verses'], run['workers'])
+            if key in oldRuns:
+                lines.append('  %4d chapters/book, %2d workers: %8.3f s, was %8.3f s (%.2fx)' % (key[0], key[2], run['seconds'], oldRuns[key], oldRuns[key] / run['seconds']))
+    return '\n'.join(lines)
+
+def printUsage():
+    r"""Prints usage statement."""
+    print('usfm2osis_bench.py -- synthetic USFM corpus generator & usfm2osis.py benchmark')
+    print('')
+    print('Usage: usfm2osis_bench.py <results.json> [OPTIONS]')
+    print('')
+    print('  -c CHAPTERS      comma-separated corpus sizes, in chapters per book')
+    print('                     (default 2,10,30)')
+    print('  --compare FILE   compare the times with the results in FILE')
+    print('  --engine ENGINE  set conversion engine: token (default), regex (see')
+    print('                     usfm2osis.py -h for what each covers)')
+    print('  --generate DIR   only write a corpus of the first size to DIR')
+    print('  -h, --help       print this usage information')
+    print('  -j JOBS          comma-separated worker counts (default 1 and the number of')
+    print('                     CPUs)')
+    print('  --mix MIX        comma-separated NAME=SHARE of verses with each feature,')
+    print('                     of ' + ', '.join(sorted(defaultMix)) + ' (intros being')
+    print('                     the share of books); default ' + ','.join([name + '=' + str(defaultMix[name]) for name in sorted(defaultMix)]))
+    print('  --repeat N       runs of each conversion, of which the fastest counts')
+    print('                     (default 3)')
+    print('  --seed N         seed of the random text (default 1)')
+    print('  --verses N       verses in each chapter (default 25)')
+    sys.exit()
+
+if __name__ == "__main__":
+    if '-h' in sys.argv or '--help' in sys.argv or len(sys.argv) < 2:
+        printUsage()
+
+    def option(name, default):
+        r"""Return the value given for an option, or default if it is not given."""
+        if name in sys.argv:
+            i = sys.argv.index(name)+1
+            if len(sys.argv) < i+1:
+                printUsage()
+            return sys.argv[i]
+        return default
+
+    resultsFileName = sys.argv[1]
+    sizes = [int(size) for size in option('-c', '2,10,30').split(',')]
+    verses = int(option('--verses', '25'))
+    workerCounts = [int(count) for count in option('-j', ','.join(sorted(set(['1', str(multiprocessing.cpu_count())])))).split(',')]
+    seed = int(option('--seed', '1'))
+    repeat = int(option('--repeat', '3'))
+    engine = 'regex' if option('--engine', 'token').startswith('r') else 'token'
+    mix = dict(defaultMix)
+    for share in option('--mix', '').split(','):
+        if share:
+            name, value = share.split('=')
+            if name not in mix:
+                printUsage()
+            mix[name] = float(value)
+
+    if '--generate' in sys.argv:
+        directory = option('--generate', None)
+        files = generateCorpus(directory, sizes[0], verses, mix, seed)
+        print('Wrote ' + str(len(files)) + ' books to ' + directory)
+        sys.exit()
+
+    results = {'commit':gitCommit(), 'date':time.strftime('%Y-%m-%dT%H:%M:%S'), 'python':sys.version.split()[0], 'cpus':multiprocessing.cpu_count(),
+               'engine':engine, 'seed':seed, 'mix':mix, 'corpora':list()}
+    for chapters in sizes:
+        corpusDir = tempfile.mkdtemp(prefix='usfm2osis-corpus-')
+        try:
+            files = generateCorpus(corpusDir, chapters, verses, mix, seed)
+            size = sum([os.path.getsize(filename) for filename in files])
+            megabytes = size / 1048576.0
+            corpus = {'chapters':chapters, 'verses':verses, 'books':len(files), 'bytes':size, 'runs':list(), 'stages':dict()}
+            print('Corpus of ' + str(len(files)) + ' books, ' + str(chapters) + ' chapters each, ' + ('%.1f' % megabytes) + ' MB')
+            for workers in workerCounts:
+                seconds = timeConversion(files, workers, engine, repeat)
+                corpus['runs'].append({'workers':workers, 'seconds':seconds, 'booksPerSecond':len(files) / seconds, 'mbPerSecond':megabytes / seconds})
+                print('  %2d workers: %8.3f s, %8.1f books/s, %6.2f MB/s' % (workers, seconds, len(files) / seconds, megabytes / seconds))
+            for name, seconds in sorted(timeStages(files, engine).items(), key=lambda item: -item[1]):
+                corpus['stages'][name] = {'seconds':seconds, 'mbPerSecond':megabytes / seconds if seconds else None}
+                print('  %-36s %8.3f s' % (name, seconds))
+            results['corpora'].append(corpus)
+        finally:
+            shutil.rmtree(corpusDir, True)
+
+    with codecs.open(resultsFileName, 'w', 'utf-8') as resultsFile:
+        json.dump(results, resultsFile, indent=1, sort_keys=True)
+    print('Results written to ' + resultsFileName)
+
+    if '--compare' in sys.argv:
+        with codecs.open(option('--compare', None), 'r', 'utf-8') as oldFile:
+            print(compareResults(json.load(oldFile), results))
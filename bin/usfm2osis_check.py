@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# usfm2osis_check.py
+# Copyright 2012 by the CrossWire Bible Society <http://www.crosswire.org/>
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation version 2.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# The full text of the GNU General Public License is available at:
+# <http://www.gnu.org/licenses/gpl-2.0.txt>.
+
+# Checks that the faster paths of usfm2osis.py give the same OSIS as the paths
+# they stand in for, on synthetic USFM from usfm2osis_bench.py, printing each
+# difference found and exiting with status 1 if there is any.
+
+import sys, os, codecs, random, shutil, subprocess, tempfile, time, json, socket, threading, http.client
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import usfm2osis, usfm2osis_bench
+
+converter = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'usfm2osis.py')
+
+# a mix giving every book an introduction, and many sections, notes & poetry, so that the chapter ranges meet within them
+shardMix = {'footnotes':0.4, 'xrefs':0.3, 'poetry':0.3, 'tables':0.05, 'sections':0.3, 'figs':0.02, 'intros':1.0}
+
+def convertWithOptions(files, options, outDir, name):
+    r"""Convert USFM files with usfm2osis.py, returning the bytes of the OSIS document and the messages printed.
+
+    Keyword arguments:
+    files -- The paths of the USFM files
+    options -- A list of the command line options to convert with
+    outDir -- The directory to write the OSIS document to
+    name -- The file name of the OSIS document
+
+    """
+    path = os.path.join(outDir, name)
+    messages = subprocess.check_output([sys.executable, converter, 'Bible.Check', '-x', '-s', 'none', '-v', '-o', path] + options + files,
+                                       stderr=subprocess.STDOUT).decode('utf-8', 'replace')
+    osis = open(path, 'rb').read()
+    return osis, messages
+
+def firstDifference(a, b):
+    r"""Return a description of where two byte strings first differ.
+
+    Keyword arguments:
+    a -- The expected bytes
+    b -- The bytes found
+
+    """
+    i = 0
+    while i < min(len(a), len(b)) and a[i] == b[i]:
+        i += 1
+    return 'at byte ' + str(i) + ': expected ' + repr(a[max(0, i-40):i+40]) + ', found ' + repr(b[max(0, i-40):i+40])
+
+def checkShards(count, seed):
+    r"""Convert multi-chapter books split into chapter ranges across workers and whole, returning a list of the differences found.
+
+    Keyword arguments:
+    count -- The number of books to check
+    seed -- The seed of the random text
+
+    """
+    failures = list()
+    workDir = tempfile.mkdtemp(prefix='usfm2osis-check-')
+    try:
+        codes = usfm2osis_bench.bibleBooks()
+        for n in range(count):
+            code = codes[n % len(codes)]
+            path = os.path.join(workDir, code + '.SFM')
+            usfmFile = codecs.open(path, 'w', 'utf-8')
+            usfmFile.write(usfm2osis_bench.generateBook(code, 12, 20, shardMix, seed + n))
+            usfmFile.close()
+
+            whole, messages = convertWithOptions([path], ['--shard-size', '0'], workDir, 'whole.osis.xml')
+            split, messages = convertWithOptions([path], ['--shard-size', '1', '-j', '4'], workDir, 'split.osis.xml')
+            if 'Splitting ' not in messages or 'cannot be split' in messages:
+                failures.append('shards: ' + code + ' (seed ' + str(seed + n) + ') was not split into chapter ranges')
+            elif split != whole:
+                failures.append('shards: ' + code + ' (seed ' + str(seed + n) + ') differs when split, ' + firstDifference(whole, split))
+            os.remove(path)
+    finally:
+        shutil.rmtree(workDir, True)
+    return failures
+
+# the pieces of the random documents of the slides check: milestones, the start tags & titles that slide past them, section divs with
+# their section characters, and text, whitespace & stray markup that stops a slide
+slidePieces = ('<verse eID="a"/>', '<verse osisID="Gen.1.1" sID="x"/>', '<chapter eID="c"/>', '<chapter osisID="c" sID="c"/>',
+               '<title>', '</title>', '<title type="x">', '<title canonical="true">', '<title type="runningHead">', ' ', '\n', '  ',
+               '<p>', '</p>', '<l level="1">', '<lg>', '<list>', '<item>', '<p sID="1"/>', '<lb/>', '<l/>', 'word', 'x y',
+               '\uFDD5<div type="section">', '\uFDD6<div type="subSection">', '</div>\uFDD5', '</div>', '\uFDD5', '<div\ntype="s">',
+               '<title\n a="b">', '<note>n</note>', '<p a="<p>">', '<titlePage>', '<chapter eID=/>', '<chapter sID=/>', '<div ', '<')
+
+def checkSlides(count, seed):
+    r"""Give random documents of a Bible book the final clean-up with each engine, leaving the whitespace as it is, so that only the slides
+    of the start tags & titles past the verse & chapter milestones can differ, returning a list of the differences found.
+
+    Keyword arguments:
+    count -- The number of documents to check, in thousands
+    seed -- The seed of the random documents
+
+    """
+    failures = list()
+    rng = random.Random(seed)
+    token = usfm2osis.Converter(engine='token', compact=True)
+    regex = usfm2osis.Converter(engine='regex', compact=True)
+    for n in range(count * 1000):
+        osis = '<div type="book" osisID="Gen">' + ''.join([rng.choice(slidePieces) for i in range(rng.randint(1, 30))])
+        expected = regex.cleanupText(osis)
+        found = token.cleanupText(osis)
+        if found != expected:
+            failures.append('slides: ' + repr(osis) + ' gives ' + repr(found) + ', expected ' + repr(expected))
+    return failures
+
+# the tags, whitespace & words of the random documents of the layout check: end tags with & without attributes, milestones, the block
+# & inline containers, and stray markup that the layout sweep leaves to the cleanup patterns
+layoutTags = ('<p>', '</p>', '</p type="x">', '<p type="x">', '<p sID="a"/>', '<p eID="a"/>', '</div>', '<div type="s">', '<div eID="d"/>',
+              '</note>', '<note n="a  b">', '</l>', '<l level="1">', '<l eID="x"/>', '</lg>', '<lg>', '<lg eID="q"/>', '</chapter>',
+              '<chapter osisID="a" sID="a"/>', '<chapter eID="a"/>', '<verse osisID="Gen.1.1" sID="x"/>', '<verse eID="x"/>', '</verse>',
+              '</head>', '<head>', '</title>', '<title>', '<title type="x">', '</item>', '<item>', '</list>', '<list>', '<lb type="x-p"/>',
+              '<lb/>', '</hi>', '<hi type="b">', '</seg>', '</w>', '<l eID="a/b"/>', '<p\n>', '</p\t>', '</>', '<item eID="i"/>', '</title x="1">')
+layoutSpaces = ('', ' ', '  ', '\n', '\n\n', ' \n', '\n ', ' \n\n ', '\t', '\u00a0', '   \n  ')
+layoutWords = ('word', 'a b', 'x  y', 'p\n\nq', '&lt;')
+
+def checkLayout(count, seed):
+    r"""Give random documents of tags, whitespace & words the final clean-up with each engine, laying out the whitespace, returning a list of
+    the differences found. The documents are not of a Bible book, so that no tags slide and only the layout can differ.
+
+    Keyword arguments:
+    count -- The number of documents to check, in thousands
+    seed -- The seed of the random documents
+
+    """
+    failures = list()
+    rng = random.Random(seed)
+    token = usfm2osis.Converter(engine='token')
+    regex = usfm2osis.Converter(engine='regex')
+    for n in range(count * 1000):
+        osis = ''
+        for i in range(rng.randint(1, 25)):
+            osis += rng.choice(layoutSpaces) + (rng.choice(layoutTags) if rng.random() < 0.8 else rng.choice(layoutWords))
+        osis += rng.choice(layoutSpaces)
+        expected = regex.cleanupText(osis)
+        found = token.cleanupText(osis)
+        if found != expected:
+            failures.append('layout: ' + repr(osis) + ' gives ' + repr(found) + ', expected ' + repr(expected))
+    return failures
+
+# USFM that the engines once converted differently, or that one of them failed on
+engineCases = (
+    # a stray verse separator in the text, which the token engine's split of the verses would pair with those of the milestones
+    '\\id GEN\n\\c 1\n\\p\n\\v 1 a \uFDD2 b\n\\v 2 c\n',
+    '\\id GEN\n\\c 1\n\\p\n\\v 1 a \\vp 1a\\vp* \uFDD2 b\n\\v 2 c\n',
+    '\\id GEN\n\uFDD2\\c 1\n\\p\n\\v 1 a\n\\v 2 c\uFDD2\n\\v 3 d\n',
+    # notes that the regex engine passes through processNote again after \fig, \lit & \pb put newlines in them, or holding \fp
+    '\\f\n\\fig cap|a.jpg|col|||x|1:1\\fig*\nday\\f*',
+    '\\id GEN\n\\c 1\n\\p\n\\v 1 a \\f + \\ft b \\lit c \\pb d\\f* e\n',
+    '\\id GEN\n\\c 1\n\\p\n\\v 1 a \\f + \\fr 1:1 \\ft b \\fp c\\f* d \\x - \\xo 1:1 \\fp e\\x*\n',
+    )
+
+def checkCases(count, seed):
+    r"""Convert each of engineCases with each engine, returning a list of the differences found.
+
+    Keyword arguments:
+    count -- Unused, as the cases are fixed
+    seed -- Unused
+
+    """
+    failures = list()
+    token = usfm2osis.Converter(engine='token')
+    regex = usfm2osis.Converter(engine='regex')
+    for usfm in engineCases:
+        expected = regex.convertText(usfm)
+        try:
+            found = token.convertText(usfm)
+        except Exception as e:
+            found = 'an error: ' + (str(e) or e.__class__.__name__)
+        if found != expected:
+            failures.append('cases: ' + repr(usfm) + ' gives ' + repr(found) + ', expected ' + repr(expected))
+    return failures
+
+def checkAsync(count, seed):
+    r"""Convert books with Converter.convertManyAsync, in and out of order and with each number of processes up to 2, and one at a time
+    with Converter.convertFile, returning a list of the differences found.
+
+    Keyword arguments:
+    count -- The number of books to check
+    seed -- The seed of the random text
+
+    """
+    import asyncio
+
+    async def convertAll(converter, paths, processes, ordered):
+        return dict([(path, osis) async for path, osis in converter.convertManyAsync(paths, processes, ordered)])
+
+    failures = list()
+    workDir = tempfile.mkdtemp(prefix='usfm2osis-check-')
+    try:
+        codes = usfm2osis_bench.bibleBooks()
+        paths = list()
+        for n in range(count):
+            code = codes[n % len(codes)]
+            path = os.path.join(workDir, code + '.SFM')
+            usfmFile = codecs.open(path, 'w', 'utf-8')
+            usfmFile.write(usfm2osis_bench.generateBook(code, 3, 10, usfm2osis_bench.defaultMix, seed + n))
+            usfmFile.close()
+            paths.append(path)
+
+        converter = usfm2osis.Converter()
+        expected = dict([(path, converter.convertFile(path)) for path in paths])
+        for processes in (0, 1, 2):
+            for ordered in (True, False):
+                label = 'async: ' + str(processes) + ' processes' + ('' if ordered else ', unordered')
+                try:
+                    found = asyncio.run(convertAll(converter, paths, processes, ordered))
+                except Exception as e:
+                    failures.append(label + ' raised ' + e.__class__.__name__ + ': ' + str(e))
+                    continue
+                for path in paths:
+                    if path not in found:
+                        failures.append(label + ': ' + os.path.basename(path) + ' was not converted')
+                    elif found[path] != expected[path]:
+                        failures.append(label + ': ' + os.path.basename(path) + ' differs, ' + firstDifference(expected[path], found[path]))
+    finally:
+        shutil.rmtree(workDir, True)
+    return failures
+
+def request(port, method, path, body=None):
+    r"""Send a request to a conversion server on localhost, returning the status and the body of its response as text.
+
+    Keyword arguments:
+    port -- The server's TCP port
+    method -- The HTTP method
+    path -- The path & query string
+    body -- The body of the request as bytes, or None
+
+    """
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    try:
+        connection.request(method, path, body)
+        response = connection.getresponse()
+        return response.status, response.read().decode('utf-8', 'replace')
+    finally:
+        connection.close()
+
+def checkServer(count, seed):
+    r"""Start a conversion server on localhost with one worker & a queue of one request, and check its answers to a health request, a
+    conversion, a request with a bad option, and more conversion requests at once than it queues, returning a list of the failures found.
+
+    Keyword arguments:
+    count -- The number of conversion requests sent at once to fill the queue, less one
+    seed -- The seed of the random text
+
+    """
+    failures = list()
+    probe = socket.socket()
+    probe.bind(('127.0.0.1', 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    server = subprocess.Popen([sys.executable, converter, 'Bible.Check', '--serve', '127.0.0.1:' + str(port), '-j', '1', '--queue', '1'],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        # wait for the server to start its worker & listen
+        deadline = time.time() + 60
+        while True:
+            try:
+                status, body = request(port, 'GET', '/health')
+                break
+            except (IOError, OSError):
+                if server.poll() is not None or time.time() > deadline:
+                    return ['server: the server did not start']
+                time.sleep(0.1)
+        if status != 200 or json.loads(body).get('status') != 'ok':
+            failures.append('server: /health gives ' + str(status) + ' ' + body)
+
+        usfm = usfm2osis_bench.generateBook('GEN', 3, 10, shardMix, seed)
+        status, body = request(port, 'POST', '/convert?name=GEN', usfm.encode('utf-8'))
+        if status != 200:
+            failures.append('server: /convert gives ' + str(status) + ' ' + body)
+        elif body != usfm2osis.Converter().convertText(usfm):
+            failures.append('server: /convert differs from converting in-process')
+
+        status, body = request(port, 'POST', '/convert?engine=none', usfm.encode('utf-8'))
+        if status != 400:
+            failures.append('server: /convert with a bad option gives ' + str(status) + ', expected 400')
+
+        # a book long enough that the others arrive while it converts
+        usfm = usfm2osis_bench.generateBook('GEN', 150, 25, shardMix, seed).encode('utf-8')
+        statuses = list()
+        senders = [threading.Thread(target=lambda: statuses.append(request(port, 'POST', '/convert', usfm)[0])) for i in range(count + 1)]
+        for sender in senders:
+            sender.start()
+        for sender in senders:
+            sender.join()
+        if 200 not in statuses or 503 not in statuses:
+            failures.append('server: ' + str(count + 1) + ' requests at once with a queue of 1 give ' + ', '.join(map(str, sorted(statuses))) +
+                            ', expected 200 & 503')
+    finally:
+        server.terminate()
+        server.wait()
+    return failures
+
+# the checks, by name, in the order they are run
+checks = (('shards', checkShards), ('slides', checkSlides), ('layout', checkLayout), ('cases', checkCases), ('async', checkAsync),
+          ('server', checkServer))
+
+def printUsage():
+    r"""Prints usage statement."""
+    print('usfm2osis_check.py -- checks that the faster paths of usfm2osis.py give the same')
+    print('  OSIS as the paths they stand in for')
+    print('')
+    print('Usage: usfm2osis_check.py [CHECK ...] [OPTIONS]')
+    print('')
+    print('  CHECK            the checks to run (default all), of')
+    print('                     ' + ', '.join([name for name, check in checks]) + ':')
+    print('                     shards converts multi-chapter books with sections,')
+    print('                     introductions & notes split into chapter ranges')
+    print('                     (--shard-size 1 -j 4) and whole (--shard-size 0), and')
+    print('                     compares the bytes; slides gives random documents of')
+    print('                     tags, titles & milestones the final clean-up with each')
+    print('                     engine, and compares the tags slid past the milestones;')
+    print('                     layout does the same for random tags, whitespace & words,')
+    print('                     and compares their layout; cases converts USFM that the')
+    print('                     engines once differed or failed on with each engine;')
+    print('                     async converts books with convertManyAsync, with 0 to 2')
+    print('                     processes, in & out of order, and one at a time; server')
+    print('                     starts a conversion server on localhost with --queue 1,')
+    print('                     and checks /health, /convert, a 400 for a bad option, and')
+    print('                     a 503 for requests beyond the queue')
+    print('  -h, --help       print this usage information')
+    print('  -n COUNT         books of the shards & async checks, thousands of documents')
+    print('                     of the slides & layout checks, and requests beyond the')
+    print('                     queue of the server check (default 4)')
+    print('  --seed N         seed of the random text (default 1)')
+    sys.exit()
+
+if __name__ == "__main__":
+    if '-h' in sys.argv or '--help' in sys.argv:
+        printUsage()
+
+    def option(name, default):
+        r"""Return the value given for an option, or default if it is not given."""
+        if name in sys.argv:
+            i = sys.argv.index(name)+1
+            if len(sys.argv) < i+1:
+                printUsage()
+            return sys.argv[i]
+        return default
+
+    count = int(option('-n', '4'))
+    seed = int(option('--seed', '1'))
+    names = list()
+    i = 1
+    while i < len(sys.argv):
+        if sys.argv[i] in ('-n', '--seed'):
+            i += 2
+            continue
+        if sys.argv[i] not in dict(checks):
+            printUsage()
+        names.append(sys.argv[i])
+        i += 1
+
+    failures = list()
+    for name, check in checks:
+        if names and name not in names:
+            continue
+        found = check(count, seed)
+        print(name + ': ' + ('%d differences' % len(found) if found else 'OK'))
+        failures.extend(found)
+    # the first few differences of a broken path are enough to go on
+    for failure in failures[:10]:
+        print(failure)
+    if len(failures) > 10:
+        print('... and ' + str(len(failures) - 10) + ' more')
+    sys.exit(1 if failures else 0)